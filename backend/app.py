@@ -1,16 +1,63 @@
-from flask import Flask, request, jsonify, send_from_directory, send_file
+from flask import (
+    Flask,
+    Response,
+    request,
+    jsonify,
+    send_from_directory,
+    send_file,
+    stream_with_context,
+)
 import os
 import logging
-from datetime import datetime 
-from cachetools import TTLCache
-from functools import lru_cache
 import asyncio
+import contextlib
+import json
+import queue
+import re
+import threading
+import time
 
 # Define base paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Gets the directory where app.py is located
 EXPORTS_DIR = os.path.join(BASE_DIR, "exports")
 DOWNLOADS_DIR = os.path.join(BASE_DIR, "downloads")
 CAPTIONS_DIR = os.path.join(BASE_DIR, "captions")
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", os.path.join(BASE_DIR, "cache.db"))
+# Payload bytes kept in the default SQLite cache file before the oldest entries go
+CACHE_SHARED_MAX_BYTES = int(os.getenv("CACHE_SHARED_MAX_BYTES", str(2 * 1024**3)))
+# Shared by all worker processes: sqlite:///<path> (default) or redis://host:port/db
+CACHE_URL = os.getenv("CACHE_URL", f"sqlite:///{CACHE_DB_PATH}?max_bytes={CACHE_SHARED_MAX_BYTES}")
+CACHE_MEMORY_BYTES = int(os.getenv("CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))  # per process
+CACHE_COMPRESS_THRESHOLD = int(os.getenv("CACHE_COMPRESS_THRESHOLD", "4096"))  # bytes
+SEARCH_DB_PATH = os.getenv("SEARCH_DB_PATH", os.path.join(BASE_DIR, "search.db"))
+SEARCH_MAX_RESULTS = 100
+METADATA_MAX_AGE = 3600  # Refresh view counts after an hour
+METADATA_STATIC_MAX_AGE = 7 * 24 * 3600  # Titles, durations and player data change rarely
+ARTIFACT_MAX_AGE = 365 * 24 * 3600  # Content-addressed, so safe to cache for a year
+SRT_STAGE = "artifact:srt:v2"  # v2 has HH:MM:SS,mmm timestamps; v1 files were not valid SRT
+VIDEO_ID_PATTERN = re.compile(r"[0-9A-Za-z_-]{11}")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "32"))
+JOB_MAX_RETAINED = int(os.getenv("JOB_MAX_RETAINED", "100"))  # jobs, with results, kept for /jobs/<id>
+ASYNC_WORKERS = int(os.getenv("ASYNC_WORKERS", "32"))  # threads for blocking calls on the event loop
+# Pipelines (requests and queued or running jobs) admitted at once; more get a 429
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "64"))
+# /process answers within this many seconds (0 waits indefinitely), with
+# whatever stages are done; clients can ask for less with ``deadline``.
+PROCESS_DEADLINE_SECONDS = float(os.getenv("PROCESS_DEADLINE_SECONDS", "300"))
+# Stages still running at the deadline get this long to finish and be cached
+PROCESS_BACKGROUND_SECONDS = float(os.getenv("PROCESS_BACKGROUND_SECONDS", "300"))
+# Summary fragments a slow /process/stream client may fall behind by before they are dropped
+STREAM_MAX_BUFFERED_EVENTS = int(os.getenv("STREAM_MAX_BUFFERED_EVENTS", "256"))
+# Each video of a batch is admitted as one pipeline, so no batch can be larger than that
+BATCH_MAX_VIDEOS = min(int(os.getenv("BATCH_MAX_VIDEOS", "200")), ADMISSION_MAX_IN_FLIGHT)
+# Concurrent calls per provider while processing a batch
+BATCH_PROVIDER_LIMITS = {
+    "youtube": int(os.getenv("BATCH_YOUTUBE_CONCURRENCY", "4")),
+    "deepgram": int(os.getenv("BATCH_DEEPGRAM_CONCURRENCY", "2")),
+    "cohere": int(os.getenv("BATCH_COHERE_CONCURRENCY", "3")),
+    "gtts": int(os.getenv("BATCH_GTTS_CONCURRENCY", "2")),
+}
 
 # Initialize directories with absolute paths
 for directory in [EXPORTS_DIR, DOWNLOADS_DIR, CAPTIONS_DIR]:
@@ -20,33 +67,166 @@ for directory in [EXPORTS_DIR, DOWNLOADS_DIR, CAPTIONS_DIR]:
 
 # Import utils and set the directories
 from utils import (
-    get_video_metadata,
+    fetch_videos,
+    get_playlist_video_ids,
     download_audio,
-    summarize_text,
+    summarize_transcript,
     transcribe_audio,
-    get_word_frequency,
-    get_youtube_player_data,
+    stream_transcribe_audio,
+    transcribe_audio_segmented,
+    STREAMING_TRANSCRIPTION,
+    SEGMENT_TRANSCRIPTION_MIN_SECONDS,
+    analyze_keywords,
     get_video_captions,
     generate_srt_file,
     generate_audio,
     export_summary_to_pdf,
-    cleanup_old_files,
     sanitize_filename,
     parse_duration_to_seconds,  
     format_duration,
     set_directories,  # Import the new function
+    extract_video_id,
+    artifact_store,
+    janitor,
+    provider_limiters,
 )
+from stage_cache import StageCache
+from cache_backends import create_backend, register_type
+from captions import CueTrack, json_default
+from singleflight import SingleFlight
+from stage_graph import StageGraph, StageError
+from jobs import JobManager, QueueFullError, stream_job_events
+from event_loop import EventLoopThread
+from metadata import MetadataService
+from search import TranscriptIndex
+from transcription import ffmpeg_available
+from responses import compress_response, parse_fields, shape_result
+from metrics import registry, snapshot, Counter, Gauge, CONTENT_TYPE
+from ratelimit import AdmissionController, RateLimitedError
+from deadlines import DeadlineExceeded, with_deadline
 
 # Set directories in utils
 set_directories(EXPORTS_DIR, DOWNLOADS_DIR, CAPTIONS_DIR)
 
-# Initialize cache with 1-hour timeout
-cache = TTLCache(maxsize=100, ttl=3600)
+# Old and least recently used files are evicted off the request path
+janitor.start()
+
+# Subtitles are cached column-wise instead of as one dict per cue
+register_type("cues", CueTrack, CueTrack.to_columns, CueTrack.from_columns)
+
+# Per-stage cache keyed by canonical video ID, shared across workers and restarts
+cache = StageCache(
+    create_backend(CACHE_URL),
+    memory_bytes=CACHE_MEMORY_BYTES,
+    compress_threshold=CACHE_COMPRESS_THRESHOLD,
+)
+# Coalesces identical in-flight stages across concurrent requests
+inflight = SingleFlight()
+# Batched, revalidating videos.list lookups backed by the stage cache
+video_metadata = MetadataService(
+    fetch_videos, cache, ttl=METADATA_STATIC_MAX_AGE, stats_ttl=METADATA_MAX_AGE
+)
+# Full-text index of every processed transcript, updated as videos are processed
+search_index = TranscriptIndex(SEARCH_DB_PATH)
+# Background workers for the asynchronous /jobs API
+jobs = JobManager(
+    max_workers=JOB_WORKERS, max_queued=JOB_QUEUE_SIZE, max_retained=JOB_MAX_RETAINED
+)
+# Rejects new pipelines with a 429 once too many are queued or running
+admission = AdmissionController(ADMISSION_MAX_IN_FLIGHT)
+# One long-lived loop runs every pipeline, sharing pooled connections
+event_loop = EventLoopThread(executor_workers=ASYNC_WORKERS)
+event_loop.start()
 logging.basicConfig(level=logging.INFO)
 
+HTTP_REQUESTS = registry.counter(
+    "ytsum_http_requests_total",
+    "HTTP requests by route and status.",
+    ("method", "endpoint", "status"),
+)
+HTTP_SECONDS = registry.histogram(
+    "ytsum_http_request_duration_seconds", "Time to build the HTTP response.", ("endpoint",)
+)
+HTTP_IN_FLIGHT = registry.gauge("ytsum_http_requests_in_flight", "HTTP requests being handled.")
+HTTP_RESPONSE_BYTES = registry.counter(
+    "ytsum_http_response_bytes_total", "Response body bytes sent, after compression.", ("endpoint",)
+)
+STAGE_SECONDS = registry.histogram(
+    "ytsum_stage_duration_seconds",
+    "Pipeline stage and artifact build latency, including cache hits.",
+    ("stage", "outcome"),
+)
+PIPELINE_SECONDS = registry.histogram(
+    "ytsum_pipeline_duration_seconds", "End-to-end video processing time.", ("outcome",)
+)
+PIPELINES_IN_FLIGHT = registry.gauge("ytsum_pipelines_in_flight", "Videos being processed.")
+TRANSCRIPTS = registry.counter(
+    "ytsum_transcripts_fetched_total",
+    "Transcripts fetched on a cache miss, by source (captions or Deepgram).",
+    ("transcription_source",),
+)
+INCOMPLETE_STAGES = registry.counter(
+    "ytsum_incomplete_stages_total",
+    "Stages missing from a /process result, still pending at the deadline or failed.",
+    ("stage", "status"),
+)
+
 app = Flask(__name__)
 
 
+def _endpoint():
+    # The route pattern, not the path, so video IDs don't become label values
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+
+@app.before_request
+def start_request_metrics():
+    request.metrics_started = time.perf_counter()
+    HTTP_IN_FLIGHT.inc()
+
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if hasattr(request, "metrics_started"):
+        HTTP_IN_FLIGHT.dec()
+
+
+@app.after_request
+def compress(response):
+    # gzip or brotli for JSON/text bodies, negotiated with Accept-Encoding
+    response = compress_response(response, request.headers.get("Accept-Encoding"))
+    endpoint = _endpoint()
+    HTTP_REQUESTS.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+    if hasattr(request, "metrics_started"):
+        # Streamed bodies are still being produced; this measures time to first byte
+        HTTP_SECONDS.observe(time.perf_counter() - request.metrics_started, endpoint=endpoint)
+    if response.content_length:
+        HTTP_RESPONSE_BYTES.inc(response.content_length, endpoint=endpoint)
+    return response
+
+
+def shape_options():
+    """Read ``fields`` and ``compact`` from the query string or JSON body."""
+    data = request.get_json(silent=True) or {}
+    fields = parse_fields(request.args.get("fields") or data.get("fields"))
+    compact = request.args.get("compact", data.get("compact", False))
+    if isinstance(compact, str):
+        compact = compact.lower() in ("1", "true", "yes")
+    return fields, bool(compact)
+
+
+def rate_limited_response(e):
+    response = jsonify({"error": e.message, "retry_after": e.retry_after})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response
+
+
+@app.errorhandler(RateLimitedError)
+def handle_rate_limited(e):
+    return rate_limited_response(e)
+
+
 @app.errorhandler(Exception)
 def handle_exception(e):
     logging.error(f"Global error handler: {str(e)}")
@@ -63,115 +243,957 @@ def serve_static(filename):
     return send_from_directory("../frontend", filename)
 
 
+def _no_report(stage, progress=None, delta=None, **partial):
+    pass
+
+
+async def cached_stage(video_id, stage, compute, max_age=None):
+    """Return a cached stage value, or compute it once per video.
+
+    Concurrent requests for the same video and stage share a single
+    in-flight computation; ``compute`` is responsible for caching its
+    result when it succeeds.
+    """
+    value = await cache.aget(video_id, stage, max_age=max_age)
+    if value is not None:
+        return value
+
+    async def run():
+        # Another request may have finished this stage since our lookup
+        value = await cache.aget(video_id, stage, max_age=max_age)
+        if value is not None:
+            return value
+        return await compute()
+
+    return await inflight.do((video_id, stage), run)
+
+
+async def process_async(video_url, video_id, summary_mode, report=_no_report, limits=None, deadline=None):
+    """Run the full pipeline for one video.
+
+    Stages are wired into a StageGraph so that independent work (captions
+    vs. metadata) overlaps, and blocking SDK calls run in worker threads.
+    Optional artifacts (SRT, audio, keywords) are only referenced here and
+    built lazily by their own endpoints. Returns a ``(result, status_code)`` tuple.
+    With a ``deadline`` in seconds, which every provider call made for the
+    video observes, the result is returned when time is up: metadata and
+    transcript with the summary marked ``pending`` in ``stage_status``, or
+    a 504 if even those are not ready. A failed summary is marked
+    ``failed`` instead of failing the request.
+    ``report(stage, progress=None, delta=None, **partial)`` is called as
+    each stage starts or produces output so that background jobs and
+    streaming responses can expose progress, summary text deltas and
+    partial results. ``limits`` optionally maps provider names ("youtube",
+    "deepgram", "cohere", "gtts") to semaphores shared with other videos
+    processed on the same event loop.
+    """
+
+    def limit(provider):
+        if limits and provider in limits:
+            return limits[provider]
+        return contextlib.nullcontext()
+
+    async def once(stage, compute, max_age=None):
+        return await cached_stage(video_id, stage, compute, max_age=max_age)
+
+    async def fetch_video_info():
+        # Concurrent lookups are batched into shared videos.list calls
+        info = await video_metadata.get(video_id)
+        if info.get("error"):
+            logging.error(f"Metadata retrieval failed: {info['error']}")
+            raise StageError("Video metadata not found", 404)
+        return info
+
+    async def load_video_info(_):
+        report("metadata")
+        info = await fetch_video_info()
+        report("metadata", metadata=info["metadata"], player_data=info["player_data"])
+        return info
+
+    async def download_and_transcribe(segmented=False):
+        # Step 2b: Download the audio file, then transcribe it
+        report("download", progress=0)
+        async with limit("youtube"):
+            downloaded_audio = await download_audio(
+                video_url,
+                progress_callback=lambda pct: report("download", progress=pct),
+            )
+        if downloaded_audio["status"] == "error":
+            raise StageError(downloaded_audio["message"])
+
+        report("transcription")
+        async with limit("deepgram"):
+            if segmented:
+                transcription_response = await transcribe_audio_segmented(
+                    downloaded_audio["audio_file"]
+                )
+            else:
+                transcription_response = await transcribe_audio(
+                    downloaded_audio["audio_file"]
+                )
+        if transcription_response["status"] == "error":
+            raise StageError(transcription_response["message"])
+        return transcription_response
+
+    async def fetch_transcript():
+        # Step 1: Attempt to get official captions
+        report("captions")
+        async with limit("youtube"):
+            captions_response = await get_video_captions(video_url)
+
+        if captions_response:
+            subtitles = captions_response["subtitles"]  # Use official captions
+            transcript = subtitles.text  # Cue texts joined, timestamps removed
+            subtitles_source = "youtube_captions"
+            transcription_source = "official_captions"
+        else:
+            # Long videos are split and transcribed in parallel segments;
+            # this shares the in-flight metadata lookup with video_info.
+            info = await fetch_video_info()
+            duration_seconds = parse_duration_to_seconds(info["metadata"].get("duration"))
+            segmented = (
+                duration_seconds is not None
+                and duration_seconds >= SEGMENT_TRANSCRIPTION_MIN_SECONDS
+                and ffmpeg_available()
+            )
+
+            transcription_response = None
+            if STREAMING_TRANSCRIPTION and not segmented:
+                # Step 2a: Pipe the audio download straight into Deepgram
+                report("transcription", progress=0)
+                async with limit("youtube"), limit("deepgram"):
+                    transcription_response = await stream_transcribe_audio(
+                        video_url,
+                        progress_callback=lambda pct: report("transcription", progress=pct),
+                    )
+                if transcription_response["status"] == "error":
+                    logging.warning(
+                        f"Streaming transcription failed, falling back to download: "
+                        f"{transcription_response['message']}"
+                    )
+                    transcription_response = None
+
+            if transcription_response is None:
+                transcription_response = await download_and_transcribe(segmented)
+
+            transcript = transcription_response["transcript"]
+            subtitles = transcription_response["subtitles"]  # Fake timestamps
+            subtitles_source = "generated_from_transcription"
+            transcription_source = "deepgram"
+
+        transcript_data = {
+            "subtitles": subtitles,
+            "subtitles_source": subtitles_source,
+            "transcription_source": transcription_source,
+        }
+        if transcript != subtitles.text:
+            # Only kept when it differs from the cue texts, e.g. Deepgram's own punctuation
+            transcript_data["transcript"] = transcript
+        await cache.aset(video_id, "transcript", transcript_data)
+        TRANSCRIPTS.inc(transcription_source=transcription_source)
+        return transcript_data
+
+    async def load_transcript(_):
+        transcript_data = unpack_transcript(await once("transcript", fetch_transcript))
+        # Also covers transcripts cached before indexing existed or after search.db was lost
+        if not search_index.is_known(video_id):
+            index_in_background(video_id, transcript_data["subtitles"])
+        report(
+            "transcript",
+            transcription=transcript_data["transcript"],
+            subtitles=transcript_data["subtitles"],
+            transcription_source=transcript_data["transcription_source"],
+            subtitles_source=transcript_data["subtitles_source"],
+        )
+        return transcript_data
+
+    async def summarize(inputs):
+        # Step 4: Generate summary (cached per mode)
+        report("summary")
+        summary_stage = f"summary:{summary_mode}"
+
+        async def compute():
+            duration_seconds = None
+            metadata = inputs["video_info"]["metadata"]
+            if "duration" in metadata:
+                duration_seconds = parse_duration_to_seconds(metadata["duration"])
+                logging.info(f"Video duration: {format_duration(duration_seconds)}")
+            async with limit("cohere"):
+                summary = await summarize_transcript(
+                    inputs["transcript"]["transcript"],
+                    mode=summary_mode,
+                    duration_seconds=duration_seconds,
+                    subtitles=inputs["transcript"]["subtitles"],
+                    on_delta=lambda text: report("summary", delta=text),
+                )
+            await cache.aset(video_id, summary_stage, summary)
+            return summary
+
+        try:
+            summary = await once(summary_stage, compute)
+        except Exception as e:
+            logging.error(f"Error generating summary for {video_id}: {e}")
+            report("summary", summary=None, status="failed", error=str(e))
+            raise
+        report("summary", summary=summary)
+        return summary
+
+    # SRT, audio and keyword analytics are built on first access
+    artifacts = artifact_urls(video_id, summary_mode)
+    report("artifacts", artifacts=artifacts)
+
+    graph = StageGraph()
+    graph.add("video_info", load_video_info)
+    graph.add("transcript", load_transcript)
+    graph.add("summary", summarize, deps=("video_info", "transcript"))
+
+    try:
+        with PIPELINES_IN_FLIGHT.track(), PIPELINE_SECONDS.time(), with_deadline(deadline) as budget:
+            outputs = await graph.run(
+                timeout=budget.remaining() if budget else None, optional=("summary",)
+            )
+            if graph.pending:
+                # Let unfinished stages complete and cache their results for the next request
+                budget.extend(PROCESS_BACKGROUND_SECONDS)
+    except StageError as e:
+        return {"error": e.message}, e.status_code
+    except RateLimitedError as e:
+        logging.warning(f"Processing {video_id} was rate limited: {e.message}")
+        return {"error": e.message, "retry_after": e.retry_after}, 429
+    except DeadlineExceeded as e:
+        return {"error": str(e)}, 504
+    except Exception as inner_e:
+        logging.exception(f"Inner async processing error: {inner_e}")
+        return {"error": str(inner_e)}, 500
+    finally:
+        observe_stages(graph)
+
+    timings = graph.report()
+    logging.info(
+        f"Processed {video_id} in {timings['total_ms']} ms, critical path "
+        f"{' -> '.join(timings['critical_path'])} ({timings['critical_path_ms']} ms)"
+    )
+
+    stage_status = {name: graph.status(name) for name in ("video_info", "transcript", "summary")}
+    for name, status in stage_status.items():
+        if status != "done":
+            INCOMPLETE_STAGES.inc(stage=name, status=status)
+    if graph.pending:
+        logging.warning(f"Deadline reached for {video_id}, still running: {', '.join(sorted(graph.pending))}")
+
+    if "transcript" not in outputs or "video_info" not in outputs:
+        result = {
+            "error": "Processing did not finish in time, try again shortly",
+            "stage_status": stage_status,
+        }
+        if "video_info" in outputs:
+            result["metadata"] = outputs["video_info"]["metadata"]
+        return result, 504
+
+    if "summary" not in outputs:
+        # The spoken summary can only be built once there is a summary
+        artifacts = dict(artifacts, audio=None)
+
+    transcript_data = outputs["transcript"]
+    result = {
+        "metadata": outputs["video_info"]["metadata"],
+        "player_data": outputs["video_info"]["player_data"],
+        "transcription": transcript_data["transcript"],
+        "subtitles": transcript_data["subtitles"],
+        "summary": outputs.get("summary"),
+        "transcription_source": transcript_data["transcription_source"],
+        "subtitles_source": transcript_data["subtitles_source"],
+        "artifacts": artifacts,
+        "stage_status": stage_status,
+        "partial": "summary" not in outputs,
+        "timings": timings,
+    }
+    if graph.errors:
+        result["stage_errors"] = {name: str(error) for name, error in graph.errors.items()}
+        retry_after = [e.retry_after for e in graph.errors.values() if isinstance(e, RateLimitedError)]
+        if retry_after:
+            # When asking again is likely to get the summary too
+            result["retry_after"] = max(retry_after)
+
+    return result, 200
+
+
+def observe_stages(graph):
+    """Record the latency of every stage that ran, including failed ones."""
+    for name, (started, finished) in graph.timings.items():
+        outcome = "error" if name in graph.failed else "ok"
+        STAGE_SECONDS.observe(finished - started, stage=name, outcome=outcome)
+
+
+def artifact_urls(video_id, summary_mode):
+    return {
+        "srt": f"/videos/{video_id}/srt",
+        "audio": f"/videos/{video_id}/audio?mode={summary_mode}",
+        "keywords": f"/videos/{video_id}/keywords",
+    }
+
+
+def unpack_transcript(transcript_data):
+    """Fill in ``transcript`` and make ``subtitles`` a CueTrack.
+
+    The transcript is only stored when it differs from the joined cue
+    texts; entries cached as lists of subtitle dicts are converted.
+    """
+    subtitles = CueTrack.from_value(transcript_data["subtitles"])
+    return dict(
+        transcript_data,
+        subtitles=subtitles,
+        transcript=transcript_data.get("transcript") or subtitles.text,
+    )
+
+
+def index_transcript(video_id, subtitles):
+    """Add a video's cues to the search index unless they are already there."""
+    if search_index.index_video(video_id, subtitles):
+        logging.info(f"Indexed {len(subtitles)} cues of {video_id} for search")
+
+
+def index_in_background(video_id, subtitles):
+    """Index a transcript in a worker thread, off the critical path."""
+    future = asyncio.get_running_loop().run_in_executor(None, index_transcript, video_id, subtitles)
+
+    def log_failure(future):
+        if not future.cancelled() and future.exception() is not None:
+            logging.error(f"Search indexing failed for {video_id}: {future.exception()}")
+
+    future.add_done_callback(log_failure)
+
+
+async def _require_stage(video_id, stage):
+    value = await cache.aget(video_id, stage)
+    if value is None:
+        raise StageError("Video has not been processed yet", 404)
+    return value
+
+
+async def build_srt(video_id):
+    """Write the SRT export for a processed video, once."""
+    transcript_data = unpack_transcript(await _require_stage(video_id, "transcript"))
+
+    filename = await cache.aget(video_id, SRT_STAGE)
+    if filename and artifact_store.exists(filename):
+        return filename
+
+    async def compute():
+        filename = await generate_srt_file(transcript_data["subtitles"])
+        await cache.aset(video_id, SRT_STAGE, filename)
+        return filename
+
+    return await inflight.do((video_id, SRT_STAGE), compute)
+
+
+async def build_audio(video_id, summary_mode, on_chunk=None):
+    """Synthesize the spoken summary for a processed video and mode, once.
+
+    ``on_chunk`` receives the MP3 bytes of each synthesized chunk in order,
+    but only if this call is the one doing the synthesis.
+    """
+    summary = await _require_stage(video_id, f"summary:{summary_mode}")
+
+    async def compute():
+        # generate_audio reuses an existing file for the same summary text
+        filename = await asyncio.to_thread(generate_audio, summary, on_chunk=on_chunk)
+        if not filename:
+            raise StageError("Audio generation failed")
+        return filename
+
+    return await inflight.do((video_id, f"artifact:audio:{summary_mode}"), compute)
+
+
+async def build_keywords(video_id):
+    """Keyword analytics for a processed video, cached once per video."""
+    transcript_data = unpack_transcript(await _require_stage(video_id, "transcript"))
+
+    async def compute():
+        keywords = await asyncio.to_thread(
+            analyze_keywords, transcript_data["transcript"], transcript_data["subtitles"]
+        )
+        if not keywords["word_frequency"]:
+            logging.warning(f"No word frequency data generated for transcript")
+        else:
+            await cache.aset(video_id, "keywords", keywords)
+        return keywords
+
+    return await cached_stage(video_id, "keywords", compute)
+
+
+def send_artifact(name, download_name=None, as_attachment=True):
+    """Serve a stored artifact with a strong ETag and long-lived caching.
+
+    Artifact names are content hashes, so a name never changes meaning:
+    conditional requests get 304s, Range requests get 206s, and clients
+    may cache the response indefinitely.
+    """
+    path = artifact_store.path(name)
+    janitor.touch(path)
+    response = send_file(
+        path,
+        mimetype=artifact_store.mimetype(name),
+        as_attachment=as_attachment,
+        download_name=download_name or name,
+        etag=artifact_store.etag(name),
+        conditional=True,
+        max_age=ARTIFACT_MAX_AGE,
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def _video_title(video_id):
+    video_info = cache.get(video_id, "video_info")
+    if video_info is None:
+        return video_id
+    return sanitize_filename(video_info["metadata"]["title"])
+
+
+def run_artifact(builder, *args):
+    """Run an artifact builder, turning StageError into a JSON error response."""
+    stage = builder.__name__.replace("build_", "", 1)
+    try:
+        with STAGE_SECONDS.time(stage=stage):
+            return event_loop.run(builder(*args)), None
+    except StageError as e:
+        return None, (jsonify({"error": e.message}), e.status_code)
+
+
+@app.route("/videos/<video_id>/srt")
+def video_srt(video_id):
+    if not VIDEO_ID_PATTERN.fullmatch(video_id):
+        return jsonify({"error": "Invalid video ID"}), 400
+    filename, error = run_artifact(build_srt, video_id)
+    if error:
+        return error
+    return send_artifact(filename, download_name=f"{_video_title(video_id)}_captions.srt")
+
+
+@app.route("/videos/<video_id>/audio")
+def video_audio(video_id):
+    """Serve the spoken summary, streaming it while it is synthesized.
+
+    When this request has to generate the audio, the first chunk is sent
+    as soon as it is ready and the rest follows in order. Audio that is
+    already on disk, or was produced by a concurrent request, is served as
+    a regular file.
+    """
+    if not VIDEO_ID_PATTERN.fullmatch(video_id):
+        return jsonify({"error": "Invalid video ID"}), 400
+    summary_mode = request.args.get("mode", "short")
+
+    # MP3 chunks arrive as bytes; the final item is a (filename, error) tuple
+    chunks = queue.Queue()
+
+    def run():
+        try:
+            with STAGE_SECONDS.time(stage="audio"):
+                filename = event_loop.run(
+                    build_audio(video_id, summary_mode, on_chunk=chunks.put)
+                )
+            chunks.put((filename, None))
+        except (StageError, RateLimitedError) as e:
+            chunks.put((None, e))
+        except Exception as e:
+            logging.exception(f"Audio generation failed for {video_id}: {e}")
+            chunks.put((None, StageError(str(e))))
+
+    threading.Thread(target=run, daemon=True).start()
+
+    first = chunks.get()
+    if isinstance(first, tuple):
+        filename, error = first
+        if isinstance(error, RateLimitedError):
+            return rate_limited_response(error)
+        if error:
+            return jsonify({"error": error.message}), error.status_code
+        return send_artifact(
+            filename, download_name=f"{_video_title(video_id)}.mp3", as_attachment=False
+        )
+
+    def generate():
+        yield first
+        while True:
+            item = chunks.get()
+            if isinstance(item, tuple):
+                if item[1]:
+                    logging.error(f"Audio stream for {video_id} ended early: {item[1].message}")
+                return
+            yield item
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="audio/mpeg",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@app.route("/videos/<video_id>/keywords")
+def video_keywords(video_id):
+    if not VIDEO_ID_PATTERN.fullmatch(video_id):
+        return jsonify({"error": "Invalid video ID"}), 400
+    keywords, error = run_artifact(build_keywords, video_id)
+    if error:
+        return error
+    return jsonify(keywords), 200
+
+
+@app.route("/search")
+def search_transcripts():
+    """Ranked subtitle cues matching ``q`` across every processed video.
+
+    ``video_id`` restricts the search to one video and ``limit`` caps the
+    number of hits. Each hit carries ``start_seconds`` to seek the player to.
+    """
+    query = (request.args.get("q") or "").strip()
+    if not query:
+        return jsonify({"error": "No query provided"}), 400
+    video_id = request.args.get("video_id")
+    if video_id and not VIDEO_ID_PATTERN.fullmatch(video_id):
+        return jsonify({"error": "Invalid video ID"}), 400
+    limit = min(max(request.args.get("limit", 20, type=int), 1), SEARCH_MAX_RESULTS)
+
+    started = time.perf_counter()
+    hits = search_index.search(query, video_id=video_id, limit=limit)
+    titles = {}
+    for hit in hits:
+        if hit["video_id"] not in titles:
+            info = cache.get(hit["video_id"], "video_info")
+            titles[hit["video_id"]] = info["metadata"].get("title") if info and "metadata" in info else None
+        hit["title"] = titles[hit["video_id"]]
+    return jsonify(
+        {
+            "query": query,
+            "video_id": video_id,
+            "hits": hits,
+            "took_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+    ), 200
+
+
+def parse_process_request():
+    """Validate a /process style JSON body.
+
+    Returns ``(params, None)`` on success or ``(None, (error, status))``.
+    """
+    data = request.get_json(silent=True) or {}
+    video_url = data.get("url")
+    if not video_url:
+        return None, ({"error": "No URL provided"}, 400)
+
+    summary_mode = data.get("summary_mode", "short")  # Get mode from request
+
+    video_id = extract_video_id(video_url)
+    if not video_id:
+        return None, ({"error": "Invalid YouTube URL"}, 400)
+
+    return {"url": video_url, "video_id": video_id, "summary_mode": summary_mode}, None
+
+
+def parse_deadline():
+    """Seconds a /process client will wait, from ``deadline`` in the query string or JSON body.
+
+    Returns ``(seconds, None)``, where None means no deadline, or ``(None, (error, status))``.
+    """
+    data = request.get_json(silent=True) or {}
+    value = request.args.get("deadline", data.get("deadline"))
+    if value is None:
+        return PROCESS_DEADLINE_SECONDS or None, None
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        seconds = 0
+    if not seconds > 0:
+        return None, ({"error": "deadline must be a positive number of seconds"}, 400)
+    if PROCESS_DEADLINE_SECONDS:
+        seconds = min(seconds, PROCESS_DEADLINE_SECONDS)
+    return seconds, None
+
+
 @app.route("/process", methods=["POST"])
 def process_video():
+    """Run the pipeline and return its result.
+
+    ``fields=metadata,summary`` (query string or JSON body) limits the
+    response to those sections; ``compact=1`` returns columnar subtitles
+    without the duplicated transcript text. ``deadline`` (seconds, at most
+    PROCESS_DEADLINE_SECONDS) bounds how long to wait: a summary that is not
+    ready by then is marked ``pending`` in ``stage_status`` and finishes in
+    the background, so asking again shortly returns it from the cache.
+    """
     try:
-        video_url = request.json.get("url")
-
-        if not video_url:
-            return jsonify({"error": "No URL provided"}), 400
-
-        summary_mode = request.json.get(
-            "summary_mode", "short"
-        )  # Get mode from request
-
-        # Create composite cache key
-        cache_key = f"{video_url}:{summary_mode}"
-        cached_result = cache.get(cache_key)
-        if cached_result:
-            return jsonify(cached_result), 200
-
-        logging.info(f"Processing video URL: {video_url}")
-
-        async def process_async():
-            try:
-                metadata = get_video_metadata(video_url)
-                if not metadata:
-                    logging.error(f"Metadata retrieval failed: {metadata}")
-                    return jsonify({"error": "Video metadata not found"}), 404
-
-                player_data = get_youtube_player_data(video_url)
-                if player_data.get("error"):
-                    return jsonify({"error": player_data["error"]}), 400
-                duration_seconds = None
-                if "duration" in metadata:
-                    duration_seconds = parse_duration_to_seconds(metadata["duration"])
-                    logging.info(f"Video duration: {format_duration(duration_seconds)}")
-                # Step 1: Attempt to get official captions
-                captions_response = await get_video_captions(video_url)
-
-                if captions_response:
-                    subtitles = captions_response["subtitles"]  # Use official captions
-                    transcript = " ".join(
-                        [sub["text"] for sub in subtitles]
-                    )  # Remove timestamps
-                    subtitles_source = "youtube_captions"
-                else:
-                    # Step 2: If no official captions, download audio and transcribe
-                    downloaded_audio = await download_audio(video_url)
-                    if downloaded_audio["status"] == "error":
-                        return jsonify({"error": downloaded_audio["message"]}), 500
-
-                    transcription_response = await transcribe_audio(
-                        downloaded_audio["audio_file"]
-                    )
-                    if transcription_response["status"] == "error":
-                        return (
-                            jsonify({"error": transcription_response["message"]}),
-                            500,
-                        )
-
-                    transcript = transcription_response["transcript"]
-                    subtitles = transcription_response["subtitles"]  # Fake timestamps
-                    subtitles_source = "generated_from_transcription"
-
-                # Step 3: Generate SRT file for captions
-                srt_filename = await generate_srt_file(subtitles, metadata["title"])
-
-                # Step 4: Generate summary
-                summary = summarize_text(transcript, mode=summary_mode, duration_seconds=duration_seconds)
-
-                # Step 5: Generate audio summary
-                audio_filename = generate_audio(summary, f"summary_{metadata['title']}")
-
-                word_frequency = get_word_frequency(transcript)
-                if not word_frequency:
-                    logging.warning(f"No word frequency data generated for transcript")
-                result = {
-                    "metadata": metadata,
-                    "player_data": player_data,
-                    "transcription": transcript,
-                    "subtitles": subtitles,
-                    "summary": summary,
-                    "transcription_source": (
-                        "official_captions" if captions_response else "deepgram"
-                    ),
-                    "word_frequency": word_frequency or {},
-                    "subtitles_source": subtitles_source,
-                    "srt_filename": srt_filename,
-                    "audio_filename": audio_filename,
-                }
-
-                cache[cache_key] = result
-                return jsonify(result), 200
-            except Exception as inner_e:
-                logging.exception(f"Inner async processing error: {inner_e}")
-                return jsonify({"error": str(inner_e)}), 500
-
-        cleanup_old_files(EXPORTS_DIR)
-        return asyncio.run(process_async())
+        params, error = parse_process_request()
+        if not error:
+            deadline, error = parse_deadline()
+        if error:
+            return jsonify(error[0]), error[1]
 
+        logging.info(f"Processing video URL: {params['url']} (id={params['video_id']})")
+
+        with admission.admit():
+            result, status = event_loop.run(
+                process_async(
+                    params["url"], params["video_id"], params["summary_mode"], deadline=deadline
+                )
+            )
+        if status == 429:
+            return rate_limited_response(RateLimitedError(result["error"], result["retry_after"]))
+        fields, compact = shape_options()
+        return jsonify(shape_result(result, fields, compact)), status
+
+    except RateLimitedError as e:
+        return rate_limited_response(e)
     except Exception as e:
         logging.exception(f"An unexpected error occurred: {e}")
         return jsonify({"error": str(e)}), 500
 
 
+def submit_job(target, params):
+    """Admit and queue a background job, or raise RateLimitedError (429).
+
+    The job holds its admission ticket while it is queued and running.
+    """
+    ticket = admission.admit()
+
+    def run(report):
+        with ticket:
+            return target(report)
+
+    try:
+        return jobs.submit(run, params)
+    except QueueFullError as e:
+        ticket.release()
+        raise RateLimitedError(str(e), admission.retry_after()) from e
+
+
+def stream_job(params, pipeline, ticket=None):
+    """Run the coroutine ``pipeline(report, emit)`` on the shared loop and stream it as SSE.
+
+    Like /process, the pipeline holds an admission ticket but no job worker
+    thread. ``emit(event, data)`` pushes one Server-Sent Event to the
+    client; the stream starts with a ``job`` event carrying the job ID and
+    ends when the pipeline returns. Nothing more is buffered once the
+    client disconnects, and ``summary_delta`` fragments are dropped while
+    the client is STREAM_MAX_BUFFERED_EVENTS behind, since the final
+    ``summary`` event carries the whole text. ``ticket`` is an admission
+    already taken by the caller; by default one unit is admitted here.
+    """
+    ticket = ticket or admission.admit()
+    # The client gets the result over the stream, so the job only keeps its status
+    job = jobs.start(params, keep_result=False)
+    events = queue.Queue()
+    connected = threading.Event()
+    connected.set()
+
+    def emit(event, data):
+        if not connected.is_set():
+            return
+        if event == "summary_delta" and events.qsize() >= STREAM_MAX_BUFFERED_EVENTS:
+            return
+        events.put((event, data))
+
+    async def run():
+        try:
+            with ticket:
+                try:
+                    result, status = await pipeline(job.report, emit)
+                except Exception as e:
+                    logging.exception(f"Job {job.id} failed: {e}")
+                    result, status = {"error": str(e)}, 500
+                    emit("error", {"error": str(e), "status": status})
+                jobs.finish(job, result, status)
+        finally:
+            events.put(None)
+
+    event_loop.submit(run())
+
+    def generate():
+        try:
+            yield f"event: job\ndata: {json.dumps({'job_id': job.id})}\n\n"
+            while True:
+                try:
+                    item = events.get(timeout=15)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    return
+                event, data = item
+                yield f"event: {event}\ndata: {json.dumps(data, default=json_default)}\n\n"
+        finally:
+            connected.clear()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/process/stream", methods=["POST"])
+def process_video_stream():
+    """Streaming variant of /process.
+
+    Emits Server-Sent Events as stages finish: ``artifacts`` (URLs of the
+    lazily built SRT, audio and keywords), ``metadata`` and ``transcript``
+    first, then ``summary_delta`` fragments as Cohere generates them and the
+    final ``summary``. The stream ends with ``done`` (stage timings) or
+    ``error``.
+    """
+    params, error = parse_process_request()
+    if error:
+        return jsonify(error[0]), error[1]
+
+    async def pipeline(job_report, emit):
+        def report(stage, progress=None, delta=None, **partial):
+            job_report(stage, progress=progress, delta=delta, **partial)
+            if delta is not None:
+                emit("summary_delta", {"text": delta})
+            elif partial:
+                emit(stage, partial)
+
+        result, status = await process_async(
+            params["url"], params["video_id"], params["summary_mode"], report
+        )
+        if status >= 400:
+            emit("error", {"error": result.get("error"), "status": status})
+        else:
+            emit("done", {"timings": result.get("timings")})
+        return result, status
+
+    return stream_job(params, pipeline)
+
+
+async def process_batch_async(video_ids, summary_mode, emit, on_video_done=None):
+    """Process many videos on one event loop with per-provider caps.
+
+    Metadata for all videos is fetched up front in multi-ID videos.list
+    calls; each video's result is emitted as soon as it finishes, followed
+    by a call to ``on_video_done()``.
+    """
+    await video_metadata.get_many(video_ids)
+
+    limits = {
+        provider: asyncio.Semaphore(size)
+        for provider, size in BATCH_PROVIDER_LIMITS.items()
+    }
+
+    async def run_one(video_id):
+        url = f"https://www.youtube.com/watch?v={video_id}"
+        try:
+            result, status = await process_async(url, video_id, summary_mode, limits=limits)
+        finally:
+            if on_video_done:
+                on_video_done()
+        if status >= 400:
+            emit("video", {"video_id": video_id, "status": status, "error": result.get("error")})
+        else:
+            emit("video", {"video_id": video_id, "status": status, "result": result})
+        return status < 400
+
+    outcomes = await asyncio.gather(*(run_one(video_id) for video_id in video_ids))
+    succeeded = sum(outcomes)
+    return {"total": len(video_ids), "succeeded": succeeded, "failed": len(video_ids) - succeeded}
+
+
+@app.route("/process/batch", methods=["POST"])
+def process_video_batch():
+    """Process a list of videos or a whole playlist.
+
+    Accepts ``urls`` (a list) and/or ``playlist_url``. Duplicate videos are
+    dropped after canonicalising to video IDs. Results stream back as one
+    ``video`` Server-Sent Event per video, followed by ``done``.
+    """
+    data = request.get_json(silent=True) or {}
+    summary_mode = data.get("summary_mode", "short")
+    urls = list(data.get("urls") or [])
+
+    playlist_url = data.get("playlist_url")
+    if playlist_url:
+        try:
+            playlist_ids = get_playlist_video_ids(playlist_url, max_videos=BATCH_MAX_VIDEOS)
+        except Exception as e:
+            logging.error(f"Playlist lookup failed: {e}")
+            return jsonify({"error": f"Could not read playlist: {e}"}), 400
+        if not playlist_ids:
+            return jsonify({"error": "Playlist not found or empty"}), 400
+        urls.extend(f"https://www.youtube.com/watch?v={video_id}" for video_id in playlist_ids)
+
+    if not urls:
+        return jsonify({"error": "No URLs provided"}), 400
+
+    video_ids = []
+    invalid = []
+    for url in urls:
+        video_id = extract_video_id(url)
+        if not video_id:
+            invalid.append(url)
+        elif video_id not in video_ids:
+            video_ids.append(video_id)
+
+    if not video_ids:
+        return jsonify({"error": "No valid YouTube URLs provided", "invalid": invalid}), 400
+    if len(video_ids) > BATCH_MAX_VIDEOS:
+        return jsonify({"error": f"At most {BATCH_MAX_VIDEOS} videos per batch"}), 400
+
+    params = {"video_ids": video_ids, "summary_mode": summary_mode}
+    # One admission unit per video, each given back as soon as that video is done
+    ticket = admission.admit(len(video_ids))
+    logging.info(f"Processing batch of {len(video_ids)} videos")
+
+    async def pipeline(job_report, emit):
+        emit("batch", {"video_ids": video_ids, "invalid": invalid})
+        summary = await process_batch_async(
+            video_ids, summary_mode, emit, on_video_done=lambda: ticket.release(1)
+        )
+        emit("done", summary)
+        return summary, 200
+
+    return stream_job(params, pipeline, ticket)
+
+
+@app.route("/jobs", methods=["POST"])
+def create_job():
+    params, error = parse_process_request()
+    if error:
+        return jsonify(error[0]), error[1]
+
+    def run(report):
+        return event_loop.run(
+            process_async(params["url"], params["video_id"], params["summary_mode"], report)
+        )
+
+    job = submit_job(run, params)
+
+    logging.info(f"Queued job {job.id} for video {params['video_id']}")
+    return (
+        jsonify(
+            {
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": f"/jobs/{job.id}",
+                "events_url": f"/jobs/{job.id}/events",
+            }
+        ),
+        202,
+    )
+
+
+@app.route("/jobs/<job_id>")
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    data = job.to_dict()
+    if data["result"]:
+        fields, compact = shape_options()
+        data["result"] = shape_result(data["result"], fields, compact)
+    return jsonify(data), 200
+
+
+@app.route("/jobs/<job_id>/events")
+def job_events(job_id):
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return Response(
+        stream_with_context(stream_job_events(job)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/stats")
+def stats():
+    """Counters for the cache, coalescing, metadata, search, admission, rate limits and storage."""
+    return jsonify(
+        {
+            "cache": cache.stats(),
+            "inflight": inflight.stats(),
+            "artifacts": artifact_store.stats(),
+            "storage": janitor.stats(),
+            "metadata": video_metadata.stats(),
+            "search": search_index.stats(),
+            "admission": admission.stats(),
+            "rate_limits": {name: limiter.stats() for name, limiter in provider_limiters.items()},
+        }
+    ), 200
+
+
+@registry.collector
+def collect_component_metrics():
+    """Counters the cache, coalescer, jobs, janitor and metadata service already keep."""
+    cache_stats = cache.stats()
+    memory = cache_stats["memory"]
+    yield snapshot(
+        Counter,
+        "ytsum_cache_lookups_total",
+        "Stage cache lookups by result; memory hits are served by the per-process LRU.",
+        labelnames=("result",),
+        values={
+            ("memory_hit",): cache_stats["memory_hits"],
+            ("shared_hit",): cache_stats["hits"] - cache_stats["memory_hits"],
+            ("miss",): cache_stats["misses"],
+        },
+    )
+    inflight_stats = inflight.stats()
+    yield snapshot(
+        Counter,
+        "ytsum_singleflight_calls_total",
+        "Stage computations started (leader) or joined (coalesced).",
+        labelnames=("role",),
+        values={
+            ("leader",): inflight_stats["leader"],
+            ("coalesced",): inflight_stats["coalesced"],
+        },
+    )
+
+    job_stats = jobs.stats()
+    storage = janitor.stats()
+    admission_stats = admission.stats()
+    for metric_type, name, documentation, value in (
+        (Gauge, "cache_memory_bytes", "In-process cache size.", memory["bytes"]),
+        (Counter, "cache_memory_evictions_total", "In-process cache evictions.", memory["evictions"]),
+        (Gauge, "singleflight_in_flight", "Stage computations running.", inflight_stats["in_flight"]),
+        (Gauge, "jobs_pending", "Background jobs queued or running.", job_stats["pending"]),
+        (Gauge, "jobs_retained", "Jobs kept for polling.", job_stats["retained"]),
+        (Gauge, "admission_in_flight", "Admitted pipelines.", admission_stats["in_flight"]),
+        (Counter, "admission_rejected_total", "Pipelines refused.", admission_stats["rejected"]),
+        (Gauge, "storage_bytes", "Bytes of downloads and exports on disk.", storage["bytes"]),
+        (Gauge, "storage_max_bytes", "Disk budget enforced by the janitor.", storage["max_bytes"]),
+        (Counter, "storage_evicted_bytes_total", "Bytes evicted.", storage["evicted_bytes"]),
+    ):
+        yield snapshot(metric_type, f"ytsum_{name}", documentation, value)
+
+    metadata_stats = video_metadata.stats()
+    for key, documentation in (
+        ("lookups", "Video metadata lookups."),
+        ("cache_hits", "Metadata lookups served from the stage cache."),
+        ("coalesced", "Metadata lookups that joined a batch already in flight."),
+        ("api_calls", "videos.list calls, one quota unit each."),
+        ("not_modified", "videos.list calls answered 304 Not Modified."),
+    ):
+        yield snapshot(Counter, f"ytsum_metadata_{key}_total", documentation, metadata_stats[key])
+
+
+@app.route("/metrics")
+def metrics():
+    """Prometheus text exposition of request, stage, provider and cache metrics."""
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
+
 @app.route("/exports/<filename>")
 def serve_exports(filename):
-    try:
-        return send_from_directory(EXPORTS_DIR, filename, as_attachment=True)
-    except Exception as e:
-        return jsonify({"error": str(e)}), 404
+    """Serve a stored artifact; ``?name=`` sets the download file name."""
+    if not artifact_store.is_valid_name(filename) or not artifact_store.exists(filename):
+        return jsonify({"error": "File not found"}), 404
+    download_name = request.args.get("name")
+    if download_name:
+        download_name = sanitize_filename(download_name)
+    return send_artifact(filename, download_name=download_name)
 
 
 @app.route("/export-summary", methods=["POST"])
@@ -184,33 +1206,18 @@ def export_summary():
 
         # Log information for debugging
         logging.info(f"Exporting summary: format={format_type}, title={title}")
-        
-        # Create filename with timestamp
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        filename = f"{title}_{timestamp}.{format_type}"
-        filepath = os.path.join(EXPORTS_DIR, filename)
-        
-        logging.info(f"Export path: {filepath}")
 
         if format_type == "pdf":
-            # Just pass the filename, not the full path
-            result = export_summary_to_pdf(content, filename)
-            if not result:
+            filename = export_summary_to_pdf(content)
+            if not filename:
                 raise Exception("PDF generation failed")
-            # The filepath should be where the function saved the file
-            filepath = os.path.join(EXPORTS_DIR, result)
+        elif format_type == "txt":
+            filename = artifact_store.put(content, "txt")
         else:
-            # For text files, write directly to the path
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(content)
-
-        # Check if file exists before sending
-        if not os.path.exists(filepath):
-            logging.error(f"File not found after export: {filepath}")
-            return jsonify({"error": "File not found after export"}), 500
-            
-        logging.info(f"File created successfully, sending file: {filepath}")
-        return send_file(filepath, as_attachment=True, download_name=filename)
+            return jsonify({"error": f"Unsupported format: {format_type}"}), 400
+
+        logging.info(f"Export stored as {filename}")
+        return send_artifact(filename, download_name=f"{title}.{format_type}")
 
     except Exception as e:
         logging.exception(f"Export error: {e}")
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+
+MIMETYPES = {
+    "srt": "application/x-subrip",
+    "mp3": "audio/mpeg",
+    "pdf": "application/pdf",
+    "txt": "text/plain",
+}
+
+_NAME = re.compile(r"[0-9a-f]{32}\.(?:srt|mp3|pdf|txt)")
+
+
+class ArtifactStore:
+    """Content-addressed export files.
+
+    Every artifact is stored as ``<digest>.<ext>``, where the digest is the
+    SHA-256 of its content (or, for audio, of the text it was synthesized
+    from). Identical exports therefore map to one file that is written
+    once, and since a name never refers to different bytes the digest
+    doubles as a strong ETag.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.deduplicated = 0
+
+    @staticmethod
+    def digest(data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        return hashlib.sha256(data).hexdigest()[:32]
+
+    @staticmethod
+    def is_valid_name(name):
+        return _NAME.fullmatch(name) is not None
+
+    @staticmethod
+    def etag(name):
+        return name.split(".", 1)[0]
+
+    @staticmethod
+    def mimetype(name):
+        return MIMETYPES.get(name.rsplit(".", 1)[-1], "application/octet-stream")
+
+    def name_for(self, key, ext):
+        """Name for an artifact addressed by the input it is derived from."""
+        return f"{self.digest(key)}.{ext}"
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def exists(self, name):
+        return os.path.exists(self.path(name))
+
+    def put(self, data, ext):
+        """Store ``data`` (bytes or str) and return its name.
+
+        Content that is already present is not written again. New content
+        goes to a temporary file that is renamed into place, so readers
+        never see a partial artifact.
+        """
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        name = self.name_for(data, ext)
+        if self.exists(name):
+            with self._lock:
+                self.deduplicated += 1
+            return name
+
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path(name))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            self.writes += 1
+        return name
+
+    def stats(self):
+        with self._lock:
+            return {"writes": self.writes, "deduplicated": self.deduplicated}
@@ -0,0 +1,145 @@
+"""Caption parsing throughput: utils.parse_srt vs the captions engine.
+
+Usage: python benchmarks/bench_captions.py [--cues 12000] [--repeat 15]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# utils builds API clients at import time; the benchmark never calls them
+os.environ.setdefault("COHERE_API_KEY", "benchmark")
+os.environ.setdefault("YOUTUBE_API_KEY", "benchmark")
+
+from pytubefix.captions import Caption  # noqa: E402
+
+from captions import cues_to_srt, iter_cues, parse_captions  # noqa: E402
+from utils import parse_srt  # noqa: E402
+
+SAMPLE_LINES = [
+    "so today we're going to talk about",
+    "the two minute rule and why it works",
+    "[Music]",
+    "if something takes less than two minutes",
+    "just do it right now",
+]
+
+
+def make_cues(count):
+    cues = []
+    t = 0.0
+    for i in range(count):
+        duration = 2.0 + (i % 3) * 0.5
+        cues.append((t, t + duration, SAMPLE_LINES[i % len(SAMPLE_LINES)]))
+        t += duration
+    return cues
+
+
+def make_json3(cues):
+    return {
+        "wireMagic": "pb3",
+        "events": [
+            {
+                "tStartMs": int(start * 1000),
+                "dDurationMs": int((end - start) * 1000),
+                "segs": [{"utf8": text}],
+            }
+            for start, end, text in cues
+        ],
+    }
+
+
+def make_xml(cues):
+    """YouTube srv1 timed-text XML, the format pytubefix converts to SRT."""
+    body = "".join(
+        f'<text start="{start:.2f}" dur="{end - start:.2f}">{text}</text>'
+        for start, end, text in cues
+    )
+    return f'<?xml version="1.0" encoding="utf-8" ?><transcript>{body}</transcript>'
+
+
+def make_vtt(cues):
+    srt = cues_to_srt(cues)
+    return "WEBVTT\n\n" + srt.replace(",", ".")
+
+
+def best_of(fn, repeat):
+    timings = []
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = fn()
+            timings.append(time.perf_counter() - started)
+    finally:
+        gc.enable()
+    return min(timings), result
+
+
+def previous_caption_path(xml, path):
+    """What get_video_captions used to do: XML -> SRT -> file -> read -> parse_srt."""
+    caption = object.__new__(Caption)  # only the conversion helpers are used
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(caption.xml_caption_to_srt(xml))
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_srt(f.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cues", type=int, default=12000)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    cues = make_cues(args.cues)
+    srt = cues_to_srt(cues)
+    inputs = {
+        "srt": srt,
+        "vtt": make_vtt(cues),
+        "xml": make_xml(cues),
+        "json3": make_json3(cues),
+    }
+
+    results = {"cues": args.cues}
+    baseline, baseline_subs = best_of(lambda: parse_srt(srt), args.repeat)
+    results["parse_srt"] = {"seconds": baseline, "cues_per_second": args.cues / baseline}
+
+    for fmt, content in inputs.items():
+        elapsed, subs = best_of(lambda: parse_captions(content, fmt), args.repeat)
+        assert len(subs) == len(baseline_subs), (fmt, len(subs))
+        results[f"parse_captions[{fmt}]"] = {
+            "seconds": elapsed,
+            "cues_per_second": args.cues / elapsed,
+            "speedup": baseline / elapsed,
+        }
+
+    elapsed, count = best_of(lambda: sum(1 for _ in iter_cues(srt, "srt")), args.repeat)
+    results["iter_cues[srt]"] = {
+        "seconds": elapsed,
+        "cues_per_second": count / elapsed,
+        "speedup": baseline / elapsed,
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "captions.srt")
+        previous, previous_subs = best_of(
+            lambda: previous_caption_path(inputs["xml"], path), args.repeat
+        )
+    current, current_subs = best_of(lambda: parse_captions(inputs["xml"], "xml"), args.repeat)
+    assert len(previous_subs) == len(current_subs)
+    results["end_to_end[xml]"] = {
+        "previous_seconds": previous,
+        "current_seconds": current,
+        "speedup": previous / current,
+    }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
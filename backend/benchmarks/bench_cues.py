@@ -0,0 +1,107 @@
+"""Memory and cache cost of subtitles: subtitle dicts vs CueTrack.
+
+Parses synthetic timed-text XML for a long video both ways and reports
+the Python heap each representation (plus its transcript string) holds,
+the size of its stage cache payload and the time to decode that payload.
+
+Usage: python benchmarks/bench_cues.py [--hours 3] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_backends import decode_value, encode_value, register_type  # noqa: E402
+from captions import CueTrack, format_timestamp_simple, iter_cues  # noqa: E402
+
+VOCABULARY = (
+    "the a and of to in is that it for on with as this was procrastination habit rule "
+    "minutes start task brain motivation action simple small progress goal focus energy"
+).split()
+
+
+def make_xml(hours, seed=1):
+    rng = random.Random(seed)
+    lines = ['<?xml version="1.0" encoding="utf-8" ?><transcript>']
+    t = 0.0
+    while t < hours * 3600:
+        text = " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(6, 12)))
+        duration = rng.uniform(2.0, 4.0)
+        lines.append(f'<text start="{t:.2f}" dur="{duration:.2f}">{text}</text>')
+        t += duration
+    lines.append("</transcript>")
+    return "".join(lines)
+
+
+def parse_dicts(content):
+    """The previous representation: one dict per cue plus a joined transcript."""
+    subtitles = [
+        {
+            "index": index,
+            "start_seconds": start,
+            "end_seconds": end,
+            "start": format_timestamp_simple(start),
+            "end": format_timestamp_simple(end),
+            "text": text,
+        }
+        for index, (start, end, text) in enumerate(iter_cues(content, "xml"), 1)
+    ]
+    return {"transcript": " ".join(sub["text"] for sub in subtitles), "subtitles": subtitles}
+
+
+def parse_track(content):
+    subtitles = CueTrack.from_cues(iter_cues(content, "xml"))
+    return {"subtitles": subtitles}
+
+
+def heap_bytes(build, content):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build(content)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, after - before
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    register_type("cues", CueTrack, CueTrack.to_columns, CueTrack.from_columns)
+    content = make_xml(args.hours)
+    results = {}
+    for name, build in (("dicts", parse_dicts), ("cue_track", parse_track)):
+        value, heap = heap_bytes(build, content)
+        payload, _ = encode_value(value)
+        results[name] = {
+            "cues": len(value["subtitles"]),
+            "heap_bytes": heap,
+            "parse_ms": best_of(lambda: build(content), args.repeat),
+            "cache_payload_bytes": len(payload),
+            "cache_decode_ms": best_of(lambda: decode_value(payload), args.repeat),
+        }
+    results["heap_reduction"] = round(
+        results["dicts"]["heap_bytes"] / results["cue_track"]["heap_bytes"], 1
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""Offline end-to-end throughput of /process and /export-summary.
+
+Runs the Flask app on a local port with every external service replaced
+by the stand-ins in ``fake_providers`` (configurable latency, jitter and
+error rate) and drives it at a fixed concurrency. Videos have official
+captions or go through Deepgram in the catalog's ratio and last 10 minutes
+to 4 hours, so transcripts and summaries have realistic sizes.
+
+Prints JSON with p50/p95/p99 latency, requests per second and status
+counts per endpoint, per-stage latency from the responses' ``timings``,
+provider call counts and peak RSS. ``--output`` saves it, and
+``--baseline`` compares against a file saved on another commit. Settings
+read by the app at import (``SUMMARY_CONCURRENCY`` etc.) are taken from
+the environment as usual.
+
+Usage: python benchmarks/bench_e2e.py [--requests 40] [--concurrency 8]
+    [--captions-ratio 0.7] [--durations 600,3600,14400]
+    [--profile cohere=2.0:1.5:0.01] [--deadline 5] [--output results.json]
+    [--baseline old.json]
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from fake_providers import Catalog, FakeProviders, Profile  # noqa: E402
+
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {}
+
+    def at(q):
+        return round(values[min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))], 1)
+
+    return {
+        "p50_ms": at(50),
+        "p95_ms": at(95),
+        "p99_ms": at(99),
+        "max_ms": round(values[-1], 1),
+        "mean_ms": round(sum(values) / len(values), 1),
+    }
+
+
+def peak_rss_bytes():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Recorder:
+    """Latencies, status codes and stage timings collected by the workers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+        self.stages = {}
+        self.pipeline_ms = []
+        self.degraded = {}
+
+    def add(self, endpoint, seconds, status):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(seconds * 1000)
+            counts = self.statuses.setdefault(endpoint, {})
+            counts[str(status)] = counts.get(str(status), 0) + 1
+
+    def add_degraded(self, endpoint):
+        # A partial 200: the summary failed or missed the deadline
+        with self._lock:
+            self.degraded[endpoint] = self.degraded.get(endpoint, 0) + 1
+
+    def add_timings(self, timings):
+        with self._lock:
+            if timings.get("total_ms") is not None:
+                self.pipeline_ms.append(timings["total_ms"])
+            for name, stage in timings.get("stages", {}).items():
+                self.stages.setdefault(name, []).append(stage["end_ms"] - stage["start_ms"])
+
+    def report(self, elapsed):
+        endpoints = {}
+        for endpoint, latencies in self.latencies.items():
+            statuses = self.statuses[endpoint]
+            errors = sum(count for status, count in statuses.items() if int(status) >= 400)
+            degraded = self.degraded.get(endpoint, 0)
+            endpoints[endpoint] = dict(
+                requests=len(latencies),
+                errors=errors,
+                degraded=degraded,
+                requests_per_second=round(len(latencies) / elapsed, 2),
+                # Complete, successful responses per second
+                goodput_per_second=round((len(latencies) - errors - degraded) / elapsed, 2),
+                statuses=statuses,
+                **percentiles(latencies),
+            )
+        return {
+            "endpoints": endpoints,
+            "pipeline": percentiles(self.pipeline_ms),
+            "stages": {name: percentiles(values) for name, values in sorted(self.stages.items())},
+        }
+
+
+def drive(base_url, video_ids, args):
+    """Send ``args.requests`` requests at ``args.concurrency`` and record them."""
+    recorder = Recorder()
+    local = threading.local()
+    rng = random.Random(args.seed)
+    # Decide up front which requests also export or fetch audio, so runs repeat
+    plan = [
+        (video_ids[i % len(video_ids)], rng.random() < args.export_ratio, rng.random() < args.audio_ratio)
+        for i in range(args.requests)
+    ]
+
+    def session():
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return local.session
+
+    def timed(endpoint, method, url, **kwargs):
+        for attempt in range(args.retries + 1):
+            start = time.perf_counter()
+            try:
+                response = session().request(method, url, timeout=args.timeout, **kwargs)
+                response.content  # Read the whole body
+                status = response.status_code
+            except requests.RequestException:
+                response, status = None, 599
+            recorder.add(endpoint, time.perf_counter() - start, status)
+            if status != 429 or attempt == args.retries:
+                return response
+            # Back off as told, like a well-behaved client
+            time.sleep(float(response.headers.get("Retry-After", 1)))
+
+    def run_one(video_id, export, audio):
+        response = timed(
+            "/process",
+            "POST",
+            f"{base_url}/process",
+            json=dict(
+                {"url": f"https://www.youtube.com/watch?v={video_id}", "summary_mode": args.mode},
+                **({"deadline": args.deadline} if args.deadline else {}),
+            ),
+        )
+        if response is None or response.status_code != 200:
+            return
+        result = response.json()
+        recorder.add_timings(result.get("timings") or {})
+        if result.get("partial"):
+            recorder.add_degraded("/process")
+            return
+        if export:
+            timed(
+                "/export-summary",
+                "POST",
+                f"{base_url}/export-summary",
+                json={"format": args.export_format, "content": result["summary"], "title": video_id},
+            )
+        if audio:
+            timed(
+                "/videos/<video_id>/audio",
+                "GET",
+                f"{base_url}/videos/{video_id}/audio",
+                params={"mode": args.mode},
+            )
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for future in [pool.submit(run_one, *item) for item in plan]:
+            future.result()
+    elapsed = time.perf_counter() - start
+    return dict(recorder.report(elapsed), elapsed_s=round(elapsed, 2))
+
+
+def compare(results, baseline):
+    """Relative change of the headline numbers against a saved run."""
+    changes = {}
+    for endpoint, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(endpoint)
+        if not previous:
+            continue
+        changes[endpoint] = {
+            key: {
+                "baseline": previous[key],
+                "current": current[key],
+                "change_pct": round((current[key] - previous[key]) / previous[key] * 100, 1),
+            }
+            for key in ("p50_ms", "p95_ms", "p99_ms", "requests_per_second", "goodput_per_second")
+            if previous.get(key) and current.get(key) is not None
+        }
+    return {
+        "baseline_commit": baseline.get("commit"),
+        # Numbers are only comparable between runs of the same workload
+        "same_config": baseline.get("config") == results["config"]
+        and baseline.get("profiles") == results["profiles"],
+        "endpoints": changes,
+    }
+
+
+def parse_profiles(specs):
+    profiles = {}
+    for spec in specs:
+        name, _, value = spec.partition("=")
+        profiles[name] = Profile.parse(value)
+    return profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--videos", type=int, help="distinct videos (default: one per request)")
+    parser.add_argument("--durations", default="600,3600,14400", help="video lengths in seconds")
+    parser.add_argument("--captions-ratio", type=float, default=0.7)
+    parser.add_argument("--mode", default="short", help="summary mode")
+    parser.add_argument("--export-ratio", type=float, default=0.5)
+    parser.add_argument("--export-format", default="pdf", choices=("pdf", "txt"))
+    parser.add_argument("--audio-ratio", type=float, default=0.0)
+    parser.add_argument(
+        "--profile",
+        action="append",
+        default=[],
+        metavar="PROVIDER=LATENCY[:JITTER[:ERROR_RATE[:QUOTA]]]",
+        help="youtube, youtube_api, deepgram, cohere or tts; may be repeated",
+    )
+    parser.add_argument("--audio-kbps", type=float, default=48)
+    parser.add_argument("--download-mbps", type=float, default=40)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--deadline", type=float, help="/process deadline in seconds (default: the server's)")
+    parser.add_argument(
+        "--retries", type=int, default=0, help="retry 429 responses after Retry-After, up to this many times"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="results JSON from another commit to compare with")
+    parser.add_argument("--verbose", action="store_true", help="keep the app's logging")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="ytsum-bench-")
+    os.environ["CACHE_DB_PATH"] = os.path.join(tmp, "cache.db")
+    os.environ.pop("CACHE_URL", None)
+    os.environ["SEARCH_DB_PATH"] = os.path.join(tmp, "search.db")
+    for key in ("COHERE_API_KEY", "YOUTUBE_API_KEY", "DEEPGRAM_API_KEY"):
+        os.environ.setdefault(key, "offline")
+
+    from werkzeug.serving import make_server
+
+    import app as app_module
+    import utils
+
+    level = logging.INFO if args.verbose else logging.CRITICAL
+    for name in (None, "werkzeug"):
+        logging.getLogger(name).setLevel(level)
+    utils.set_directories(
+        os.path.join(tmp, "exports"), os.path.join(tmp, "downloads"), os.path.join(tmp, "captions")
+    )
+    app_module.EXPORTS_DIR = utils.EXPORTS_DIR
+
+    catalog = Catalog(
+        args.videos or args.requests,
+        durations=[int(d) for d in args.durations.split(",")],
+        captions_ratio=args.captions_ratio,
+        seed=args.seed,
+    )
+    providers = FakeProviders(
+        catalog,
+        parse_profiles(args.profile),
+        audio_kbps=args.audio_kbps,
+        download_mbps=args.download_mbps,
+        seed=args.seed,
+    )
+    providers.install()
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        rss_before = peak_rss_bytes()
+        results = drive(f"http://127.0.0.1:{server.server_port}", catalog.ids(), args)
+    finally:
+        server.shutdown()
+        providers.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "verbose", "profile")}
+    report = dict(
+        commit=git_commit(),
+        python=platform.python_version(),
+        config=config,
+        profiles={name: profile.to_dict() for name, profile in providers.profiles.items()},
+        **results,
+        provider_calls=providers.stats(),
+        rss={"before_load_bytes": rss_before, "peak_bytes": peak_rss_bytes()},
+    )
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Keyword analytics on a synthetic 3-hour transcript.
+
+Compares the previous per-call get_word_frequency algorithm (NLTK lookup and
+stopword sets rebuilt on every call, every token filtered individually) with
+KeywordAnalyzer.
+
+Usage: python benchmarks/bench_keywords.py [--hours 3] [--repeat 10]
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keywords import CUSTOM_STOP_WORDS, KeywordAnalyzer, load_nltk_stop_words  # noqa: E402
+
+VOCABULARY = (
+    "the a and of to in is that it for on with as this was procrastination habit rule "
+    "minutes start task brain motivation action simple small progress goal focus energy "
+    "research study people students work reading writing exercise system routine "
+    "actually basically really like know think going just something everything"
+).split()
+
+
+def make_transcript(hours, words_per_minute=150, seed=1):
+    rng = random.Random(seed)
+    total = int(hours * 60 * words_per_minute)
+    words = [rng.choice(VOCABULARY) for _ in range(total)]
+    subtitles = []
+    for i in range(0, total, 8):
+        start = i / words_per_minute * 60
+        subtitles.append(
+            {"start_seconds": start, "end_seconds": start + 3.2, "text": " ".join(words[i : i + 8])}
+        )
+    return " ".join(words), subtitles
+
+
+def previous_word_frequency(text, min_length=4, top_n=50):
+    """The old get_word_frequency body, without the in-request nltk.download."""
+    try:
+        import nltk
+
+        nltk.data.find("corpora/stopwords")
+        from nltk.corpus import stopwords
+
+        nltk_stop_words = set(stopwords.words("english"))
+    except (ImportError, LookupError):
+        nltk_stop_words = set()
+
+    stop_words = nltk_stop_words.union(set(CUSTOM_STOP_WORDS))
+    words = re.findall(r"\b\w+\b", text.lower())
+    words = [word for word in words if len(word) >= min_length and word not in stop_words]
+    return dict(Counter(words).most_common(top_n))
+
+
+def best_of(fn, repeat):
+    timings = []
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = fn()
+            timings.append(time.perf_counter() - started)
+    finally:
+        gc.enable()
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hours", type=float, default=3)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    text, subtitles = make_transcript(args.hours)
+    nltk_stop_words = load_nltk_stop_words(download=False)
+
+    started = time.perf_counter()
+    analyzer = KeywordAnalyzer(nltk_stop_words | CUSTOM_STOP_WORDS)
+    setup = time.perf_counter() - started
+
+    previous, expected = best_of(lambda: previous_word_frequency(text), args.repeat)
+    current, actual = best_of(lambda: analyzer.word_frequency(text), args.repeat)
+    assert actual == expected, "word frequencies differ"
+    full, analysis = best_of(lambda: analyzer.analyze(text, subtitles), args.repeat)
+
+    print(json.dumps({
+        "words": len(text.split()),
+        "analyzer_setup_seconds": setup,
+        "previous_word_frequency_seconds": previous,
+        "word_frequency_seconds": current,
+        "word_frequency_speedup": previous / current,
+        "analyze_seconds": full,
+        "keyphrases": len(analysis["keyphrases"]),
+        "timeline_buckets": len(analysis["timeline"]),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
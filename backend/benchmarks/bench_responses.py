@@ -0,0 +1,86 @@
+"""/process response size and serialization time for a long video.
+
+Builds the result of a synthetic 3-hour captioned video and compares the
+full JSON with the compact shape and with field selection, each raw and
+compressed (gzip, plus brotli when installed).
+
+Usage: python benchmarks/bench_responses.py [--hours 3] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from captions import CueTrack  # noqa: E402
+from responses import brotli, compress, shape_result  # noqa: E402
+
+VOCABULARY = (
+    "the a and of to in is that it for on with as this was procrastination habit rule "
+    "minutes start task brain motivation action simple small progress goal focus energy"
+).split()
+
+
+def make_result(hours, seed=1):
+    rng = random.Random(seed)
+    cues = []
+    t = 0.0
+    while t < hours * 3600:
+        text = " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(6, 12)))
+        end = t + rng.uniform(2.0, 4.0)
+        cues.append((round(t, 2), round(end, 2), text))
+        t = end
+    subtitles = CueTrack.from_cues(cues)
+    return {
+        "metadata": {"title": "Synthetic", "duration": f"PT{hours}H", "views": "1000"},
+        "player_data": {"video_id": "abcdefghijk", "embed_html": "<iframe></iframe>", "duration": f"PT{hours}H"},
+        "transcription": subtitles.text,
+        "subtitles": subtitles,
+        "summary": "Summary text. " * 100,
+        "transcription_source": "official_captions",
+        "subtitles_source": "youtube_captions",
+        "artifacts": {},
+        "timings": {},
+    }
+
+
+def measure(result, fields, compact, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = json.dumps(shape_result(result, fields, compact), separators=(",", ":")).encode()
+        best = min(best, time.perf_counter() - start)
+    row = {"bytes": len(body), "serialize_ms": round(best * 1000, 2)}
+    for encoding in ("gzip", "br") if brotli else ("gzip",):
+        start = time.perf_counter()
+        row[f"{encoding}_bytes"] = len(compress(body, encoding))
+        row[f"{encoding}_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    result = make_result(args.hours)
+    print(
+        json.dumps(
+            {
+                "cues": len(result["subtitles"]),
+                "full": measure(result, None, False, args.repeat),
+                "compact": measure(result, None, True, args.repeat),
+                "summary_only": measure(result, {"metadata", "summary"}, True, args.repeat),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
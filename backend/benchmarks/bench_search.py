@@ -0,0 +1,115 @@
+"""Transcript search latency: FTS5 index vs scanning cue lists.
+
+Indexes a synthetic corpus of multi-hour transcripts (Zipf-distributed
+vocabulary, so some words are very common and others rare) and times
+ranked queries across the whole corpus and within one video, against a
+linear scan over every cue as the frontend used to do per video.
+
+Usage: python benchmarks/bench_search.py [--videos 1000] [--hours 2] [--repeat 5]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from captions import CueTrack  # noqa: E402
+from search import TranscriptIndex  # noqa: E402
+
+VOCABULARY_SIZE = 20000
+
+
+def make_track(rng, hours, cum_weights):
+    # Draw every word of the video at once; per-cue draws dominate otherwise
+    count = int(hours * 3600 / 3) + 1
+    words = [f"w{w}" for w in rng.choices(range(VOCABULARY_SIZE), cum_weights=cum_weights, k=count * 12)]
+    cues = []
+    t = 0.0
+    for i in range(count):
+        end = t + rng.uniform(2.0, 4.0)
+        cues.append((round(t, 2), round(end, 2), " ".join(words[i * 12 : i * 12 + rng.randint(6, 12)])))
+        t = end
+    return CueTrack.from_cues(cues)
+
+
+def scan(tracks, terms):
+    hits = []
+    for video_id, track in tracks:
+        for i, text in enumerate(track.texts(), 1):
+            words = text.split()
+            if all(term in words for term in terms):
+                hits.append((video_id, i))
+    return hits
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 2), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=1000)
+    parser.add_argument("--hours", type=float, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(VOCABULARY_SIZE)))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        index = TranscriptIndex(os.path.join(tmp, "search.db"))
+        sample = []
+        elapsed = 0.0
+        for n in range(args.videos):
+            video_id = f"video{n:06d}"
+            track = make_track(rng, args.hours, cum_weights)
+            start = time.perf_counter()
+            index.index_video(video_id, track)
+            elapsed += time.perf_counter() - start
+            if n < 20:
+                sample.append((video_id, track))
+        results["index"] = dict(index.stats(), seconds=round(elapsed, 1))
+        results["index"]["db_bytes"] = sum(
+            os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp)
+        )
+
+        video_id = sample[0][0]
+        queries = {"common": "w1", "medium": "w200", "rare": "w15000", "two_words": "w3 w40"}
+        for name, query in queries.items():
+            corpus_ms, hits = best_of(lambda: index.search(query, limit=20), args.repeat)
+            video_ms, video_hits = best_of(
+                lambda: index.search(query, video_id=video_id, limit=20), args.repeat
+            )
+            scan_ms, _ = best_of(lambda: scan(sample[:1], query.split()), args.repeat)
+            results[name] = {
+                "query": query,
+                "corpus_ms": corpus_ms,
+                "corpus_hits": len(hits),
+                "video_ms": video_ms,
+                "video_hits": len(video_hits),
+                "scan_one_video_ms": scan_ms,
+                # Extrapolated: scanning every video's cues for a corpus query
+                "scan_corpus_ms_estimate": round(scan_ms * args.videos),
+            }
+
+        track = make_track(rng, args.hours, cum_weights)
+        start = time.perf_counter()
+        index.index_video("video-new", track)
+        results["incremental_add_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Chunked parallel text-to-speech with the fake engine.
+
+Compares synthesizing a long summary in one call (what a single gTTS save
+does) with sentence chunks synthesized in parallel, reporting total time
+and time until the first chunk could be streamed.
+
+Usage: python benchmarks/bench_tts.py [--words 900] [--concurrency 4]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tts import FakeTTSEngine, split_text, synthesize_to_file  # noqa: E402
+
+VOCABULARY = (
+    "the summary explains how small habits compound over time and why starting "
+    "with a tiny task makes it easier to keep going when motivation is low"
+).split()
+
+
+def make_summary(words, seed=1):
+    rng = random.Random(seed)
+    sentences = []
+    total = 0
+    while total < words:
+        length = rng.randint(8, 24)
+        sentences.append(" ".join(rng.choice(VOCABULARY) for _ in range(length)).capitalize() + ".")
+        total += length
+    return " ".join(sentences)
+
+
+def run(text, engine, max_chars, concurrency):
+    first = []
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "out.mp3")
+        synthesize_to_file(
+            text,
+            path,
+            engine,
+            max_chars=max_chars,
+            concurrency=concurrency,
+            on_chunk=lambda data: first or first.append(time.perf_counter() - start),
+        )
+        size = os.path.getsize(path)
+    return {
+        "total_s": round(time.perf_counter() - start, 3),
+        "first_chunk_s": round(first[0], 3),
+        "bytes": size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=900)
+    parser.add_argument("--chunk-chars", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="per-request latency (s)")
+    parser.add_argument("--seconds-per-char", type=float, default=0.002)
+    args = parser.parse_args()
+
+    text = make_summary(args.words)
+    engine = FakeTTSEngine(latency=args.latency, seconds_per_char=args.seconds_per_char)
+    single = run(text, engine, max_chars=len(text), concurrency=1)
+    chunked = run(text, engine, max_chars=args.chunk_chars, concurrency=args.concurrency)
+
+    print(
+        json.dumps(
+            {
+                "characters": len(text),
+                "chunks": len(split_text(text, args.chunk_chars)),
+                "single_call": single,
+                "chunked_parallel": chunked,
+                "speedup": round(single["total_s"] / chunked["total_s"], 2),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+"""Local stand-ins for YouTube, the YouTube Data API, Cohere, Deepgram and gTTS.
+
+Each fake has a ``Profile`` (latency, jitter, error rate) and serves
+synthetic content sized like a real video of the catalog's duration:
+timed-text captions with a cue every ~3 s, audio at ``audio_kbps`` and a
+Deepgram response with ~2.5 words per second. Deepgram runs as a local
+HTTP server so the pooled aiohttp client and the streaming upload are
+exercised as in production; the others replace the client objects in
+``utils`` through ``set_providers``.
+"""
+
+import asyncio
+import collections
+import contextlib
+import itertools
+import os
+import random
+import socket
+import threading
+import time
+from functools import lru_cache
+from types import SimpleNamespace
+
+from aiohttp import web
+
+from tts import FakeTTSEngine
+
+VOCABULARY = (
+    "the a and of to in is that it for on with as this was you we they have be "
+    "habit rule minutes start task brain motivation action simple small progress goal "
+    "focus energy time work people idea system change learn practice result problem "
+    "question answer example reason point story video today first next important"
+).split()
+WORDS_PER_SECOND = 2.5
+
+
+class Profile:
+    """Latency and failure behaviour of one fake provider, per call.
+
+    ``quota`` (calls per second, 0 for none) is enforced like a provider's
+    rate limit: calls beyond it in any one-second window fail quickly.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, quota=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.quota = quota
+
+    @classmethod
+    def parse(cls, spec):
+        """Build from ``latency[:jitter[:error_rate[:quota]]]``, e.g. ``1.5:0.5:0.01:10``."""
+        return cls(*(float(part) for part in spec.split(":")))
+
+    def to_dict(self):
+        return {
+            "latency": self.latency,
+            "jitter": self.jitter,
+            "error_rate": self.error_rate,
+            "quota": self.quota,
+        }
+
+
+# Roughly what each service takes per call from a well-connected server
+DEFAULT_PROFILES = {
+    "youtube_api": Profile(0.15, 0.1),
+    "youtube": Profile(0.4, 0.3),
+    "deepgram": Profile(1.5, 1.0),
+    "cohere": Profile(2.0, 1.5),
+    "tts": Profile(0.3, 0.2),
+}
+
+
+class InjectedError(RuntimeError):
+    """A failure injected by a fake provider's error rate."""
+
+
+def iso_duration(seconds):
+    hours, rest = divmod(int(seconds), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"PT{hours}H{minutes}M{seconds}S" if hours else f"PT{minutes}M{seconds}S"
+
+
+@lru_cache(maxsize=64)
+def make_words(seed, count):
+    rng = random.Random(seed)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+    return tuple(rng.choices(VOCABULARY, cum_weights=cum_weights, k=count))
+
+
+class Catalog:
+    """Synthetic videos with a duration and whether they have captions."""
+
+    def __init__(self, videos, durations=(600, 3600, 14400), captions_ratio=0.7, seed=1):
+        rng = random.Random(seed)
+        self.videos = {}
+        for n in range(videos):
+            self.videos[f"bench{n:06d}"] = {
+                "duration": rng.choice(durations),
+                "captions": rng.random() < captions_ratio,
+            }
+
+    def ids(self):
+        return list(self.videos)
+
+    def get(self, video_id):
+        return self.videos[video_id]
+
+    def video_item(self, video_id):
+        video = self.videos[video_id]
+        return {
+            "id": video_id,
+            "etag": f"etag-{video_id}",
+            "snippet": {
+                "title": f"Benchmark video {video_id}",
+                "description": "Synthetic video for offline benchmarks.",
+                "thumbnails": {"high": {"url": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"}},
+                "channelTitle": "Benchmarks",
+                "publishedAt": "2024-01-01T00:00:00Z",
+            },
+            "statistics": {"viewCount": "1000"},
+            "contentDetails": {"duration": iso_duration(video["duration"])},
+            "player": {"embedHtml": f'<iframe src="//www.youtube.com/embed/{video_id}"></iframe>'},
+        }
+
+    @lru_cache(maxsize=64)
+    def caption_xml(self, video_id):
+        duration = self.videos[video_id]["duration"]
+        words = make_words(video_id, int(duration * WORDS_PER_SECOND))
+        rng = random.Random(video_id)
+        lines = ['<?xml version="1.0" encoding="utf-8" ?><transcript>']
+        t, i = 0.0, 0
+        while i < len(words):
+            count = rng.randint(6, 10)
+            text = " ".join(words[i : i + count])
+            lines.append(f'<text start="{t:.2f}" dur="{count / WORDS_PER_SECOND:.2f}">{text}</text>')
+            t += count / WORDS_PER_SECOND
+            i += count
+        lines.append("</transcript>")
+        return "".join(lines)
+
+
+def deepgram_response(duration):
+    """A prerecorded Deepgram response for ``duration`` seconds of speech."""
+    words = make_words(int(duration), int(duration * WORDS_PER_SECOND))
+    step = 1 / WORDS_PER_SECOND
+    entries = []
+    for i, word in enumerate(words):
+        punctuated = word + "." if i % 12 == 11 else word
+        entries.append(
+            {
+                "word": word,
+                "punctuated_word": punctuated,
+                "start": round(i * step, 2),
+                "end": round(i * step + step * 0.8, 2),
+            }
+        )
+    transcript = " ".join(entry["punctuated_word"] for entry in entries)
+    return {"results": {"channels": [{"alternatives": [{"transcript": transcript, "words": entries}]}]}}
+
+
+class FakeProviders:
+    """All fakes for one benchmark run, with per-provider call counts.
+
+    ``install()`` points ``utils`` at them; ``close()`` stops the local
+    Deepgram server.
+    """
+
+    def __init__(self, catalog, profiles=None, audio_kbps=48, download_mbps=40, summary_words=250, seed=1):
+        self.catalog = catalog
+        self.profiles = dict(DEFAULT_PROFILES, **(profiles or {}))
+        self.audio_bytes_per_second = audio_kbps * 1000 / 8
+        self.download_bytes_per_second = download_mbps * 1_000_000 / 8
+        self.summary_words = summary_words
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counts = {name: {"calls": 0, "errors": 0, "throttled": 0} for name in self.profiles}
+        self._recent = {name: collections.deque() for name in self.profiles}
+        self._server = None
+
+    @contextlib.contextmanager
+    def call(self, provider):
+        """Count one call, then apply the provider's quota, latency and error rate."""
+        profile = self.profiles[provider]
+        with self._lock:
+            self._counts[provider]["calls"] += 1
+            if self._over_quota(provider, profile):
+                self._counts[provider]["throttled"] += 1
+                raise InjectedError(f"{provider} quota exceeded (429)")
+            delay = profile.latency + self._rng.uniform(0, profile.jitter)
+            fail = self._rng.random() < profile.error_rate
+            if fail:
+                self._counts[provider]["errors"] += 1
+        time.sleep(delay)
+        if fail:
+            raise InjectedError(f"Injected {provider} error")
+        yield
+
+    def _over_quota(self, provider, profile):
+        if not profile.quota:
+            return False
+        now = time.monotonic()
+        recent = self._recent[provider]
+        while recent and recent[0] <= now - 1:
+            recent.popleft()
+        if len(recent) >= profile.quota:
+            return True
+        recent.append(now)
+        return False
+
+    def stats(self):
+        with self._lock:
+            return {name: dict(counts) for name, counts in self._counts.items()}
+
+    # pytubefix
+
+    def youtube_class(self):
+        providers = self
+
+        class YouTube:
+            def __init__(self, url, on_progress_callback=None):
+                self.video_id = url.rsplit("v=", 1)[-1][:11]
+                self.video = providers.catalog.get(self.video_id)
+                self.title = f"Benchmark video {self.video_id}"
+                self.streams = SimpleNamespace(get_audio_only=lambda: FakeAudioStream(providers, self.video))
+
+            @property
+            def captions(self):
+                with providers.call("youtube"):
+                    if not self.video["captions"]:
+                        return {}
+                    return {"en": FakeCaptionTrack(providers, self.video_id)}
+
+        return YouTube
+
+    # YouTube Data API
+
+    def youtube_api_factory(self):
+        return lambda: FakeYouTubeAPI(self)
+
+    # Cohere
+
+    def cohere_client(self):
+        return FakeCohere(self)
+
+    # Deepgram
+
+    def start_deepgram(self):
+        """Serve the Deepgram listen API on a local port and return its URL."""
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        ready = threading.Event()
+        loop = asyncio.new_event_loop()
+
+        async def listen(request):
+            received = 0
+            async for chunk in request.content.iter_chunked(1 << 16):
+                received += len(chunk)
+            try:
+                await asyncio.to_thread(self._deepgram_call)
+            except InjectedError as e:
+                return web.Response(status=500, text=str(e))
+            duration = received / self.audio_bytes_per_second
+            return web.json_response(await asyncio.to_thread(deepgram_response, duration))
+
+        async def serve():
+            app = web.Application(client_max_size=0)
+            app.router.add_post("/v1/listen", listen)
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            await web.SockSite(runner, sock).start()
+            ready.set()
+            return runner
+
+        def run():
+            asyncio.set_event_loop(loop)
+            self._runner = loop.run_until_complete(serve())
+            loop.run_forever()
+
+        self._server = (loop, threading.Thread(target=run, daemon=True))
+        self._server[1].start()
+        ready.wait()
+        return f"http://127.0.0.1:{port}/v1/listen"
+
+    def _deepgram_call(self):
+        with self.call("deepgram"):
+            pass
+
+    # gTTS
+
+    def tts_factory(self):
+        providers = self
+
+        class Engine(FakeTTSEngine):
+            def synthesize(self, text):
+                with providers.call("tts"):
+                    return super().synthesize(text)
+
+        return Engine
+
+    def install(self):
+        """Point ``utils`` at the fakes."""
+        import utils
+
+        utils.set_providers(
+            cohere_client=self.cohere_client(),
+            youtube_api_factory=self.youtube_api_factory(),
+            youtube_cls=self.youtube_class(),
+            deepgram_url=self.start_deepgram(),
+            deepgram_key="offline",
+            tts_factory=self.tts_factory(),
+        )
+
+    def close(self):
+        if self._server is None:
+            return
+        loop, thread = self._server
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        self._server = None
+
+
+class FakeCaptionTrack:
+    def __init__(self, providers, video_id):
+        self.providers = providers
+        self.video_id = video_id
+
+    @property
+    def xml_captions(self):
+        with self.providers.call("youtube"):
+            return self.providers.catalog.caption_xml(self.video_id)
+
+    @property
+    def json_captions(self):
+        return {"events": []}
+
+
+class FakeAudioStream:
+    """Silent audio of the video's length, delivered at the download rate."""
+
+    def __init__(self, providers, video):
+        self.providers = providers
+        self.filesize = int(video["duration"] * providers.audio_bytes_per_second)
+
+    def iter_chunks(self, chunk_size):
+        with self.providers.call("youtube"):
+            pass
+        chunk = bytes(chunk_size)
+        for offset in range(0, self.filesize, chunk_size):
+            size = min(chunk_size, self.filesize - offset)
+            time.sleep(size / self.providers.download_bytes_per_second)
+            yield chunk[:size]
+
+    def download(self, output_path, filename, timeout=None):
+        with open(os.path.join(output_path, filename), "wb") as f:
+            for chunk in self.iter_chunks(1 << 20):
+                f.write(chunk)
+
+
+class FakeYouTubeAPI:
+    def __init__(self, providers):
+        self.providers = providers
+
+    def videos(self):
+        return self
+
+    def list(self, part, id, maxResults=None):
+        providers = self.providers
+
+        def execute():
+            with providers.call("youtube_api"):
+                items = [
+                    providers.catalog.video_item(video_id)
+                    for video_id in id.split(",")
+                    if video_id in providers.catalog.videos
+                ]
+            return {"etag": f"etag-{len(items)}", "items": items}
+
+        return SimpleNamespace(headers={}, execute=execute)
+
+
+class FakeCohere:
+    """The subset of ``cohere.ClientV2`` used by ``utils._chat``."""
+
+    def __init__(self, providers):
+        self.providers = providers
+
+    def _reply(self, messages):
+        prompt = messages[-1]["content"]
+        return " ".join(make_words(len(prompt), self.providers.summary_words))
+
+    def chat(self, model, messages, request_options=None):
+        with self.providers.call("cohere"):
+            text = self._reply(messages)
+        return SimpleNamespace(message=SimpleNamespace(content=[SimpleNamespace(text=text)]))
+
+    def chat_stream(self, model, messages, request_options=None):
+        with self.providers.call("cohere"):
+            words = self._reply(messages).split(" ")
+        # The profile's latency is time to first token; the reply then streams in
+        for i in range(0, len(words), 10):
+            time.sleep(0.01)
+            text = " ".join(words[i : i + 10]) + " "
+            yield SimpleNamespace(
+                type="content-delta",
+                delta=SimpleNamespace(message=SimpleNamespace(content=SimpleNamespace(text=text))),
+            )
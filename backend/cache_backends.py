@@ -0,0 +1,324 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse
+
+
+# Non-JSON types allowed in cached values: tag -> (cls, to_json, from_json)
+_TYPES = {}
+
+
+def register_type(tag, cls, to_json, from_json):
+    """Let ``cls`` instances round-trip through cached values.
+
+    They are stored as ``{"__type__": tag, **to_json(obj)}`` and rebuilt
+    with ``from_json`` when the entry is read back.
+    """
+    _TYPES[tag] = (cls, to_json, from_json)
+
+
+def _encode_registered(value):
+    for tag, (cls, to_json, _) in _TYPES.items():
+        if isinstance(value, cls):
+            return dict(to_json(value), __type__=tag)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_registered(obj):
+    tag = obj.get("__type__")
+    if tag in _TYPES:
+        return _TYPES[tag][2](obj)
+    return obj
+
+
+def encode_value(value, compress_threshold=4096):
+    """Serialise a JSON value, zlib-compressing payloads above the threshold.
+
+    Returns ``(payload, size)``, where ``size`` is the uncompressed length,
+    a closer measure than the payload of the memory the decoded value takes.
+    """
+    data = json.dumps(value, separators=(",", ":"), default=_encode_registered).encode("utf-8")
+    if compress_threshold is not None and len(data) >= compress_threshold:
+        return b"z" + zlib.compress(data, 6), len(data)
+    return b"j" + data, len(data)
+
+
+def decode_value(payload):
+    """Return ``(value, size)`` for a payload made by ``encode_value``."""
+    payload = bytes(payload)
+    data = zlib.decompress(payload[1:]) if payload[:1] == b"z" else payload[1:]
+    return json.loads(data, object_hook=_decode_registered if _TYPES else None), len(data)
+
+
+class CacheBackend:
+    """Interface for cache storage.
+
+    Backends map string keys to ``(payload, created_at)`` pairs, where the
+    payload is whatever the caller stores (bytes for shared backends).
+    Expiry policy is left to the caller, which compares ``created_at``.
+    """
+
+    name = "base"
+
+    def get(self, key):
+        """Return ``(payload, created_at)`` or None."""
+        raise NotImplementedError
+
+    def set(self, key, payload, created_at=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix):
+        raise NotImplementedError
+
+    def stats(self):
+        return {"backend": self.name}
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU bounded by the total size of its entries in bytes.
+
+    ``size`` defaults to ``len(payload)``; callers storing decoded objects
+    pass the size of their serialised form. Entries older than ``ttl``
+    seconds are dropped on access.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (payload, created_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl is not None and time.time() - entry[1] > self.ttl:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def set(self, key, payload, created_at=None, size=None):
+        size = len(payload) if size is None else size
+        if size > self.max_bytes:
+            # Never let one huge entry flush the whole cache
+            self.delete(key)
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (payload, created_at or time.time(), size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._remove(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": self.name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+
+class SQLiteBackend(CacheBackend):
+    """Cache table in a local SQLite file, shared by every worker process.
+
+    WAL mode lets readers in other processes proceed while one writes. The
+    ``stages`` table written by earlier versions to the same file is dropped
+    on open: its rows use another format, and the cache refills itself.
+    With ``max_bytes``, the oldest entries are evicted once the payloads
+    add up to more, checked on open and every ``evict_every`` writes;
+    without it the file grows without bound.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path, max_bytes=None, evict_every=64):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.evict_every = evict_every
+        self.evictions = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_created_at ON entries (created_at)")
+        self._conn.commit()
+        self._drop_legacy_table()
+        if self.max_bytes:
+            with self._lock:
+                self._evict()
+
+    def _drop_legacy_table(self):
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stages'"
+            ).fetchone()
+            if not exists:
+                return
+            self._conn.execute("DROP TABLE IF EXISTS stages")
+            self._conn.commit()
+            # Give the orphaned pages back to the filesystem
+            self._conn.execute("VACUUM")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        logging.info(f"Dropped the old stages cache table from {self.path}")
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        return (bytes(row[0]), row[1]) if row else None
+
+    def set(self, key, payload, created_at=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created_at) VALUES (?, ?, ?)",
+                (key, payload, created_at or time.time()),
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self.max_bytes and self._writes % self.evict_every == 0:
+                self._evict()
+
+    def _evict(self):
+        # Keep the newest entries that fit in max_bytes, across every process's writes
+        cursor = self._conn.execute(
+            """DELETE FROM entries WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(LENGTH(value)) OVER (ORDER BY created_at DESC, key) AS kept
+                    FROM entries
+                ) WHERE kept > ?
+            )""",
+            (self.max_bytes,),
+        )
+        self._conn.commit()
+        if cursor.rowcount > 0:
+            self.evictions += cursor.rowcount
+            logging.info(f"Evicted {cursor.rowcount} cache entries from {self.path}")
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            )
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM entries"
+            ).fetchone()
+        return {
+            "backend": self.name,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+class RedisBackend(CacheBackend):
+    """Cache in a Redis (or Redis-protocol compatible) server.
+
+    Requires the optional ``redis`` package. Each entry is a hash holding
+    the payload and its creation time; ``ttl`` sets a server-side expiry.
+    """
+
+    name = "redis"
+
+    def __init__(self, url, ttl=None, prefix="yts:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("The redis package is required for redis:// cache URLs") from e
+        self._client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        payload, created_at = self._client.hmget(self.prefix + key, "v", "t")
+        if payload is None:
+            return None
+        return payload, float(created_at)
+
+    def set(self, key, payload, created_at=None):
+        name = self.prefix + key
+        pipe = self._client.pipeline()
+        pipe.hset(name, mapping={"v": payload, "t": created_at or time.time()})
+        if self.ttl:
+            pipe.expire(name, int(self.ttl))
+        pipe.execute()
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+    def delete_prefix(self, prefix):
+        keys = list(self._client.scan_iter(match=f"{self.prefix}{prefix}*"))
+        if keys:
+            self._client.delete(*keys)
+
+    def stats(self):
+        return {"backend": self.name, "entries": self._client.dbsize()}
+
+
+def create_backend(url):
+    """Build a shared backend from a URL.
+
+    ``sqlite:///path/to/cache.db?max_bytes=1073741824``, ``redis://host:6379/0``
+    or ``memory://?max_bytes=67108864`` (per process, mainly for tests).
+    """
+    parsed = urlparse(url)
+    query = parse_qs(parsed.query)
+    if parsed.scheme == "sqlite":
+        # As in SQLAlchemy: sqlite:///relative.db, sqlite:////absolute.db
+        max_bytes = query.get("max_bytes")
+        return SQLiteBackend(parsed.path[1:], max_bytes=int(max_bytes[0]) if max_bytes else None)
+    if parsed.scheme in ("redis", "rediss", "unix"):
+        return RedisBackend(url)
+    if parsed.scheme == "memory":
+        return MemoryBackend(max_bytes=int(query.get("max_bytes", [64 * 1024 * 1024])[0]))
+    raise ValueError(f"Unsupported cache URL: {url}")
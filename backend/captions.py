@@ -0,0 +1,309 @@
+import html
+import json
+import re
+import xml.etree.ElementTree as ElementTree
+from array import array
+
+_TAG = re.compile(r"<[^>]+>")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _clean(text):
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _timestamp(value):
+    """Parse ``HH:MM:SS,mmm`` (or ``MM:SS.mmm``) into seconds."""
+    parts = value.strip().split(" ", 1)[0].replace(",", ".").split(":")
+    seconds = float(parts[-1]) + int(parts[-2]) * 60
+    if len(parts) > 2:
+        seconds += int(parts[-3]) * 3600
+    return seconds
+
+
+def iter_srt_cues(content):
+    """Yield cues from SRT text."""
+    for block in content.replace("\r\n", "\n").split("\n\n"):
+        lines = block.strip().split("\n")
+        for i, line in enumerate(lines[:3]):
+            if "-->" in line:
+                break
+        else:
+            continue
+        text = " ".join(part.strip() for part in lines[i + 1 :] if part.strip())
+        if text:
+            start, _, end = line.partition("-->")
+            yield _timestamp(start), _timestamp(end), text
+
+
+def iter_vtt_cues(content):
+    """Yield cues from WebVTT text, dropping inline timing and style tags."""
+    for block in content.replace("\r\n", "\n").split("\n\n"):
+        lines = block.strip().split("\n")
+        for i, line in enumerate(lines[:3]):
+            if "-->" in line:
+                break
+        else:
+            continue
+        text = " ".join(part.strip() for part in lines[i + 1 :] if part.strip())
+        if "<" in text:
+            text = _clean(_TAG.sub("", text))
+        if "&" in text:
+            text = html.unescape(text)
+        if text:
+            start, _, end = line.partition("-->")
+            yield _timestamp(start), _timestamp(end), text
+
+
+def iter_json3_cues(data):
+    """Yield cues from YouTube's json3 timed-text format (dict or list of events)."""
+    events = data.get("events", []) if isinstance(data, dict) else data
+    for event in events:
+        segs = event.get("segs")
+        if not segs or event.get("aAppend"):
+            continue
+        text = _clean("".join(seg.get("utf8", "") for seg in segs))
+        if not text:
+            continue
+        start = event.get("tStartMs", 0) / 1000
+        yield start, start + event.get("dDurationMs", 0) / 1000, text
+
+
+def iter_timedtext_xml_cues(content):
+    """Yield cues from YouTube timed-text XML (srv1 ``<text>`` or srv3 ``<p>``)."""
+    root = ElementTree.fromstring(content)
+    for element in root.iter():
+        if element.tag == "text":
+            start = float(element.get("start", 0))
+            end = start + float(element.get("dur", 0))
+        elif element.tag == "p":
+            start = float(element.get("t", 0)) / 1000
+            end = start + float(element.get("d", 0)) / 1000
+        else:
+            continue
+        text = _clean(html.unescape("".join(element.itertext())))
+        if text:
+            yield start, end, text
+
+
+def detect_format(content):
+    """Guess the caption format of ``content``."""
+    if isinstance(content, (dict, list)):
+        return "json3"
+    head = content.lstrip()[:64]
+    if head.startswith("WEBVTT"):
+        return "vtt"
+    if head.startswith("<"):
+        return "xml"
+    if head.startswith("{"):
+        return "json3"
+    return "srt"
+
+
+def iter_cues(content, fmt=None):
+    """Yield ``(start, end, text)`` cues from captions in any supported format.
+
+    All parsers work on in-memory content in a single pass, so callers can
+    stream cues without building intermediate structures.
+    """
+    fmt = fmt or detect_format(content)
+    if fmt == "json3":
+        if isinstance(content, str):
+            content = json.loads(content)
+        return iter_json3_cues(content)
+    if fmt == "vtt":
+        return iter_vtt_cues(content)
+    if fmt == "xml":
+        return iter_timedtext_xml_cues(content)
+    return iter_srt_cues(content)
+
+
+def format_timestamp_simple(seconds):
+    """Convert seconds to minutes:seconds format."""
+    minutes, remaining_seconds = divmod(int(seconds), 60)
+    return f"{minutes}:{remaining_seconds:02d}"
+
+
+_CUE_FIELDS = ("index", "start_seconds", "end_seconds", "start", "end", "text")
+
+
+class Cue:
+    """One subtitle cue. ``start`` and ``end`` are formatted on access.
+
+    Supports ``cue["text"]`` and ``cue.get("start_seconds")`` so code
+    written against subtitle dicts keeps working.
+    """
+
+    __slots__ = ("index", "start_seconds", "end_seconds", "text")
+
+    def __init__(self, index, start_seconds, end_seconds, text):
+        self.index = index
+        self.start_seconds = start_seconds
+        self.end_seconds = end_seconds
+        self.text = text
+
+    @property
+    def start(self):
+        return format_timestamp_simple(self.start_seconds)
+
+    @property
+    def end(self):
+        return format_timestamp_simple(self.end_seconds)
+
+    def __getitem__(self, key):
+        if key not in _CUE_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in _CUE_FIELDS else default
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in _CUE_FIELDS}
+
+
+class CueTrack:
+    """Subtitle cues stored column-wise.
+
+    Start and end times live in ``array("d")`` columns and every cue text
+    in one string, joined by single spaces, with ``offsets[i]`` marking
+    where cue ``i`` begins. That string doubles as the plain transcript,
+    so a video's text is held once rather than once per cue dict and again
+    as the transcript. Indexing and iteration yield ``Cue`` views.
+    """
+
+    __slots__ = ("starts", "ends", "text", "offsets")
+
+    def __init__(self, starts=None, ends=None, text="", offsets=None):
+        self.starts = starts if starts is not None else array("d")
+        self.ends = ends if ends is not None else array("d")
+        self.text = text
+        # One entry per cue plus one past the end: cue i is
+        # text[offsets[i]:offsets[i + 1] - 1]
+        self.offsets = offsets if offsets is not None else array("q", [0])
+
+    @classmethod
+    def from_cues(cls, cues):
+        """Build a track from ``(start, end, text)`` tuples."""
+        starts = array("d")
+        ends = array("d")
+        offsets = array("q", [0])
+        texts = []
+        position = 0
+        for start, end, text in cues:
+            starts.append(start)
+            ends.append(end)
+            texts.append(text)
+            position += len(text) + 1
+            offsets.append(position)
+        return cls(starts, ends, " ".join(texts), offsets)
+
+    @classmethod
+    def from_value(cls, value):
+        """Accept a track, its ``to_columns`` form or a list of subtitle dicts."""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, dict):
+            return cls.from_columns(value)
+        return cls.from_cues(
+            (sub.get("start_seconds", 0), sub.get("end_seconds", 0), sub.get("text", ""))
+            for sub in value or ()
+        )
+
+    @classmethod
+    def from_columns(cls, columns):
+        return cls(
+            array("d", columns["start_seconds"]),
+            array("d", columns["end_seconds"]),
+            columns["text"],
+            array("q", columns["offsets"]),
+        )
+
+    def to_columns(self):
+        """Serialisable form used by the stage cache."""
+        return {
+            "start_seconds": self.starts.tolist(),
+            "end_seconds": self.ends.tolist(),
+            "text": self.text,
+            "offsets": self.offsets.tolist(),
+        }
+
+    def __len__(self):
+        return len(self.starts)
+
+    def text_at(self, i):
+        return self.text[self.offsets[i] : self.offsets[i + 1] - 1]
+
+    def texts(self):
+        """Yield each cue's text."""
+        text = self.text
+        offsets = self.offsets
+        for i in range(len(self.starts)):
+            yield text[offsets[i] : offsets[i + 1] - 1]
+
+    def iter_cues(self):
+        """Yield ``(start, end, text)`` tuples, as ``iter_cues`` does."""
+        return zip(self.starts, self.ends, self.texts())
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("cue index out of range")
+        return Cue(i + 1, self.starts[i], self.ends[i], self.text_at(i))
+
+    def __iter__(self):
+        for index, (start, end, text) in enumerate(self.iter_cues(), 1):
+            yield Cue(index, start, end, text)
+
+    def to_dicts(self):
+        """The subtitle dicts returned by the API, formatted here rather than stored."""
+        fmt_time = format_timestamp_simple
+        return [
+            {
+                "index": index,
+                "start_seconds": start,
+                "end_seconds": end,
+                "start": fmt_time(start),
+                "end": fmt_time(end),
+                "text": text,
+            }
+            for index, (start, end, text) in enumerate(self.iter_cues(), 1)
+        ]
+
+    def columns(self):
+        """Parallel ``start_seconds``/``end_seconds``/``text`` lists for compact responses."""
+        return {
+            "start_seconds": self.starts.tolist(),
+            "end_seconds": self.ends.tolist(),
+            "text": list(self.texts()),
+        }
+
+
+def json_default(value):
+    """``default`` hook for ``json.dumps`` that writes cue tracks as subtitle dicts."""
+    if isinstance(value, CueTrack):
+        return value.to_dicts()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def parse_captions(content, fmt=None):
+    """Parse captions in any supported format into a ``CueTrack``."""
+    return CueTrack.from_cues(iter_cues(content, fmt))
+
+
+def format_srt_timestamp(seconds):
+    """Format seconds as an SRT ``HH:MM:SS,mmm`` timestamp."""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def cues_to_srt(cues):
+    """Render ``(start, end, text)`` cues as SRT text."""
+    return "".join(
+        f"{i}\n{format_srt_timestamp(start)} --> {format_srt_timestamp(end)}\n{text}\n\n"
+        for i, (start, end, text) in enumerate(cues, 1)
+    )
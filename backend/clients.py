@@ -0,0 +1,80 @@
+import asyncio
+import contextlib
+import queue
+import threading
+import weakref
+
+import aiohttp
+
+
+class SharedSession:
+    """A pooled keep-alive ``aiohttp.ClientSession`` per event loop.
+
+    aiohttp sessions are bound to the loop they were created on. The app
+    runs everything on one long-lived loop, so in practice there is a
+    single session; code running on another loop (scripts, benchmarks)
+    transparently gets its own.
+    """
+
+    def __init__(self, limit=100, limit_per_host=20, keepalive_timeout=30):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self._sessions = weakref.WeakKeyDictionary()
+
+    def get(self):
+        """Return the session for the running loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            session = self._sessions[loop] = aiohttp.ClientSession(connector=connector)
+        return session
+
+    async def close(self):
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+
+class ClientPool:
+    """A fixed-size pool of blocking clients that are not thread safe.
+
+    Clients are created lazily by ``factory`` up to ``size``; callers borrow
+    one with ``with pool.client() as client:`` and block while all of them
+    are in use.
+    """
+
+    def __init__(self, factory, size=8):
+        self.factory = factory
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def client(self):
+        try:
+            client = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    client = self.factory()
+                except BaseException:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                client = self._idle.get()
+        try:
+            yield client
+        finally:
+            self._idle.put(client)
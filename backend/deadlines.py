@@ -0,0 +1,116 @@
+import contextlib
+import contextvars
+import queue
+import threading
+import time
+
+_current = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's time budget ran out before a call could be made."""
+
+
+class Deadline:
+    """A point in time, on the monotonic clock, by which work should be done."""
+
+    def __init__(self, seconds):
+        self.at = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.at - time.monotonic()
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def extend(self, seconds):
+        """Allow at least ``seconds`` more from now, e.g. to finish in the background."""
+        self.at = max(self.at, time.monotonic() + seconds)
+
+
+@contextlib.contextmanager
+def with_deadline(seconds):
+    """Give the enclosed work, and everything it starts, ``seconds`` to finish.
+
+    The deadline is a context variable, so it follows the request into
+    asyncio tasks and ``asyncio.to_thread`` workers. A nested deadline can
+    only shorten an enclosing one. With ``seconds=None`` the current
+    deadline, if any, is left as it is. Yields the Deadline in effect.
+    """
+    outer = _current.get()
+    if seconds is None:
+        yield outer
+        return
+    deadline = Deadline(seconds)
+    if outer is not None:
+        deadline.at = min(deadline.at, outer.at)
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def current_deadline():
+    return _current.get()
+
+
+def check_deadline(what="call"):
+    """Return the seconds left, None without a deadline, or raise DeadlineExceeded."""
+    deadline = _current.get()
+    if deadline is None:
+        return None
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+    return remaining
+
+
+def hedged(fn, hedge_after, attempts=2, on_hedge=None):
+    """Call ``fn()``, racing another call if the first is slow to answer.
+
+    When an attempt has not finished ``hedge_after`` seconds after the
+    previous one started, or fails, another attempt is started, up to
+    ``attempts`` in total; the first successful result wins and late
+    attempts are left to finish on their own. ``fn`` must be safe to
+    repeat. No attempts are added once the current deadline has passed.
+    ``on_hedge()`` is called for each extra attempt.
+    """
+    if not hedge_after or attempts < 2:
+        return fn()
+
+    results = queue.Queue()
+
+    def attempt():
+        try:
+            results.put((True, fn()))
+        except BaseException as e:
+            results.put((False, e))
+
+    def start():
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(attempt,), daemon=True).start()
+
+    deadline = _current.get()
+    start()
+    started = 1
+    running = 1
+    error = None
+    while running:
+        can_hedge = started < attempts and not (deadline and deadline.expired())
+        try:
+            ok, value = results.get(timeout=hedge_after if can_hedge else None)
+        except queue.Empty:
+            ok, value = None, None
+        if ok:
+            return value
+        if ok is False:
+            running -= 1
+            error = value
+        if can_hedge:
+            if on_hedge:
+                on_hedge()
+            start()
+            started += 1
+            running += 1
+    raise error
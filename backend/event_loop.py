@@ -0,0 +1,74 @@
+import asyncio
+import concurrent.futures
+import threading
+
+
+class EventLoopThread:
+    """One long-lived asyncio event loop running on a daemon thread.
+
+    Flask handlers and job workers submit coroutines with ``run`` instead of
+    calling ``asyncio.run``, so every request shares the same loop, its
+    thread pool and the connection pools bound to it, rather than creating
+    and tearing all of that down per request.
+    """
+
+    def __init__(self, name="event-loop", executor_workers=32):
+        self.name = name
+        self.executor_workers = executor_workers
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        return self._loop
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            ready = threading.Event()
+
+            def run():
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+                # Blocking SDK calls made through asyncio.to_thread run here
+                loop.set_default_executor(
+                    concurrent.futures.ThreadPoolExecutor(
+                        max_workers=self.executor_workers, thread_name_prefix=f"{self.name}-worker"
+                    )
+                )
+                self._loop = loop
+                ready.set()
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+            self._thread.start()
+            ready.wait()
+
+    def submit(self, coro):
+        """Schedule ``coro`` on the loop and return a concurrent Future."""
+        if self._thread is None:
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro, timeout=None):
+        """Run ``coro`` on the loop and block the calling thread for its result."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("EventLoopThread.run() called from the loop thread")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self):
+        with self._lock:
+            if self._thread is None:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._thread = None
+            self._loop = None
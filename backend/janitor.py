@@ -0,0 +1,204 @@
+import contextlib
+import logging
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+PIN_SUFFIX = ".pin"
+
+
+class Janitor:
+    """Background disk budget for generated files.
+
+    Keeps an in-memory index of the files under ``directories`` that the
+    app wrote, as told by ``owns(name)``, with their size and last access
+    time, in LRU order; anything else in those directories is left alone. A daemon thread rescans the
+    directories every ``interval`` seconds and then evicts files that have
+    not been accessed for ``max_age`` seconds, followed by the least
+    recently used files until the total is within ``max_bytes``. Pinned
+    files (in use by a running job) are never evicted, and partially
+    written ``.part`` files only once they have expired.
+
+    A pin also creates a ``<path>.<pid>.pin`` marker next to the file, so
+    the janitors of other worker processes leave it alone too. Markers
+    older than ``max_age`` are left over from crashed workers and removed.
+    """
+
+    def __init__(self, directories, max_bytes, max_age=None, interval=60, owns=None):
+        self.directories = list(directories)
+        self.owns = owns or (lambda name: True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # path -> [size, last_access], oldest first
+        self._pins = Counter()
+        self._pinned_elsewhere = set()
+        self._stop = threading.Event()
+        self._thread = None
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="janitor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                logging.error(f"Janitor sweep failed: {e}")
+            self._stop.wait(self.interval)
+
+    def touch(self, path, size=None):
+        """Record an access (or a new file) so it moves to the back of the LRU."""
+        with self._lock:
+            entry = self._index.get(path)
+            if entry is None:
+                if size is None:
+                    try:
+                        size = os.path.getsize(path)
+                    except OSError:
+                        return
+                entry = self._index[path] = [size, 0.0]
+            elif size is not None:
+                entry[0] = size
+            entry[1] = time.time()
+            self._index.move_to_end(path)
+
+    @staticmethod
+    def _marker(path):
+        return f"{path}.{os.getpid()}{PIN_SUFFIX}"
+
+    def pin(self, path):
+        with self._lock:
+            self._pins[path] += 1
+            if self._pins[path] == 1:
+                try:
+                    open(self._marker(path), "a").close()
+                except OSError as e:
+                    logging.warning(f"Could not create pin marker for {path}: {e}")
+
+    def unpin(self, path):
+        with self._lock:
+            self._pins[path] -= 1
+            if self._pins[path] <= 0:
+                del self._pins[path]
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self._marker(path))
+
+    @contextlib.contextmanager
+    def pinned(self, path):
+        self.pin(path)
+        try:
+            yield path
+        finally:
+            self.unpin(path)
+
+    def forget(self, path):
+        """Drop a file that was deleted by its owner from the index."""
+        with self._lock:
+            self._index.pop(path, None)
+
+    def _scan(self):
+        """Merge the files currently on disk into the index."""
+        found = {}
+        pinned = set()
+        now = time.time()
+        for directory in self.directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if not entry.is_file():
+                            continue
+                        if entry.name.endswith(PIN_SUFFIX):
+                            self._collect_marker(entry, pinned, now)
+                        elif self.owns(entry.name):
+                            stat = entry.stat()
+                            found[entry.path] = (stat.st_size, stat.st_mtime)
+            except FileNotFoundError:
+                continue
+
+        with self._lock:
+            self._pinned_elsewhere = pinned
+            for path in [p for p in self._index if p not in found]:
+                del self._index[path]
+            added = False
+            for path, (size, mtime) in found.items():
+                entry = self._index.get(path)
+                if entry is None:
+                    # Files seen for the first time count as accessed when last modified
+                    self._index[path] = [size, mtime]
+                    added = True
+                else:
+                    entry[0] = size
+            if added:
+                self._index = OrderedDict(sorted(self._index.items(), key=lambda item: item[1][1]))
+
+    def _collect_marker(self, entry, pinned, now):
+        try:
+            if self.max_age is not None and now - entry.stat().st_mtime > self.max_age:
+                os.remove(entry.path)
+                logging.info(f"Removed stale pin marker {entry.path}")
+                return
+        except OSError:
+            return
+        # <path>.<pid>.pin
+        pinned.add(entry.path[: -len(PIN_SUFFIX)].rsplit(".", 1)[0])
+
+    def _evictable(self, path, last_access, now):
+        if self._pins.get(path) or path in self._pinned_elsewhere:
+            return False
+        # In-progress writes are renamed into place when complete
+        if path.endswith(".part"):
+            return self.max_age is not None and now - last_access > self.max_age
+        return True
+
+    def sweep(self):
+        """Rescan the directories and evict expired and least recently used files."""
+        self._scan()
+        now = time.time()
+        victims = []
+        with self._lock:
+            total = sum(size for size, _ in self._index.values())
+            for path, (size, last_access) in self._index.items():
+                expired = self.max_age is not None and now - last_access > self.max_age
+                if not expired and total <= self.max_bytes:
+                    break
+                if self._evictable(path, last_access, now):
+                    victims.append((path, size))
+                    total -= size
+            for path, _ in victims:
+                del self._index[path]
+
+        for path, size in victims:
+            try:
+                os.remove(path)
+                self.evicted_files += 1
+                self.evicted_bytes += size
+                logging.info(f"Evicted {path} ({size} bytes)")
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.error(f"Error evicting {path}: {e}")
+        return len(victims)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "files": len(self._index),
+                "bytes": sum(size for size, _ in self._index.values()),
+                "max_bytes": self.max_bytes,
+                "pinned": len(self._pins),
+                "evicted_files": self.evicted_files,
+                "evicted_bytes": self.evicted_bytes,
+            }
@@ -0,0 +1,206 @@
+import collections
+import itertools
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from cachetools import TTLCache
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has no room for another job."""
+
+
+class Job:
+    """State of one background pipeline run.
+
+    Events carry increasing sequence numbers. Stage transitions are kept
+    (up to ``max_events``) for listeners that connect late; summary text
+    deltas only go into a short buffer for live listeners, which is
+    dropped when the job finishes, since the result has the full summary.
+    With ``keep_result=False`` the result is not kept at all, for jobs
+    whose client receives it as it is produced.
+    """
+
+    def __init__(self, job_id, params, max_events=256, max_deltas=64, keep_result=True):
+        self.id = job_id
+        self.params = params
+        self.keep_result = keep_result
+        self.status = "queued"
+        self.stage = None
+        self.result = {}
+        self.error = None
+        self.status_code = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.events = collections.deque(maxlen=max_events)
+        self._deltas = collections.deque(maxlen=max_deltas)
+        self._next_seq = 0
+        self._condition = threading.Condition()
+
+    @property
+    def done(self):
+        return self.status in ("completed", "failed")
+
+    def emit(self, event, **data):
+        """Record an event and wake up any stream listeners."""
+        with self._condition:
+            record = {"event": event, "data": data, "time": time.time(), "seq": self._next_seq}
+            self._next_seq += 1
+            if event == "delta":
+                self._deltas.append(record)
+            else:
+                self.events.append(record)
+            if self.done:
+                self._deltas.clear()
+            self._condition.notify_all()
+
+    def report(self, stage, progress=None, delta=None, **partial):
+        """Progress callback handed to the pipeline.
+
+        ``partial`` holds stage outputs that are merged into the job result as
+        soon as they exist, so pollers can show metadata or the transcript
+        before the summary is ready. ``delta`` is a streamed summary fragment;
+        it is forwarded to event listeners but not kept in the history.
+        """
+        if delta is not None:
+            self.emit("delta", stage=stage, text=delta)
+            return
+        self.stage = stage
+        if partial and self.keep_result:
+            self.result.update(partial)
+        payload = {"stage": stage}
+        if progress is not None:
+            payload["progress"] = round(progress, 1)
+        if partial:
+            payload["fields"] = sorted(partial)
+        self.emit("progress", **payload)
+
+    def wait_for_events(self, cursor, timeout=15):
+        """Block until there are events from ``cursor`` on or the timeout expires.
+
+        ``cursor`` is the sequence number of the next event wanted. Returns
+        the events, in order, and the cursor to pass next time; events that
+        were no longer buffered are skipped.
+        """
+        with self._condition:
+            if self._next_seq <= cursor and not self.done:
+                self._condition.wait(timeout)
+            events = [
+                event for event in itertools.chain(self.events, self._deltas) if event["seq"] >= cursor
+            ]
+            events.sort(key=lambda event: event["seq"])
+            return events, self._next_seq
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """Runs pipeline jobs on a bounded pool of background worker threads.
+
+    Jobs the caller runs itself, e.g. as a coroutine on the shared event
+    loop, are registered with ``start`` and completed with ``finish`` so
+    they can be looked up like any other job. At most ``max_retained`` jobs,
+    with their results, are kept for up to ``retention`` seconds.
+    """
+
+    def __init__(self, max_workers=4, max_queued=32, retention=3600, max_retained=100):
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job-worker"
+        )
+        self._jobs = TTLCache(maxsize=max_retained, ttl=retention)
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def submit(self, target, params):
+        """Queue ``target(report)`` and return the new Job.
+
+        ``target`` must return a ``(result_dict, status_code)`` tuple.
+        """
+        with self._lock:
+            if self._pending >= self.max_queued:
+                raise QueueFullError("Job queue is full, try again later")
+            self._pending += 1
+            job = self._register(params)
+
+        job.emit("queued")
+        self._executor.submit(self._run, job, target)
+        return job
+
+    def start(self, params, keep_result=True):
+        """Register a running job that is not executed by the pool and return it."""
+        with self._lock:
+            job = self._register(params, keep_result)
+        self._started(job)
+        return job
+
+    def _register(self, params, keep_result=True):
+        job = Job(uuid.uuid4().hex, params, keep_result=keep_result)
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {"pending": self._pending, "retained": len(self._jobs)}
+
+    def _started(self, job):
+        job.status = "running"
+        job.emit("started")
+
+    def _run(self, job, target):
+        self._started(job)
+        try:
+            result, status_code = target(job.report)
+        except Exception as e:
+            logging.exception(f"Job {job.id} failed: {e}")
+            result, status_code = {"error": str(e)}, 500
+        finally:
+            with self._lock:
+                self._pending -= 1
+        self.finish(job, result, status_code)
+
+    def finish(self, job, result, status_code):
+        """Record a job's ``(result, status_code)`` and notify its listeners."""
+        job.status_code = status_code
+        if status_code >= 400:
+            job.status = "failed"
+            job.error = result.get("error", "Processing failed")
+        else:
+            job.status = "completed"
+            if job.keep_result:
+                job.result = result
+        job.finished_at = time.time()
+        job.emit(job.status, error=job.error)
+
+
+def stream_job_events(job, heartbeat=15):
+    """Yield Server-Sent Events for a job until it finishes."""
+    cursor = 0
+    while True:
+        events, cursor = job.wait_for_events(cursor, timeout=heartbeat)
+        if not events:
+            if job.done:
+                return
+            yield ": keep-alive\n\n"
+            continue
+        for event in events:
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+        if job.done and event["event"] in ("completed", "failed"):
+            return
@@ -0,0 +1,116 @@
+import logging
+import re
+from collections import Counter
+
+CUSTOM_STOP_WORDS = frozenset({
+    "like", "actually", "basically", "literally", "yeah", "okay", "um", "uh",
+    "going", "getting", "think", "know", "mean", "just", "really", "very",
+    "kind", "sort", "thing", "things", "stuff", "way", "lot", "bit", "make", "made",
+    "want", "need", "trying", "sure", "look", "looks", "looking",
+    "dont", "cant", "wasnt", "isnt", "arent", "hasnt", "havent", "wouldnt",
+    "ive", "youve", "weve", "theyre", "youre", "thats", "theres",
+    "today", "yesterday", "tomorrow", "time", "year", "month", "week", "day",
+    "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+    "something", "someone", "everybody", "everyone", "anything", "everything",
+    "back", "come", "goes", "around", "through",
+})
+
+
+def load_nltk_stop_words(download=True):
+    """Load NLTK's English stopwords, downloading the corpus once if allowed."""
+    try:
+        import nltk
+
+        try:
+            nltk.data.find("corpora/stopwords")
+        except LookupError:
+            if not download:
+                raise
+            logging.info("Downloading NLTK stopwords corpus")
+            nltk.download("stopwords", quiet=True)
+
+        from nltk.corpus import stopwords
+
+        return frozenset(stopwords.words("english"))
+    except (ImportError, LookupError, OSError) as e:
+        logging.warning(f"NLTK stopwords not available, using custom list ({type(e).__name__})")
+        return frozenset()
+
+
+class KeywordAnalyzer:
+    """Keyword statistics for transcripts.
+
+    Stopword tables and the tokenizer are built once. Counting is done in
+    bulk: every token is counted with ``Counter`` first and the stopword and
+    length filters are then applied to the (much smaller) set of distinct
+    words, instead of testing each token individually.
+    """
+
+    def __init__(self, stop_words=None, min_length=4):
+        if stop_words is None:
+            stop_words = load_nltk_stop_words() | CUSTOM_STOP_WORDS
+        self.stop_words = frozenset(stop_words)
+        self.min_length = min_length
+        self._token = re.compile(r"\w+")
+        self._long_tokens = {}
+
+    def tokenize(self, text, min_length=1):
+        """Lower-cased word tokens, optionally only those of ``min_length`` or more."""
+        if min_length <= 1:
+            return self._token.findall(text.lower())
+        pattern = self._long_tokens.get(min_length)
+        if pattern is None:
+            pattern = self._long_tokens[min_length] = re.compile(rf"\w{{{min_length},}}")
+        return pattern.findall(text.lower())
+
+    def _keep(self, word, min_length, extra_stop_words):
+        return (
+            len(word) >= min_length
+            and word not in self.stop_words
+            and not (extra_stop_words and word in extra_stop_words)
+        )
+
+    def word_frequency(self, text, min_length=None, top_n=50, additional_stop_words=None, tokens=None):
+        """Return the ``top_n`` most common content words as a dict."""
+        min_length = min_length or self.min_length
+        counts = Counter(tokens if tokens is not None else self.tokenize(text, min_length))
+        for word in [w for w in counts if not self._keep(w, min_length, additional_stop_words)]:
+            del counts[word]
+        return dict(counts.most_common(top_n))
+
+    def bigrams(self, text, top_n=25, tokens=None):
+        """Return the most common two-word phrases made of content words."""
+        tokens = tokens if tokens is not None else self.tokenize(text)
+        counts = Counter(zip(tokens, tokens[1:]))
+        min_length = self.min_length
+        phrases = {
+            f"{a} {b}": n
+            for (a, b), n in counts.items()
+            if n > 1 and self._keep(a, min_length, None) and self._keep(b, min_length, None)
+        }
+        return dict(Counter(phrases).most_common(top_n))
+
+    def timeline(self, subtitles, bucket_seconds=300, top_n=5):
+        """Top terms per ``bucket_seconds`` window of the subtitles."""
+        buckets = {}
+        for sub in subtitles:
+            bucket = int(sub.get("start_seconds", 0) // bucket_seconds)
+            buckets.setdefault(bucket, []).append(sub.get("text", ""))
+
+        return [
+            {
+                "start_seconds": bucket * bucket_seconds,
+                "end_seconds": (bucket + 1) * bucket_seconds,
+                "terms": self.word_frequency(" ".join(texts), top_n=top_n),
+            }
+            for bucket, texts in sorted(buckets.items())
+        ]
+
+    def analyze(self, text, subtitles=None, top_n=50, bucket_seconds=300):
+        """Word frequency, keyphrases and per-bucket terms in one pass over the tokens."""
+        tokens = self.tokenize(text)
+        return {
+            "word_frequency": self.word_frequency(text, top_n=top_n, tokens=tokens),
+            "keyphrases": self.bigrams(text, tokens=tokens),
+            "timeline": self.timeline(subtitles, bucket_seconds) if subtitles else [],
+        }
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+
+from ratelimit import RateLimitedError
+
+YOUTUBE_MAX_IDS_PER_CALL = 50  # videos.list accepts at most 50 IDs
+
+# Parts requested for a full lookup and for a statistics refresh
+FULL_PARTS = "snippet,statistics,contentDetails,player"
+STATISTICS_PARTS = "statistics"
+
+
+def parse_video_item(video_data):
+    """Split a videos.list item into metadata and player data."""
+    return {
+        "metadata": {
+            "title": video_data["snippet"].get("title", "Unknown Title"),
+            "description": video_data["snippet"].get("description", ""),
+            "thumbnail": video_data["snippet"]["thumbnails"]["high"]["url"],
+            "author": video_data["snippet"].get("channelTitle", "Unknown Author"),
+            "publish_date": video_data["snippet"].get("publishedAt", ""),
+            "views": video_data["statistics"].get("viewCount", "N/A"),
+            "duration": video_data["contentDetails"].get("duration", ""),
+        },
+        "player_data": {
+            "video_id": video_data["id"],
+            "embed_html": video_data["player"]["embedHtml"],
+            "duration": video_data["contentDetails"]["duration"],
+        },
+    }
+
+
+class MetadataService:
+    """YouTube video metadata with batching, TTLs and ETag revalidation.
+
+    Lookups that arrive within ``batch_window`` seconds of each other are
+    combined into one multi-ID ``videos.list`` call of up to 50 IDs, and
+    concurrent lookups of the same ID share a single result.
+
+    Entries are stored in the stage cache as ``video_info``, read and
+    written in worker threads to keep the event loop free. Titles,
+    durations and player data are kept for ``ttl`` seconds; view counts are
+    refreshed after ``stats_ttl`` seconds with a statistics-only call. When
+    a single video is refreshed its previous response ETag is sent, so an
+    unchanged video costs a 304 instead of a full response. If a refresh
+    fails, the stale entry is served.
+
+    ``fetch(video_ids, parts, etag)`` performs the blocking API call and
+    returns ``{"etag": ..., "items": {video_id: item}}``, or None when the
+    ETag still matches.
+    """
+
+    def __init__(self, fetch, cache, ttl=24 * 3600, stats_ttl=3600, batch_window=0.01):
+        self.fetch = fetch
+        self.cache = cache
+        self.ttl = ttl
+        self.stats_ttl = stats_ttl
+        self.batch_window = batch_window
+        self._pending = {}
+        self._in_flight = {}
+        self._counts = Counter()
+
+    async def get(self, video_id):
+        """Return ``{"metadata", "player_data", ...}`` or ``{"error": ...}``."""
+        self._counts["lookups"] += 1
+        entry = await self.cache.aget(video_id, "video_info")
+        now = time.time()
+        if entry and now - entry.get("fetched_at", 0) < self.ttl:
+            if now - entry.get("stats_at", 0) < self.stats_ttl:
+                self._counts["cache_hits"] += 1
+                return entry
+            return await self._enqueue(STATISTICS_PARTS, video_id, entry)
+        return await self._enqueue(FULL_PARTS, video_id, entry)
+
+    async def get_many(self, video_ids):
+        """Look up many videos at once; they are batched like concurrent lookups."""
+        infos = await asyncio.gather(*(self.get(video_id) for video_id in video_ids))
+        return dict(zip(video_ids, infos))
+
+    def _enqueue(self, parts, video_id, entry):
+        loop = asyncio.get_running_loop()
+        key = (loop, parts)
+        future = self._in_flight.get((key, video_id))
+        if future is not None:
+            self._counts["coalesced"] += 1
+            return asyncio.shield(future)
+
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = {}
+            loop.call_later(self.batch_window, self._flush, key, batch)
+
+        waiter = batch.get(video_id)
+        if waiter is None:
+            waiter = batch[video_id] = (loop.create_future(), entry)
+        else:
+            self._counts["coalesced"] += 1
+        if len(batch) >= YOUTUBE_MAX_IDS_PER_CALL:
+            self._flush(key, batch)
+        # A cancelled caller must not cancel the lookup for everyone else
+        return asyncio.shield(waiter[0])
+
+    def _flush(self, key, batch):
+        if self._pending.get(key) is batch:
+            del self._pending[key]
+            for video_id, (future, _) in batch.items():
+                self._in_flight[(key, video_id)] = future
+            asyncio.get_running_loop().create_task(self._fetch(key, batch))
+
+    async def _fetch(self, key, batch):
+        try:
+            await self._fetch_batch(key[1], batch)
+        finally:
+            for video_id in batch:
+                self._in_flight.pop((key, video_id), None)
+
+    async def _fetch_batch(self, parts, batch):
+        video_ids = list(batch)
+        single = len(video_ids) == 1
+        etag = None
+        if single:
+            entry = batch[video_ids[0]][1]
+            etag = entry.get("etags", {}).get(parts) if entry else None
+
+        try:
+            self._counts["api_calls"] += 1
+            response = await asyncio.to_thread(self.fetch, video_ids, parts, etag)
+        except Exception as e:
+            logging.error(f"Metadata fetch failed for {len(video_ids)} videos: {e}")
+            for video_id, (future, entry) in batch.items():
+                # Serve stale metadata rather than failing the request
+                if entry:
+                    future.set_result(entry)
+                elif isinstance(e, RateLimitedError):
+                    future.set_exception(e)  # Retryable, unlike a missing video
+                else:
+                    future.set_result({"error": str(e)})
+            return
+
+        now = time.time()
+        updated = {}
+        for video_id, (future, entry) in batch.items():
+            try:
+                info = updated[video_id] = self._update(parts, video_id, entry, response, single, now)
+            except Exception as e:
+                logging.error(f"Could not parse metadata for {video_id}: {e}")
+                info = {"error": str(e)}
+            future.set_result(info)
+        # Waiters already have their results; lookups stay coalesced until this is stored
+        await asyncio.to_thread(self._store, updated)
+
+    def _store(self, entries):
+        for video_id, entry in entries.items():
+            if "error" not in entry:
+                self.cache.set(video_id, "video_info", entry)
+
+    def _update(self, parts, video_id, entry, response, single, now):
+        if response is None:
+            # 304 Not Modified: the cached entry is still current
+            self._counts["not_modified"] += 1
+            entry = dict(entry, stats_at=now)
+            if parts == FULL_PARTS:
+                entry["fetched_at"] = now
+            return entry
+
+        item = response["items"].get(video_id)
+        if item is None:
+            return {"error": "Video not found"}
+
+        if parts == FULL_PARTS:
+            entry = dict(parse_video_item(item), fetched_at=now, stats_at=now, etags={})
+        else:
+            metadata = dict(entry["metadata"], views=item["statistics"].get("viewCount", "N/A"))
+            entry = dict(entry, metadata=metadata, stats_at=now, etags=dict(entry.get("etags", {})))
+        # A response ETag only describes this video if it was fetched alone
+        if single and response.get("etag"):
+            entry["etags"][parts] = response.get("etag")
+        return entry
+
+    def stats(self):
+        lookups = self._counts["lookups"]
+        return {
+            "lookups": lookups,
+            "cache_hits": self._counts["cache_hits"],
+            "coalesced": self._counts["coalesced"],
+            "api_calls": self._counts["api_calls"],
+            "not_modified": self._counts["not_modified"],
+            # videos.list costs one quota unit per call, whatever the parts
+            "quota_units_per_lookup": round(self._counts["api_calls"] / lookups, 3) if lookups else 0,
+        }
@@ -0,0 +1,226 @@
+import bisect
+import logging
+import math
+import threading
+import time
+
+# Seconds: from cache hits up to the transcription of a multi-hour video
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800,
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """Yield ``(name, label pairs, value)`` for the exposition."""
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, list(zip(self.labelnames, key)), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, pairs, value in self.samples():
+            lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. requests or bytes."""
+
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. requests in flight."""
+
+    type = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def track(self, **labels):
+        """Context manager that counts the enclosed block as in flight."""
+        return _InFlight(self, labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets.
+
+    If ``outcome`` is one of the label names, ``time()`` fills it in with
+    ``ok`` or ``error`` depending on whether the timed block raised.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # One count per bucket plus +Inf, then the running sum
+                entry = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[index] += 1
+            entry[-1] += value
+
+    def time(self, **labels):
+        """Context manager that observes the duration of the enclosed block."""
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(entry)) for key, entry in self._values.items()]
+        for key, entry in items:
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), entry):
+                cumulative += count
+                yield f"{self.name}_bucket", pairs + [("le", _number(bound))], cumulative
+            yield f"{self.name}_sum", pairs, entry[-1]
+            yield f"{self.name}_count", pairs, cumulative
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        labels = self.labels
+        if "outcome" in self.histogram.labelnames and "outcome" not in labels:
+            labels = dict(labels, outcome="error" if exc_type else "ok")
+        self.histogram.observe(time.perf_counter() - self.started, **labels)
+        return False
+
+
+class _InFlight:
+    __slots__ = ("gauge", "labels")
+
+    def __init__(self, gauge, labels):
+        self.gauge = gauge
+        self.labels = labels
+
+    def __enter__(self):
+        self.gauge.inc(**self.labels)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.gauge.dec(**self.labels)
+        return False
+
+
+class Registry:
+    """A set of metrics rendered together in the Prometheus text format.
+
+    Metrics updated on the request path are recorded as they happen.
+    Values that other components already count (cache, jobs, storage) are
+    read by collectors only when ``/metrics`` is scraped, so they cost
+    nothing in between.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def collector(self, fn):
+        """Register ``fn()``, which returns metrics built fresh for each scrape."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for fn in self._collectors:
+            try:
+                metrics = list(fn())
+            except Exception as e:
+                logging.error(f"Metrics collector {fn.__name__} failed: {e}")
+                continue
+            for metric in metrics:
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def snapshot(metric_type, name, documentation, value=None, labelnames=(), values=None):
+    """Build a one-off metric for a collector from a value or ``{labels: value}``."""
+    metric = metric_type(name, documentation, labelnames)
+    if values is None:
+        values = {(): value}
+    metric._values = {tuple(str(part) for part in key): v for key, v in values.items()}
+    return metric
+
+
+registry = Registry()
@@ -0,0 +1,316 @@
+import asyncio
+import collections
+import math
+import threading
+import time
+
+
+class RateLimitedError(Exception):
+    """Work refused to stay within a provider quota or the server's capacity.
+
+    Surfaces as 429 Too Many Requests with ``Retry-After`` set to
+    ``retry_after`` seconds.
+    """
+
+    status_code = 429
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    """Allow ``rate`` operations per second on average, in bursts of up to ``burst``.
+
+    Tokens are reserved rather than polled for: a caller that finds the
+    bucket empty takes a token from the future and is told how long to
+    wait for it, so waiters are served in arrival order without spinning.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, math.ceil(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait=None):
+        """Take a token; return ``(True, wait)``, or ``(False, wait)`` without one.
+
+        The token is only taken if the wait would not exceed ``max_wait``.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if max_wait is not None and wait > max_wait:
+                return False, wait
+            self._tokens -= 1
+            return True, wait
+
+
+class Slots:
+    """Counting semaphore that threads and coroutines can both wait on.
+
+    Provider calls are made from worker threads (SDK clients) and from the
+    event loop (aiohttp), so a ``threading`` or ``asyncio`` semaphore alone
+    would not cap both. Waiters are served first come, first served.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.in_use = 0
+        self._waiters = collections.deque()
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self):
+        return len(self._waiters)
+
+    def _enqueue(self, notify):
+        with self._lock:
+            if self.in_use < self.size and not self._waiters:
+                self.in_use += 1
+                return None
+            # [granted, notify]; a released slot is handed straight to the waiter
+            waiter = [False, notify]
+            self._waiters.append(waiter)
+            return waiter
+
+    def _cancel(self, waiter):
+        with self._lock:
+            if not waiter[0]:
+                self._waiters.remove(waiter)
+                return
+        # Granted after we gave up: pass the slot on
+        self.release()
+
+    def acquire(self, timeout=None):
+        event = threading.Event()
+        waiter = self._enqueue(event.set)
+        if waiter is None or event.wait(timeout):
+            return True
+        self._cancel(waiter)
+        return False
+
+    async def acquire_async(self, timeout=None):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            if not future.done():
+                future.set_result(None)
+
+        waiter = self._enqueue(lambda: loop.call_soon_threadsafe(wake))
+        if waiter is None:
+            return True
+        try:
+            await asyncio.wait_for(future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            self._cancel(waiter)
+            return False
+        except asyncio.CancelledError:
+            self._cancel(waiter)
+            raise
+
+    def release(self):
+        with self._lock:
+            if not self._waiters:
+                self.in_use -= 1
+                return
+            waiter = self._waiters.popleft()
+            waiter[0] = True
+        waiter[1]()
+
+
+class ProviderLimiter:
+    """Requests-per-second and concurrency limits for one external provider.
+
+    Use as ``with limiter:`` in worker threads or ``async with limiter:``
+    on the event loop. Callers wait their turn for up to ``max_wait``
+    seconds, or less if they pass their own ``max_wait`` to ``acquire``;
+    if the queue is longer than that they get RateLimitedError
+    immediately instead of piling up behind the quota. ``rate`` or
+    ``concurrency`` of 0 disables that limit.
+    """
+
+    def __init__(self, name, rate=0, burst=None, concurrency=0, max_wait=10.0):
+        self.name = name
+        self.max_wait = max_wait
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.slots = Slots(concurrency) if concurrency else None
+        self._lock = threading.Lock()
+        self._counts = collections.Counter()
+
+    def _count(self, **amounts):
+        with self._lock:
+            self._counts.update(amounts)
+
+    def _max_wait(self, max_wait):
+        return self.max_wait if max_wait is None else max(0.0, min(self.max_wait, max_wait))
+
+    def _reserve(self, max_wait):
+        if self.bucket is None:
+            return 0.0
+        granted, wait = self.bucket.reserve(max_wait)
+        if not granted:
+            self._count(rejected=1)
+            raise RateLimitedError(f"{self.name} rate limit reached, try again later", wait)
+        return wait
+
+    def _slot_timeout(self, waited):
+        self._count(rejected=1)
+        raise RateLimitedError(
+            f"Too many concurrent {self.name} calls, try again later", self.max_wait - waited
+        )
+
+    def acquire(self, max_wait=None):
+        max_wait = self._max_wait(max_wait)
+        started = time.monotonic()
+        wait = self._reserve(max_wait)
+        if wait:
+            time.sleep(wait)
+        if self.slots and not self.slots.acquire(max_wait - wait):
+            self._slot_timeout(wait)
+        self._record(time.monotonic() - started)
+
+    async def acquire_async(self, max_wait=None):
+        max_wait = self._max_wait(max_wait)
+        started = time.monotonic()
+        wait = self._reserve(max_wait)
+        if wait:
+            await asyncio.sleep(wait)
+        if self.slots and not await self.slots.acquire_async(max_wait - wait):
+            self._slot_timeout(wait)
+        self._record(time.monotonic() - started)
+
+    def _record(self, waited):
+        if waited > 0.001:
+            self._count(calls=1, delayed=1, wait_seconds=waited)
+        else:
+            self._count(calls=1)
+
+    def release(self):
+        if self.slots:
+            self.slots.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    async def __aenter__(self):
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            "rate": self.bucket.rate if self.bucket else None,
+            "burst": self.bucket.burst if self.bucket else None,
+            "concurrency": self.slots.size if self.slots else None,
+            "in_use": self.slots.in_use if self.slots else None,
+            "waiting": self.slots.waiting if self.slots else 0,
+            "calls": counts.get("calls", 0),
+            "delayed": counts.get("delayed", 0),
+            "wait_seconds": round(counts.get("wait_seconds", 0.0), 3),
+            "rejected": counts.get("rejected", 0),
+        }
+
+
+class AdmissionController:
+    """Admit at most ``max_in_flight`` units of work, rejecting the rest early.
+
+    Each admitted request holds a ticket until its work is done; work made
+    of several pipelines, such as a batch, is admitted as that many units
+    and can give them back one at a time. When the server is full, ``admit`` raises RateLimitedError straight away, with a
+    ``retry_after`` estimated from how long recent work took and how far
+    over capacity we are, so clients back off instead of queueing requests
+    that would time out anyway.
+    """
+
+    def __init__(self, max_in_flight, default_seconds=5.0, max_retry_after=300):
+        self.max_in_flight = max_in_flight
+        self.max_retry_after = max_retry_after
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._average_seconds = default_seconds
+        self._lock = threading.Lock()
+
+    def admit(self, units=1):
+        """Admit ``units`` pipelines at once, all or none."""
+        with self._lock:
+            if self.in_flight + units > self.max_in_flight:
+                self.rejected += 1
+                retry_after = self._retry_after(units)
+            else:
+                self.in_flight += units
+                self.admitted += units
+                return _Ticket(self, units)
+        raise RateLimitedError("Server is busy, try again later", retry_after)
+
+    def retry_after(self):
+        with self._lock:
+            return self._retry_after()
+
+    def _retry_after(self, units=1):
+        # Time for the work ahead of a new request to drain, at full parallelism
+        backlog = self.in_flight - self.max_in_flight + units
+        estimate = self._average_seconds * max(1, backlog) / max(1, self.max_in_flight)
+        return min(self.max_retry_after, max(1, math.ceil(estimate)))
+
+    def _done(self, seconds, units=1):
+        with self._lock:
+            self.in_flight -= units
+            # Exponentially weighted, so the estimate follows changes in load
+            self._average_seconds += 0.2 * (seconds - self._average_seconds)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "average_seconds": round(self._average_seconds, 3),
+            }
+
+
+class _Ticket:
+    """Admission held by one request; released explicitly or on exit.
+
+    ``release(1)`` gives back one unit of a multi-unit ticket, e.g. when
+    one video of a batch is done; ``release()`` gives back the rest.
+    """
+
+    def __init__(self, controller, units=1):
+        self._controller = controller
+        self._started = time.monotonic()
+        self._units = units
+        self._lock = threading.Lock()
+
+    def release(self, units=None):
+        with self._lock:
+            units = self._units if units is None else min(units, self._units)
+            self._units -= units
+        if units > 0:
+            self._controller._done(time.monotonic() - self._started, units)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
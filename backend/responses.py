@@ -0,0 +1,113 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip is used when brotli is not installed
+    brotli = None
+
+from captions import CueTrack
+
+COMPRESS_MIN_BYTES = 1024
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/plain", "application/x-subrip"}
+# Kept whatever ``fields`` asks for, so clients always see what is missing
+ALWAYS_KEPT_FIELDS = {"error", "partial", "stage_status", "stage_errors", "retry_after"}
+
+
+def columnar_subtitles(subtitles):
+    """Encode cues as parallel arrays instead of one object per cue.
+
+    Drops the formatted ``start``/``end`` strings and ``index``, which the
+    client can derive from the seconds and the array position.
+    """
+    return CueTrack.from_value(subtitles).columns()
+
+
+def parse_fields(value):
+    """Turn ``"a,b"`` (or a list) into a set of field names, or None for all."""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    return {field.strip() for field in value if field.strip()}
+
+
+def shape_result(result, fields=None, compact=False):
+    """Select and compact the sections of a /process result.
+
+    ``fields`` keeps only the named top-level keys (errors and stage status
+    are always kept).
+    ``compact`` encodes subtitles as columns, drops the duplicated
+    duration from ``player_data`` and, unless ``transcription`` was asked
+    for explicitly, omits the transcript text that the subtitles already
+    contain.
+    """
+    if fields:
+        result = {
+            key: value for key, value in result.items() if key in fields or key in ALWAYS_KEPT_FIELDS
+        }
+    else:
+        result = dict(result)
+    if not compact:
+        if isinstance(result.get("subtitles"), CueTrack):
+            result["subtitles"] = result["subtitles"].to_dicts()
+        return result
+
+    if "subtitles" in result:
+        if not (fields and "transcription" in fields):
+            result.pop("transcription", None)
+        result["subtitles"] = columnar_subtitles(result["subtitles"])
+    if "player_data" in result:
+        result["player_data"] = {
+            key: value for key, value in result["player_data"].items() if key != "duration"
+        }
+    return result
+
+
+def choose_encoding(accept_encoding):
+    """Pick ``br`` or ``gzip`` from an Accept-Encoding header, or None."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        # Quality 5 compresses close to the maximum at a fraction of the cost
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+
+def compress_response(response, accept_encoding):
+    """Compress a buffered text/JSON Flask response if the client allows it."""
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None or len(data) < COMPRESS_MIN_BYTES:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
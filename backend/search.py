@@ -0,0 +1,169 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+
+_WORD = re.compile(r"\w+")
+
+
+def build_match(query):
+    """Turn free text into an FTS5 query in which every word must match.
+
+    Words are quoted so user input cannot inject FTS5 syntax. There is no
+    prefix matching: a short prefix expands to thousands of terms, and
+    stemming already matches other forms of a word.
+    """
+    terms = _WORD.findall(query.lower())
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms)
+
+
+class TranscriptIndex:
+    """Full-text index of subtitle cues across every processed video.
+
+    Cues live once in a ``cues`` table; an FTS5 inverted index over their
+    text (Porter-stemmed) is kept in sync by triggers and ranks hits with
+    BM25. Each video is indexed as a unit, in one transaction so that its
+    cues get consecutive row IDs, and only re-indexed when its transcript
+    changes, so new videos are added incrementally. The file is shared by
+    every worker process, like the SQLite stage cache.
+
+    Searches rank every match with BM25 inside FTS5, which only keeps the
+    best ``limit`` while scanning.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._known = set()  # videos this process has indexed or found indexed
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS cues (
+                id INTEGER PRIMARY KEY,
+                video_id TEXT NOT NULL,
+                cue INTEGER NOT NULL,
+                start_seconds REAL NOT NULL,
+                end_seconds REAL NOT NULL,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS cues_video ON cues (video_id);
+            CREATE VIRTUAL TABLE IF NOT EXISTS cues_fts USING fts5(
+                text, content='cues', content_rowid='id', tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS cues_insert AFTER INSERT ON cues BEGIN
+                INSERT INTO cues_fts (rowid, text) VALUES (new.id, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS cues_delete AFTER DELETE ON cues BEGIN
+                INSERT INTO cues_fts (cues_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END;
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                cues INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                indexed_at REAL NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def is_known(self, video_id):
+        """Whether this process has already seen ``video_id`` in the index; no I/O."""
+        return video_id in self._known
+
+    @staticmethod
+    def _digest(cues):
+        return hashlib.sha1(cues.text.encode("utf-8")).hexdigest()
+
+    def index_video(self, video_id, cues):
+        """Index (or re-index) the cues of one video from a ``CueTrack``.
+
+        Returns False without touching the index if the same transcript is
+        already indexed.
+        """
+        digest = self._digest(cues)
+        rows = (
+            (video_id, i, start, end, text)
+            for i, (start, end, text) in enumerate(cues.iter_cues(), 1)
+        )
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest FROM videos WHERE video_id = ?", (video_id,)
+            ).fetchone()
+            if row and row[0] == digest:
+                self._known.add(video_id)
+                return False
+            with self._conn:
+                self._conn.execute("DELETE FROM cues WHERE video_id = ?", (video_id,))
+                self._conn.executemany(
+                    "INSERT INTO cues (video_id, cue, start_seconds, end_seconds, text) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO videos (video_id, cues, digest, indexed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (video_id, len(cues), digest, time.time()),
+                )
+            self._known.add(video_id)
+        return True
+
+    def remove(self, video_id):
+        with self._lock, self._conn:
+            self._known.discard(video_id)
+            self._conn.execute("DELETE FROM cues WHERE video_id = ?", (video_id,))
+            self._conn.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
+
+    def search(self, query, video_id=None, limit=20):
+        """Best matching cues for ``query``, optionally within one video.
+
+        Returns dicts with ``video_id``, ``index`` (1-based cue number),
+        ``start_seconds``, ``end_seconds``, ``text`` and ``score`` (higher
+        is better).
+        """
+        match = build_match(query)
+        if match is None:
+            return []
+        with self._lock:
+            if video_id:
+                # A video's cues have consecutive row IDs, so FTS5 can seek to them
+                first, last = self._conn.execute(
+                    "SELECT MIN(id), MAX(id) FROM cues WHERE video_id = ?", (video_id,)
+                ).fetchone()
+                if first is None:
+                    return []
+            else:
+                first, last = 0, 2**63 - 1
+            # rank is BM25; FTS5 orders by it with a top-N sort instead of sorting every match
+            rows = self._conn.execute(
+                """SELECT c.video_id, c.cue, c.start_seconds, c.end_seconds, c.text, m.rank
+                FROM (
+                    SELECT rowid, rank FROM cues_fts
+                    WHERE cues_fts MATCH ? AND rowid BETWEEN ? AND ?
+                    ORDER BY rank LIMIT ?
+                ) m JOIN cues c ON c.id = m.rowid
+                ORDER BY m.rank""",
+                (match, first, last, limit),
+            ).fetchall()
+        return [
+            {
+                "video_id": row[0],
+                "index": row[1],
+                "start_seconds": row[2],
+                "end_seconds": row[3],
+                "text": row[4],
+                "score": round(-row[5], 3),
+            }
+            for row in rows
+        ]
+
+    def stats(self):
+        with self._lock:
+            videos, cues = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(cues), 0) FROM videos"
+            ).fetchone()
+        return {"videos": videos, "cues": cues}
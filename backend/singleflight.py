@@ -0,0 +1,86 @@
+import asyncio
+import concurrent.futures
+import threading
+from collections import Counter
+
+
+class _Call:
+    """One in-flight execution and the number of callers waiting for it."""
+
+    def __init__(self):
+        self.future = concurrent.futures.Future()
+        # Running futures cannot be cancelled, so a waiter giving up can't end it for the others
+        self.future.set_running_or_notify_cancel()
+        self.waiters = 1
+        self.cancel = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    Requests are served from different threads and event loops, so the
+    shared result is a ``concurrent.futures.Future`` that every waiter wraps
+    into its own loop. The first caller for a key (the leader) starts the
+    work as a task of its own; callers that arrive while it is in flight
+    wait for its result or exception instead of starting their own. A
+    cancelled caller, the leader included, only stops waiting: the work is
+    cancelled once no caller is waiting for it any more.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._counts = Counter()
+
+    async def do(self, key, fn):
+        """Run ``await fn()`` once for all concurrent callers with ``key``."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._counts["leader"] += 1
+            else:
+                call.waiters += 1
+                self._counts["coalesced"] += 1
+
+        if leader:
+            loop = asyncio.get_running_loop()
+            task = loop.create_task(fn())
+            call.cancel = lambda: loop.call_soon_threadsafe(task.cancel)
+            task.add_done_callback(lambda task: self._finish(key, call, task))
+
+        try:
+            return await asyncio.wrap_future(call.future)
+        except asyncio.CancelledError:
+            self._leave(key, call)
+            raise
+
+    def _leave(self, key, call):
+        with self._lock:
+            call.waiters -= 1
+            if call.waiters or call.future.done():
+                return
+            # Nobody wants the result: later callers start afresh
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.cancel()
+
+    def _finish(self, key, call, task):
+        if task.cancelled():
+            call.future.set_exception(asyncio.CancelledError())
+        elif task.exception() is not None:
+            call.future.set_exception(task.exception())
+        else:
+            call.future.set_result(task.result())
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "leader": self._counts["leader"],
+                "coalesced": self._counts["coalesced"],
+                "in_flight": len(self._calls),
+            }
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import threading
+import time
+
+from cache_backends import MemoryBackend, SQLiteBackend, decode_value, encode_value
+
+
+class StageCache:
+    """Cache for individual pipeline stages, keyed by video ID.
+
+    Each stage (metadata, transcript, word frequency, summary per mode, ...)
+    is stored as its own entry so that a request which only differs in one
+    stage can reuse everything else. Entries live in a shared backend
+    (SQLite by default, or Redis) so that every worker process sees the
+    same results and they survive restarts; values above
+    ``compress_threshold`` bytes are zlib-compressed there. A per-process
+    LRU bounded by ``memory_bytes`` holds decoded values for hot videos,
+    each charged its uncompressed serialised size.
+
+    Coroutines use ``aget``/``aset``, which do the backend I/O and the
+    (de)compression in a worker thread instead of on the event loop.
+    """
+
+    def __init__(self, backend, memory_bytes=64 * 1024 * 1024, memory_ttl=3600, compress_threshold=4096):
+        if isinstance(backend, str):
+            backend = SQLiteBackend(backend)
+        self.backend = backend
+        self.memory = MemoryBackend(max_bytes=memory_bytes, ttl=memory_ttl)
+        self.compress_threshold = compress_threshold
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(video_id, stage):
+        return f"{video_id}:{stage}"
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, video_id, stage, max_age=None):
+        """Return the cached value for a stage, or None if missing or stale."""
+        key = self._key(video_id, stage)
+        entry = self.memory.get(key)
+        if entry is not None:
+            self._count("memory_hits")
+        else:
+            try:
+                stored = self.backend.get(key)
+            except Exception as e:
+                logging.error(f"Cache read failed for {key}: {e}")
+                stored = None
+            if stored is None:
+                self._count("misses")
+                return None
+            payload, created_at = stored
+            value, size = decode_value(payload)
+            entry = (value, created_at)
+            self.memory.set(key, value, created_at, size=size)
+
+        value, created_at = entry
+        if max_age is not None and time.time() - created_at > max_age:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return value
+
+    def stats(self):
+        try:
+            shared = self.backend.stats()
+        except Exception as e:
+            shared = {"backend": self.backend.name, "error": str(e)}
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "misses": self.misses,
+            "memory": self.memory.stats(),
+            "shared": shared,
+        }
+
+    def set(self, video_id, stage, value):
+        """Store a stage result. Values must be JSON serialisable."""
+        key = self._key(video_id, stage)
+        created_at = time.time()
+        try:
+            payload, size = encode_value(value, self.compress_threshold)
+        except (TypeError, ValueError) as e:
+            logging.error(f"Cannot cache stage {stage} for {video_id}: {e}")
+            return
+        try:
+            self.backend.set(key, payload, created_at)
+        except Exception as e:
+            logging.error(f"Cache write failed for {key}: {e}")
+        self.memory.set(key, value, created_at, size=size)
+
+    async def aget(self, video_id, stage, max_age=None):
+        return await asyncio.to_thread(self.get, video_id, stage, max_age)
+
+    async def aset(self, video_id, stage, value):
+        await asyncio.to_thread(self.set, video_id, stage, value)
+
+    def delete(self, video_id, stage=None):
+        """Drop one stage for a video, or every stage if none is given."""
+        if stage is None:
+            prefix = self._key(video_id, "")
+            self.backend.delete_prefix(prefix)
+            self.memory.delete_prefix(prefix)
+        else:
+            key = self._key(video_id, stage)
+            self.backend.delete(key)
+            self.memory.delete(key)
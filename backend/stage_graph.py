@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+
+
+class StageError(Exception):
+    """A pipeline stage failed in a way that should end the request."""
+
+    def __init__(self, message, status_code=500):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class StageGraph:
+    """Tiny dependency-graph executor for async pipeline stages.
+
+    Stages are registered with the names of the stages they depend on and
+    start as soon as all of those have finished, so independent stages run
+    concurrently. Each stage function receives a dict of its dependencies'
+    results. If any stage raises, the remaining stages are cancelled and the
+    exception propagates out of ``run``, unless the stage was marked
+    optional: then its error is kept in ``errors`` and the other stages
+    carry on. With a ``timeout``, ``run`` returns
+    the results it has when time is up and leaves the unfinished stages
+    (listed in ``pending``) running in the background.
+    """
+
+    def __init__(self):
+        self._stages = {}
+        self._tasks = {}
+        self.timings = {}
+        self.failed = set()
+        self.errors = {}
+        self.started_at = None
+        self.finished_at = None
+
+    def add(self, name, fn, deps=()):
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Stage {name!r} depends on unknown stage {dep!r}")
+        self._stages[name] = (fn, tuple(deps))
+
+    @property
+    def pending(self):
+        return {name for name, task in self._tasks.items() if not task.done()}
+
+    def status(self, name):
+        """``"done"``, ``"failed"`` or ``"pending"`` for a stage after ``run``."""
+        task = self._tasks[name]
+        if not task.done():
+            return "pending"
+        return "failed" if task.cancelled() or task.exception() else "done"
+
+    async def run(self, timeout=None, optional=()):
+        self.started_at = time.perf_counter()
+        tasks = self._tasks
+
+        async def run_stage(name):
+            fn, deps = self._stages[name]
+            inputs = {}
+            for dep in deps:
+                inputs[dep] = await tasks[dep]
+            started = time.perf_counter()
+            try:
+                return await fn(inputs)
+            except BaseException:
+                self.failed.add(name)
+                raise
+            finally:
+                self.timings[name] = (started, time.perf_counter())
+
+        for name in self._stages:
+            tasks[name] = asyncio.ensure_future(run_stage(name))
+        names = {task: name for name, task in tasks.items()}
+
+        loop = asyncio.get_running_loop()
+        until = None if timeout is None else loop.time() + timeout
+        waiting = set(tasks.values())
+        try:
+            while waiting:
+                remaining = None if until is None else until - loop.time()
+                if remaining is not None and remaining <= 0:
+                    break
+                done, waiting = await asyncio.wait(
+                    waiting, timeout=remaining, return_when=asyncio.FIRST_EXCEPTION
+                )
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        continue
+                    if names[task] not in optional:
+                        raise error
+                    self.errors[names[task]] = error
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            self.finished_at = time.perf_counter()
+
+        for task in waiting:
+            task.add_done_callback(_log_late_failure)
+        return {
+            name: task.result()
+            for name, task in tasks.items()
+            if task.done() and task.exception() is None
+        }
+
+    def critical_path(self):
+        """Return the chain of stages that determined the total latency."""
+        if not self.timings:
+            return []
+        name = max(self.timings, key=lambda n: self.timings[n][1])
+        path = [name]
+        while True:
+            deps = [d for d in self._stages[name][1] if d in self.timings]
+            if not deps:
+                break
+            name = max(deps, key=lambda n: self.timings[n][1])
+            path.append(name)
+        return list(reversed(path))
+
+    def report(self):
+        """Summarise stage timings and the critical path in milliseconds."""
+        def ms(value):
+            return round((value - self.started_at) * 1000, 1)
+
+        path = self.critical_path()
+        return {
+            "total_ms": ms(self.finished_at) if self.finished_at else None,
+            "critical_path": path,
+            "critical_path_ms": round(
+                sum(self.timings[n][1] - self.timings[n][0] for n in path) * 1000, 1
+            ),
+            "stages": {
+                name: {"start_ms": ms(start), "end_ms": ms(end)}
+                for name, (start, end) in self.timings.items()
+            },
+        }
+
+
+def _log_late_failure(task):
+    # Stages left running after ``run`` returned; nobody else sees their errors
+    if not task.cancelled() and task.exception() is not None:
+        logging.warning(f"Background stage failed: {task.exception()}")
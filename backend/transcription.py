@@ -0,0 +1,280 @@
+import asyncio
+import logging
+import random
+import re
+import shutil
+
+import aiohttp
+
+from captions import CueTrack
+
+
+class Transcriber:
+    """Interface for speech-to-text backends.
+
+    ``transcribe`` receives one audio segment and returns a dict with a
+    ``words`` list of ``{"word", "start", "end"}`` entries (seconds relative
+    to the start of the segment) and the plain ``transcript``.
+    """
+
+    name = "base"
+
+    async def transcribe(self, audio, mimetype, duration=None):
+        raise NotImplementedError
+
+
+class DeepgramTranscriber(Transcriber):
+    """Deepgram prerecorded API over plain HTTP.
+
+    ``sessions`` is a ``SharedSession`` providing a pooled keep-alive
+    session; without one a session is opened per request.
+    """
+
+    name = "deepgram"
+
+    def __init__(self, api_key, url="https://api.deepgram.com/v1/listen", model="nova-2", sessions=None):
+        self.api_key = api_key
+        self.url = url
+        self.model = model
+        self.sessions = sessions
+
+    async def request(self, audio, mimetype):
+        """POST audio to Deepgram and return the raw JSON response."""
+        if self.sessions is None:
+            async with aiohttp.ClientSession() as session:
+                return await self._post(session, audio, mimetype)
+        return await self._post(self.sessions.get(), audio, mimetype)
+
+    async def _post(self, session, audio, mimetype):
+        async with session.post(
+            self.url,
+            params={"model": self.model, "smart_format": "true", "punctuate": "true"},
+            headers={"Authorization": f"Token {self.api_key}", "Content-Type": mimetype},
+            data=audio,
+        ) as resp:
+            if resp.status >= 400:
+                raise RuntimeError(f"Deepgram error {resp.status}: {await resp.text()}")
+            return await resp.json()
+
+    async def transcribe(self, audio, mimetype, duration=None):
+        return parse_deepgram_response(await self.request(audio, mimetype))
+
+
+class StubTranscriber(Transcriber):
+    """Offline backend that fabricates evenly spaced words.
+
+    Used for tests and benchmarks: it sleeps for ``latency`` seconds (plus
+    a realtime factor of the segment duration) and returns
+    ``words_per_second`` numbered words, so stitching and timing logic can
+    be exercised without network access.
+    """
+
+    name = "stub"
+
+    def __init__(self, words_per_second=2.5, latency=0.0, realtime_factor=0.0, jitter=0.0):
+        self.words_per_second = words_per_second
+        self.latency = latency
+        self.realtime_factor = realtime_factor
+        self.jitter = jitter
+
+    async def transcribe(self, audio, mimetype, duration=None):
+        duration = duration or 0
+        delay = self.latency + duration * self.realtime_factor
+        if self.jitter:
+            delay += random.uniform(0, self.jitter)
+        await asyncio.sleep(delay)
+
+        step = 1 / self.words_per_second
+        words = []
+        t = 0.0
+        while t + step <= duration:
+            words.append({"word": f"word{len(words)}", "start": round(t, 3), "end": round(t + step * 0.8, 3)})
+            t += step
+        for i in range(9, len(words), 10):
+            words[i]["word"] += "."
+        return {"words": words, "transcript": " ".join(w["word"] for w in words)}
+
+
+def parse_deepgram_response(response):
+    """Extract words (with timings) and the transcript from a Deepgram response."""
+    alternative = response["results"]["channels"][0]["alternatives"][0]
+    words = [
+        {
+            "word": word.get("punctuated_word") or word.get("word", ""),
+            "start": word.get("start", 0.0),
+            "end": word.get("end", 0.0),
+        }
+        for word in alternative.get("words", [])
+    ]
+    return {"words": words, "transcript": alternative.get("transcript", "")}
+
+
+def words_to_subtitles(words, max_words=14, max_duration=6.0):
+    """Group timed words into a ``CueTrack``.
+
+    A cue ends at sentence punctuation, after ``max_words`` words or when it
+    would span more than ``max_duration`` seconds.
+    """
+    cues = []
+    current = []
+
+    def flush():
+        if current:
+            cues.append(
+                (
+                    round(current[0]["start"], 2),
+                    round(current[-1]["end"], 2),
+                    " ".join(w["word"] for w in current),
+                )
+            )
+            current.clear()
+
+    for word in words:
+        if current and (
+            len(current) >= max_words or word["end"] - current[0]["start"] > max_duration
+        ):
+            flush()
+        current.append(word)
+        if re.search(r"[.!?]$", word["word"]):
+            flush()
+    flush()
+    return CueTrack.from_cues(cues)
+
+
+def stitch_segments(segments):
+    """Merge per-segment word lists into one timeline.
+
+    ``segments`` is a list of ``(start, end, words)`` in order, where word
+    times are relative to the segment start. Adjacent segments overlap, so
+    each overlap is cut at its midpoint: words before the cut come from the
+    earlier segment and words after it from the later one.
+    """
+    merged = []
+    for i, (start, end, words) in enumerate(segments):
+        lower = (start + segments[i - 1][1]) / 2 if i > 0 else float("-inf")
+        upper = (segments[i + 1][0] + end) / 2 if i + 1 < len(segments) else float("inf")
+        for word in words:
+            absolute_start = word["start"] + start
+            if lower <= absolute_start < upper:
+                merged.append(
+                    {"word": word["word"], "start": absolute_start, "end": word["end"] + start}
+                )
+    return merged
+
+
+def plan_segments(duration, segment_seconds=600, overlap_seconds=5, silences=None):
+    """Choose ``(start, end)`` windows covering ``duration`` seconds.
+
+    Windows are ``segment_seconds`` long plus ``overlap_seconds`` of overlap.
+    When ``silences`` (a list of ``(start, end)`` gaps) is given, each cut
+    is moved to the middle of the nearest silence within a quarter window.
+    """
+    cuts = []
+    position = segment_seconds
+    while position < duration:
+        if silences:
+            window = segment_seconds / 4
+            nearby = [
+                (s + e) / 2 for s, e in silences if abs((s + e) / 2 - position) <= window
+            ]
+            if nearby:
+                position = min(nearby, key=lambda m: abs(m - position))
+        cuts.append(position)
+        position += segment_seconds
+
+    bounds = [0.0] + cuts + [duration]
+    half = overlap_seconds / 2
+    return [
+        (max(0.0, bounds[i] - half), min(duration, bounds[i + 1] + half))
+        for i in range(len(bounds) - 1)
+    ]
+
+
+def ffmpeg_available():
+    return shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+
+
+async def _run(*args):
+    process = await asyncio.create_subprocess_exec(
+        *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"{args[0]} failed: {stderr.decode(errors='ignore')[-500:]}")
+    return stdout, stderr
+
+
+async def probe_duration(file_path):
+    stdout, _ = await _run(
+        "ffprobe", "-v", "error", "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1", file_path,
+    )
+    return float(stdout.decode().strip())
+
+
+async def detect_silences(file_path, noise_db=-30, min_silence=0.5):
+    """Return ``(start, end)`` pairs of silent stretches found by ffmpeg."""
+    _, stderr = await _run(
+        "ffmpeg", "-hide_banner", "-nostats", "-i", file_path,
+        "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}", "-f", "null", "-",
+    )
+    starts = [float(x) for x in re.findall(r"silence_start: ([\d.]+)", stderr.decode())]
+    ends = [float(x) for x in re.findall(r"silence_end: ([\d.]+)", stderr.decode())]
+    return list(zip(starts, ends))
+
+
+async def extract_segment(file_path, start, end):
+    """Cut ``[start, end)`` out of an AAC file without re-encoding."""
+    stdout, _ = await _run(
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-ss", str(start), "-t", str(end - start),
+        "-i", file_path, "-vn", "-c:a", "copy", "-f", "adts", "pipe:1",
+    )
+    return stdout
+
+
+async def transcribe_segments(segments, transcriber, load_audio, mimetype, concurrency=4):
+    """Transcribe planned segments in parallel and stitch the results.
+
+    ``load_audio(start, end)`` returns the audio bytes of one segment. At
+    most ``concurrency`` segments are being loaded or transcribed at once.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(start, end):
+        async with semaphore:
+            audio = await load_audio(start, end)
+            result = await transcriber.transcribe(audio, mimetype, duration=end - start)
+            return start, end, result["words"]
+
+    results = await asyncio.gather(*(run(start, end) for start, end in segments))
+    words = stitch_segments(results)
+    return {
+        "transcript": " ".join(w["word"] for w in words),
+        "words": words,
+        "subtitles": words_to_subtitles(words),
+    }
+
+
+async def transcribe_file_segmented(
+    file_path,
+    transcriber,
+    segment_seconds=600,
+    overlap_seconds=5,
+    concurrency=4,
+    split_on_silence=False,
+):
+    """Split an audio file with ffmpeg and transcribe the pieces in parallel."""
+    duration = await probe_duration(file_path)
+    silences = await detect_silences(file_path) if split_on_silence else None
+    segments = plan_segments(duration, segment_seconds, overlap_seconds, silences)
+    logging.info(
+        f"Transcribing {duration:.0f}s of audio in {len(segments)} segments "
+        f"with {transcriber.name}"
+    )
+    return await transcribe_segments(
+        segments,
+        transcriber,
+        lambda start, end: extract_segment(file_path, start, end),
+        "audio/aac",
+        concurrency=concurrency,
+    )
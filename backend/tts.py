@@ -0,0 +1,144 @@
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gtts import gTTS
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+class TTSEngine:
+    """Interface for text-to-speech backends.
+
+    ``synthesize`` turns one chunk of text into MP3 bytes. Engines are
+    called from worker threads, so implementations must be thread safe.
+    """
+
+    name = "base"
+
+    def synthesize(self, text):
+        raise NotImplementedError
+
+
+class GTTSEngine(TTSEngine):
+    """Google Translate TTS through gTTS's public ``stream`` API.
+
+    ``timeout`` bounds each request, in seconds.
+    """
+
+    name = "gtts"
+
+    def __init__(self, lang="en", tld="com", slow=False, timeout=None):
+        self.lang = lang
+        self.tld = tld
+        self.slow = slow
+        self.timeout = timeout
+
+    def synthesize(self, text):
+        tts = gTTS(text=text, lang=self.lang, slow=self.slow, tld=self.tld, timeout=self.timeout)
+        return b"".join(tts.stream())
+
+
+class FakeTTSEngine(TTSEngine):
+    """Offline engine that returns silent MP3 frames.
+
+    Used for tests and benchmarks: it sleeps for ``latency`` seconds plus
+    ``seconds_per_char`` per character (roughly what gTTS spends per
+    request) and emits one MPEG-1 Layer III frame per ``chars_per_frame``
+    characters, so ordering and concatenation can be checked without
+    network access.
+    """
+
+    name = "fake"
+
+    # MPEG-1 Layer III, 128 kbit/s, 44.1 kHz, no padding: 417 byte frames
+    FRAME_HEADER = bytes([0xFF, 0xFB, 0x90, 0x00])
+    FRAME_SIZE = 417
+
+    def __init__(self, latency=0.0, seconds_per_char=0.0, chars_per_frame=10):
+        self.latency = latency
+        self.seconds_per_char = seconds_per_char
+        self.chars_per_frame = chars_per_frame
+
+    def synthesize(self, text):
+        time.sleep(self.latency + len(text) * self.seconds_per_char)
+        frames = max(1, len(text) // self.chars_per_frame)
+        frame = self.FRAME_HEADER + bytes(self.FRAME_SIZE - len(self.FRAME_HEADER))
+        return frame * frames
+
+
+def split_text(text, max_chars=400):
+    """Split text into chunks of at most ``max_chars`` at sentence boundaries.
+
+    Sentences are packed greedily; a single sentence longer than
+    ``max_chars`` is split between words.
+    """
+    chunks = []
+    current = ""
+    for sentence in _SENTENCE_END.split(" ".join(text.split())):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if not sentence:
+            continue
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def strip_id3(data):
+    """Drop ID3v2 and ID3v1 tags so MP3 chunks can be joined frame to frame."""
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = 0
+        for byte in data[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        footer = 10 if data[5] & 0x10 else 0
+        data = data[10 + size + footer :]
+    if len(data) >= 128 and data[-128:-125] == b"TAG":
+        data = data[:-128]
+    return data
+
+
+def iter_synthesized(chunks, engine, concurrency=4):
+    """Synthesize ``chunks`` in parallel and yield their MP3 bytes in order.
+
+    At most ``concurrency`` chunks are in flight. The first chunk is yielded
+    as soon as it is ready, while later chunks are still being synthesized.
+    """
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="tts") as executor:
+        for data in executor.map(engine.synthesize, chunks):
+            yield strip_id3(data)
+
+
+def synthesize_to_file(text, filepath, engine, max_chars=400, concurrency=4, on_chunk=None):
+    """Synthesize ``text`` into one MP3 file, calling ``on_chunk(bytes)`` per chunk.
+
+    The audio is written to a temporary file and renamed into place when
+    complete, so readers never see a partial file at ``filepath``.
+    """
+    # A unique name, so concurrent writers of the same file never share one
+    fd, partial = tempfile.mkstemp(dir=os.path.dirname(filepath) or ".", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for data in iter_synthesized(split_text(text, max_chars), engine, concurrency):
+                f.write(data)
+                if on_chunk:
+                    on_chunk(data)
+        os.replace(partial, filepath)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return filepath
@@ -1,28 +1,50 @@
 import os
 import logging
-import aiohttp
 import cohere
+import httplib2
+import httpx
+import aiohttp
 from pytubefix import YouTube
 from pytubefix.cli import on_progress
-from deepgram import Deepgram
 from dotenv import load_dotenv
 from collections import Counter
 import re
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 import json
+import math
 import base64
 from datetime import datetime, timedelta
 import asyncio
+import contextlib
+import queue
+import threading
 from functools import lru_cache
-from gtts import gTTS
-import hashlib
+import io
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph
 from reportlab.lib.styles import getSampleStyleSheet
 from datetime import datetime
-import nltk
 from collections import Counter
+from artifact_store import ArtifactStore
+from clients import ClientPool, SharedSession
+from janitor import Janitor
+from metadata import FULL_PARTS, YOUTUBE_MAX_IDS_PER_CALL
+from captions import CueTrack, cues_to_srt, parse_captions
+from deadlines import check_deadline, hedged
+from keywords import KeywordAnalyzer
+from metrics import registry, snapshot, Counter as MetricCounter, Gauge
+from ratelimit import ProviderLimiter, RateLimitedError
+from tts import FakeTTSEngine, GTTSEngine, TTSEngine, synthesize_to_file
+from transcription import (
+    DeepgramTranscriber,
+    StubTranscriber,
+    Transcriber,
+    parse_deepgram_response,
+    transcribe_file_segmented,
+    words_to_subtitles,
+)
 
 
 # Load environment variables
@@ -31,9 +53,248 @@ deepgram_api_key = os.getenv("DEEPGRAM_API_KEY")
 cohere_api_key = os.getenv("COHERE_API_KEY")
 youtube_api_key = os.getenv("YOUTUBE_API_KEY")
 
+# Provider metrics, exported by /metrics
+PROVIDER_SECONDS = registry.histogram(
+    "ytsum_provider_request_duration_seconds",
+    "Latency of calls to external providers.",
+    ["provider", "operation", "outcome"],
+)
+PROVIDER_IN_FLIGHT = registry.gauge(
+    "ytsum_provider_requests_in_flight",
+    "Calls to external providers in progress.",
+    ["provider"],
+)
+PROVIDER_BYTES = registry.counter(
+    "ytsum_provider_bytes_total",
+    "Bytes downloaded from or uploaded to external providers.",
+    ["provider", "direction"],
+)
+PROVIDER_HEDGES = registry.counter(
+    "ytsum_provider_hedged_requests_total",
+    "Extra requests sent because a provider was slow to answer.",
+    ["provider"],
+)
+
+
+# Per-process limits for each provider: requests per second (in bursts of up
+# to <NAME>_RATE_BURST) and concurrent calls; 0 disables a limit. With several
+# worker processes, split the provider's quota between them. Calls that would
+# wait longer than PROVIDER_MAX_WAIT seconds fail fast with a 429 instead.
+PROVIDER_MAX_WAIT = float(os.getenv("PROVIDER_MAX_WAIT", "10"))
+
+
+def _provider_limiter(name, rate, concurrency):
+    prefix = name.upper()
+    return ProviderLimiter(
+        name,
+        rate=float(os.getenv(f"{prefix}_RATE_LIMIT", str(rate))),
+        burst=int(os.getenv(f"{prefix}_RATE_BURST", "0")) or None,
+        concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", str(concurrency))),
+        max_wait=PROVIDER_MAX_WAIT,
+    )
+
+
+provider_limiters = {
+    name: _provider_limiter(name, rate, concurrency)
+    for name, rate, concurrency in (
+        ("youtube", 5, 8),  # watch pages, captions and audio downloads
+        ("youtube_api", 5, 4),  # videos.list and playlistItems.list
+        ("deepgram", 5, 20),
+        ("cohere", 5, 10),
+        ("gtts", 10, 8),  # per synthesized chunk
+    )
+}
+
+# Seconds to wait for one provider response (<NAME>_TIMEOUT); for downloads
+# this bounds each read, and for streamed uploads the wait after the last
+# chunk, not the whole transfer (see STREAM_IDLE_TIMEOUT).
+PROVIDER_TIMEOUTS = {
+    name: float(os.getenv(f"{name.upper()}_TIMEOUT", str(timeout)))
+    for name, timeout in (
+        ("youtube", 30),
+        ("youtube_api", 15),
+        ("deepgram", 600),
+        ("cohere", 120),
+        ("gtts", 20),
+    )
+}
+# Hedged requests: when a Cohere chat or gTTS chunk has not answered after
+# <NAME>_HEDGE_AFTER seconds (about the provider's p95 latency), the same
+# request is sent again and the first answer wins. 0 turns hedging off.
+PROVIDER_HEDGE_AFTER = {
+    name: float(os.getenv(f"{name.upper()}_HEDGE_AFTER", "0")) for name in ("cohere", "gtts")
+}
+
+
+@registry.collector
+def collect_provider_limits():
+    """Waiting, delayed and rejected calls per provider limiter."""
+    limits = {name: limiter.stats() for name, limiter in provider_limiters.items()}
+    for metric_type, key, name, documentation in (
+        (Gauge, "waiting", "ytsum_provider_limiter_waiting", "Calls waiting for a slot."),
+        (MetricCounter, "delayed", "ytsum_provider_limiter_delayed_total", "Calls delayed."),
+        (MetricCounter, "wait_seconds", "ytsum_provider_limiter_wait_seconds_total", "Time spent waiting."),
+        (MetricCounter, "rejected", "ytsum_provider_limiter_rejected_total", "Calls refused with a 429."),
+    ):
+        yield snapshot(
+            metric_type,
+            name,
+            documentation,
+            labelnames=("provider",),
+            values={(provider,): stats[key] for provider, stats in limits.items()},
+        )
+
+
+class _ProviderCall:
+    """Rate limit, time and count one call to an external provider.
+
+    Use ``with`` in worker threads and ``async with`` on the event loop, so
+    that waiting for the provider's limiter never blocks the loop. No call
+    is started once the request's deadline has passed, and the limiter
+    wait is cut short at the deadline. ``timeout`` is the provider's
+    per-call timeout: ``async with`` enforces it, synchronous SDK calls
+    pass it on to the client. Long transfers can restart it with
+    ``reset_timeout``.
+    """
+
+    def __init__(self, provider, operation, limit, measure=True):
+        self.provider = provider
+        self.limiter = provider_limiters.get(provider) if limit else None
+        self.timeout = PROVIDER_TIMEOUTS.get(provider) if limit else None
+        self._timeout = None
+        self._seconds = self.timeout
+        if measure:
+            self.in_flight = PROVIDER_IN_FLIGHT.track(provider=provider)
+            self.timer = PROVIDER_SECONDS.time(provider=provider, operation=operation)
+        else:
+            self.in_flight = self.timer = contextlib.nullcontext()
+
+    def __enter__(self):
+        remaining = check_deadline(f"calling {self.provider}")
+        if self.limiter:
+            self.limiter.acquire(remaining)
+        self.in_flight.__enter__()
+        self.timer.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timer.__exit__(exc_type, exc, tb)
+        self.in_flight.__exit__(exc_type, exc, tb)
+        if self.limiter:
+            self.limiter.release()
+        return False
+
+    async def __aenter__(self):
+        remaining = check_deadline(f"calling {self.provider}")
+        if self.limiter:
+            await self.limiter.acquire_async(remaining)
+        self.in_flight.__enter__()
+        self.timer.__enter__()
+        if self.timeout:
+            self._timeout = asyncio.timeout(self.timeout)
+            await self._timeout.__aenter__()
+        return self
+
+    def reset_timeout(self, seconds=None):
+        """Allow ``seconds`` (default: the provider's timeout) from now."""
+        if self._timeout is not None:
+            self._seconds = seconds or self.timeout
+            self._timeout.reschedule(asyncio.get_running_loop().time() + self._seconds)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._timeout is not None:
+            try:
+                await self._timeout.__aexit__(exc_type, exc, tb)
+            except TimeoutError as e:
+                error = TimeoutError(f"{self.provider} did not answer within {self._seconds:g} s")
+                self.__exit__(TimeoutError, error, None)
+                raise error from e
+        return self.__exit__(exc_type, exc, tb)
+
+
+def provider_call(provider, operation, limit=True):
+    """Time one call to an external provider, within the provider's limits.
+
+    ``limit=False`` only measures, for calls made up of several limited ones.
+    """
+    return _ProviderCall(provider, operation, limit)
+
+
+def _provider_limits(provider):
+    # Limits, deadline and timeout of provider_call, without the metrics
+    return _ProviderCall(provider, None, limit=True, measure=False)
+
+
+def _hedged(provider, fn):
+    return hedged(
+        fn, PROVIDER_HEDGE_AFTER.get(provider, 0), on_hedge=lambda: PROVIDER_HEDGES.inc(provider=provider)
+    )
+
+
+class _LimitedTranscriber(Transcriber):
+    """Applies a provider's limits and timeout to each call of a wrapped Transcriber."""
+
+    def __init__(self, transcriber, provider):
+        self.transcriber = transcriber
+        self.provider = provider
+        self.name = transcriber.name
+
+    async def transcribe(self, audio, mimetype, duration=None):
+        async with _provider_limits(self.provider):
+            return await self.transcriber.transcribe(audio, mimetype, duration=duration)
+
+
+class _LimitedTTSEngine(TTSEngine):
+    """Applies a provider's limits and hedging to each chunk a wrapped TTSEngine synthesizes."""
+
+    def __init__(self, engine, provider):
+        self.engine = engine
+        self.provider = provider
+        self.name = engine.name
+
+    def _synthesize(self, text):
+        with _provider_limits(self.provider):
+            return self.engine.synthesize(text)
+
+    def synthesize(self, text):
+        return _hedged(self.provider, lambda: self._synthesize(text))
+
+
+# Connection pools shared by every request
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "100"))  # total keep-alive connections
+HTTP_POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST", "20"))
+HTTP_KEEPALIVE_SECONDS = int(os.getenv("HTTP_KEEPALIVE_SECONDS", "30"))
+YOUTUBE_CLIENT_POOL_SIZE = int(os.getenv("YOUTUBE_CLIENT_POOL_SIZE", "8"))
+
 # Initialize clients
-co = cohere.ClientV2(cohere_api_key)
-youtube = build("youtube", "v3", developerKey=youtube_api_key)
+co = cohere.ClientV2(
+    cohere_api_key,
+    httpx_client=httpx.Client(
+        timeout=300,
+        limits=httpx.Limits(
+            max_connections=HTTP_POOL_PER_HOST,
+            max_keepalive_connections=HTTP_POOL_PER_HOST,
+            keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+        ),
+    ),
+)
+# googleapiclient objects are not thread safe, so each thread borrows one
+youtube_clients = ClientPool(
+    lambda: build(
+        "youtube",
+        "v3",
+        developerKey=youtube_api_key,
+        http=httplib2.Http(timeout=PROVIDER_TIMEOUTS["youtube_api"]),
+        cache_discovery=False,
+    ),
+    size=YOUTUBE_CLIENT_POOL_SIZE,
+)
+# aiohttp session for Deepgram and other async HTTP calls
+http_sessions = SharedSession(
+    limit=HTTP_POOL_SIZE,
+    limit_per_host=HTTP_POOL_PER_HOST,
+    keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+)
 
 # Constants - these will be overridden by app.py
 # Keep them as fallbacks for direct module usage
@@ -41,6 +302,55 @@ EXPORTS_DIR = "exports"
 DOWNLOADS_DIR = "downloads"
 CAPTIONS_DIR = "captions"
 CLEANUP_THRESHOLD = timedelta(hours=24)  # Clean files older than 24 hours
+artifact_store = ArtifactStore(EXPORTS_DIR)  # SRT, MP3, PDF and TXT exports
+
+
+def _janitor_owns(name):
+    """Files the app writes: named artifacts, their .part temp files and downloaded audio."""
+    return ArtifactStore.is_valid_name(name) or name.endswith((".part", ".m4a"))
+
+
+# Disk budget shared by exports and downloads, enforced in the background.
+# The captions directory holds checked-in files and is never swept.
+janitor = Janitor(
+    [EXPORTS_DIR, DOWNLOADS_DIR],
+    max_bytes=int(os.getenv("STORAGE_MAX_BYTES", str(2 * 1024**3))),
+    max_age=CLEANUP_THRESHOLD.total_seconds(),
+    interval=int(os.getenv("JANITOR_INTERVAL", "60")),
+    owns=_janitor_owns,
+)
+
+# Streaming transcription settings
+DEEPGRAM_LISTEN_URL = os.getenv("DEEPGRAM_LISTEN_URL", "https://api.deepgram.com/v1/listen")
+STREAMING_TRANSCRIPTION = os.getenv("STREAMING_TRANSCRIPTION", "true").lower() == "true"
+STREAM_CHUNK_SIZE = 256 * 1024  # bytes per audio chunk
+STREAM_BUFFER_CHUNKS = 8  # chunks held between download and upload
+# Longest the streamed upload may go without a chunk moving, from YouTube or to Deepgram
+STREAM_IDLE_TIMEOUT = float(os.getenv("STREAM_IDLE_TIMEOUT", "60"))
+
+# Segment-parallel transcription settings for long audio
+SEGMENT_TRANSCRIPTION_MIN_SECONDS = int(os.getenv("SEGMENT_TRANSCRIPTION_MIN_SECONDS", "1200"))
+SEGMENT_SECONDS = int(os.getenv("SEGMENT_SECONDS", "600"))
+SEGMENT_OVERLAP_SECONDS = float(os.getenv("SEGMENT_OVERLAP_SECONDS", "5"))
+SEGMENT_CONCURRENCY = int(os.getenv("SEGMENT_CONCURRENCY", "4"))
+SEGMENT_SPLIT_ON_SILENCE = os.getenv("SEGMENT_SPLIT_ON_SILENCE", "false").lower() == "true"
+TRANSCRIBER_BACKEND = os.getenv("TRANSCRIBER_BACKEND", "deepgram")  # or "stub"
+
+# Summarization settings
+SUMMARY_MODEL = "command-r-plus-08-2024"
+SUMMARY_MAP_REDUCE_THRESHOLD = int(os.getenv("SUMMARY_MAP_REDUCE_THRESHOLD", "30000"))  # tokens
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "8000"))
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+
+# Stopword tables and tokenizer are built once, not per request
+keyword_analyzer = KeywordAnalyzer()
+KEYWORD_BUCKET_SECONDS = int(os.getenv("KEYWORD_BUCKET_SECONDS", "300"))
+
+# Text-to-speech settings
+TTS_BACKEND = os.getenv("TTS_BACKEND", "gtts")  # or "fake"
+TTS_CHUNK_CHARS = int(os.getenv("TTS_CHUNK_CHARS", "400"))  # characters per synthesized chunk
+TTS_CONCURRENCY = int(os.getenv("TTS_CONCURRENCY", "4"))
+tts_engine_factory = None  # overrides TTS_BACKEND when set, see set_providers
 
 # Function to set directories from app.py
 def set_directories(exports_dir, downloads_dir, captions_dir):
@@ -48,6 +358,8 @@ def set_directories(exports_dir, downloads_dir, captions_dir):
     EXPORTS_DIR = exports_dir
     DOWNLOADS_DIR = downloads_dir
     CAPTIONS_DIR = captions_dir
+    artifact_store.root = exports_dir
+    janitor.directories = [exports_dir, downloads_dir]
     
     # Ensure directories exist
     for directory in [EXPORTS_DIR, DOWNLOADS_DIR, CAPTIONS_DIR]:
@@ -59,6 +371,35 @@ def set_directories(exports_dir, downloads_dir, captions_dir):
     logging.info(f"Set CAPTIONS_DIR to: {CAPTIONS_DIR}")
 
 
+def set_providers(
+    cohere_client=None,
+    youtube_api_factory=None,
+    youtube_cls=None,
+    deepgram_url=None,
+    deepgram_key=None,
+    tts_factory=None,
+):
+    """Replace external service clients, e.g. with local stand-ins.
+
+    Only the providers given are replaced. ``youtube_api_factory`` builds a
+    YouTube Data API client for the pool, ``youtube_cls`` stands in for
+    pytubefix's ``YouTube`` and ``tts_factory`` returns a ``TTSEngine``.
+    """
+    global co, youtube_clients, YouTube, DEEPGRAM_LISTEN_URL, deepgram_api_key, tts_engine_factory
+    if cohere_client is not None:
+        co = cohere_client
+    if youtube_api_factory is not None:
+        youtube_clients = ClientPool(youtube_api_factory, size=YOUTUBE_CLIENT_POOL_SIZE)
+    if youtube_cls is not None:
+        YouTube = youtube_cls
+    if deepgram_url is not None:
+        DEEPGRAM_LISTEN_URL = deepgram_url
+    if deepgram_key is not None:
+        deepgram_api_key = deepgram_key
+    if tts_factory is not None:
+        tts_engine_factory = tts_factory
+
+
 @lru_cache(maxsize=128)
 def on_download_progress(stream, chunk, bytes_remaining):
     """Callback function to monitor download progress."""
@@ -75,46 +416,6 @@ def ensure_directory(directory):
         logging.info(f"Created directory: {directory}")
 
 
-def cleanup_old_files(directory, threshold=CLEANUP_THRESHOLD):
-    """Clean up files older than the threshold in the specified directory."""
-    ensure_directory(directory)  # Make sure the directory exists
-    current_time = datetime.now()
-
-    for filename in os.listdir(directory):
-        file_path = os.path.join(directory, filename)
-        file_modified = datetime.fromtimestamp(os.path.getmtime(file_path))
-
-        if current_time - file_modified > threshold:
-            try:
-                os.remove(file_path)
-                logging.info(f"Cleaned up old file: {file_path}")
-            except Exception as e:
-                logging.error(f"Error cleaning up file {file_path}: {e}")
-
-
-def get_youtube_player_data(video_url):
-    """Get YouTube video data using the API."""
-    try:
-        video_id = extract_video_id(video_url)
-        if not video_id:
-            return {"error": "Invalid YouTube URL"}
-
-        request = youtube.videos().list(part="player,contentDetails", id=video_id)
-        response = request.execute()
-
-        if not response["items"]:
-            return {"error": "Video not found"}
-
-        return {
-            "video_id": video_id,
-            "embed_html": response["items"][0]["player"]["embedHtml"],
-            "duration": response["items"][0]["contentDetails"]["duration"],
-        }
-    except Exception as e:
-        logging.error(f"Error fetching YouTube data: {e}")
-        return {"error": str(e)}
-
-
 def extract_video_id(url):
     """Extract YouTube video ID from URL."""
     patterns = [
@@ -130,67 +431,36 @@ def extract_video_id(url):
     return None
 
 
-def get_word_frequency(text, min_length=4, top_n=50, additional_stop_words=None):
+def analyze_keywords(text, subtitles=None):
+    """Word frequency, bigram keyphrases and per-time-bucket terms for a transcript."""
     try:
         if not text or not isinstance(text, str):
-            logging.warning("Empty or invalid text for word frequency")
-            return {}
-
-        try:
-            nltk.data.find('corpora/stopwords')
-        except LookupError:
-            logging.info("Downloading NLTK stopwords corpus")
-            nltk.download('stopwords', quiet=True)
-
-        try:
-            from nltk.corpus import stopwords
-            nltk_stop_words = set(stopwords.words("english"))
-        except (ImportError, LookupError):
-            logging.warning("NLTK stopwords not available, using custom list")
-            nltk_stop_words = set()
-
-        custom_stop_words = {
-            "like", "actually", "basically", "literally", "yeah", "okay", "um", "uh",
-            "going", "getting", "think", "know", "mean", "just", "really", "very", 
-            "kind", "sort", "thing", "things", "stuff", "way", "lot", "bit", "make", "made",
-            "want", "need", "trying", "sure", "look", "looks", "looking",
-            "dont", "cant", "wasnt", "isnt", "arent", "hasnt", "havent", "wouldnt",
-            "ive", "youve", "weve", "theyre", "youre", "thats", "theres", 
-            "today", "yesterday", "tomorrow", "time", "year", "month", "week", "day",
-            "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
-            "something", "someone", "everybody", "everyone", "anything", "everything",
-            "back", "come", "goes", "around", "through"
-        }
-        
-        stop_words = nltk_stop_words.union(custom_stop_words)
-        
-        if additional_stop_words:
-            stop_words = stop_words.union(additional_stop_words)
-
-        words = re.findall(r"\b\w+\b", text.lower())
-        words = [word for word in words if len(word) >= min_length and word not in stop_words]
-        
-        word_counts = Counter(words)
-        
-        frequency_dict = dict(word_counts.most_common(top_n))
+            logging.warning("Empty or invalid text for keyword analysis")
+            return {"word_frequency": {}, "keyphrases": {}, "timeline": []}
+        return keyword_analyzer.analyze(text, subtitles, bucket_seconds=KEYWORD_BUCKET_SECONDS)
+    except Exception as e:
+        logging.error(f"Error analyzing keywords: {e}", exc_info=True)
+        return {"word_frequency": {}, "keyphrases": {}, "timeline": []}
 
-        if not frequency_dict:
-            logging.info("No words found for word frequency")
 
-        return frequency_dict
+async def download_audio(video_url, progress_callback=None):
+    """Download audio from YouTube video.
 
-    except Exception as e:
-        logging.error(f"Error generating word frequency: {e}", exc_info=True)
-        return {}
+    ``progress_callback``, if given, is called with the download percentage.
+    """
+    return await asyncio.to_thread(_download_audio_sync, video_url, progress_callback)
 
 
-async def download_audio(video_url):
-    """Download audio from YouTube video."""
+def _download_audio_sync(video_url, progress_callback=None):
     ensure_directory(DOWNLOADS_DIR)
-    cleanup_old_files(DOWNLOADS_DIR)
+
+    def on_progress(stream, chunk, bytes_remaining):
+        on_download_progress(stream, chunk, bytes_remaining)
+        if progress_callback and stream.filesize:
+            progress_callback((stream.filesize - bytes_remaining) / stream.filesize * 100)
 
     try:
-        yt = YouTube(video_url, on_progress_callback=on_download_progress)
+        yt = YouTube(video_url, on_progress_callback=on_progress)
         audio_stream = yt.streams.get_audio_only()
 
         if not audio_stream:
@@ -199,23 +469,39 @@ async def download_audio(video_url):
         audio_file_name = sanitize_filename(yt.title)
         audio_file_path = os.path.join(DOWNLOADS_DIR, f"{audio_file_name}.m4a")
 
-        audio_stream.download(
-            output_path=DOWNLOADS_DIR, filename=f"{audio_file_name}.m4a"
-        )
+        # Pinned until delete_file, so the janitor leaves it alone meanwhile
+        janitor.pin(audio_file_path)
+        try:
+            with provider_call("youtube", "download"):
+                audio_stream.download(
+                    output_path=DOWNLOADS_DIR,
+                    filename=f"{audio_file_name}.m4a",
+                    timeout=PROVIDER_TIMEOUTS["youtube"],
+                )
+        except Exception:
+            janitor.unpin(audio_file_path)
+            raise
 
         if os.path.exists(audio_file_path):
+            PROVIDER_BYTES.inc(
+                os.path.getsize(audio_file_path), provider="youtube", direction="download"
+            )
             return {"status": "success", "audio_file": audio_file_path}
         else:
+            janitor.unpin(audio_file_path)
             return {"status": "error", "message": "Audio file download failed"}
 
+    except RateLimitedError:
+        raise
     except Exception as e:
         logging.error(f"Failed to download audio from {video_url}: {e}")
         return {"status": "error", "message": str(e)}
 
 
 def generate_fake_timestamps(transcript, words_per_second=2.5):
+    """Spread sentences over time at ``words_per_second`` as a ``CueTrack``."""
     sentences = re.split(r"(?<=[.!?])\s+", transcript)
-    subtitles = []
+    cues = []
     current_time = 0.0
 
     for sentence in sentences:
@@ -225,17 +511,13 @@ def generate_fake_timestamps(transcript, words_per_second=2.5):
         word_count = len(sentence.split())
         duration = max(1.5, (word_count / words_per_second))
 
-        subtitles.append(
-            {
-                "start_seconds": round(current_time, 2),
-                "end_seconds": round(current_time + duration, 2),
-                "text": sentence.strip(),
-            }
+        cues.append(
+            (round(current_time, 2), round(current_time + duration, 2), sentence.strip())
         )
 
         current_time += duration
 
-    return subtitles
+    return CueTrack.from_cues(cues)
 
 
 async def transcribe_audio(file_path):
@@ -243,104 +525,277 @@ async def transcribe_audio(file_path):
         if not deepgram_api_key:
             return {"status": "error", "message": "Deepgram API key not provided"}
 
-        deepgram = Deepgram(deepgram_api_key)
+        audio = await asyncio.to_thread(_read_file, file_path)
+        async with provider_call("deepgram", "transcribe"):
+            response = await _deepgram().request(audio, "audio/m4a")
+        PROVIDER_BYTES.inc(len(audio), provider="deepgram", direction="upload")
 
-        async with aiohttp.ClientSession() as session:
-            with open(file_path, "rb") as audio:
-                source = {"buffer": audio.read(), "mimetype": "audio/m4a"}
+        await delete_file(file_path)  # Clean up after transcription
 
-                response = await deepgram.transcription.prerecorded(
-                    source, {"smart_format": True, "model": "nova-2", "punctuate": True}
-                )
+        return _transcription_result(response)
+
+    except RateLimitedError:
+        await delete_file(file_path)
+        raise
+    except Exception as e:
+        logging.error(f"Transcription error: {e}")
+        await delete_file(file_path)
+        return {"status": "error", "message": str(e)}
 
-        await delete_file(file_path)  # Clean up after transcription
 
-        transcript = response["results"]["channels"][0]["alternatives"][0]["transcript"]
+def _read_file(file_path):
+    with open(file_path, "rb") as f:
+        return f.read()
 
+
+def _deepgram():
+    return DeepgramTranscriber(deepgram_api_key, url=DEEPGRAM_LISTEN_URL, sessions=http_sessions)
+
+
+def _transcription_result(response):
+    """Turn a Deepgram prerecorded response into the pipeline's result dict."""
+    parsed = parse_deepgram_response(response)
+    transcript = parsed["transcript"]
+
+    if parsed["words"]:
+        # Build captions from Deepgram's word timings
+        subtitles = words_to_subtitles(parsed["words"])
+    else:
         # Generate fake timestamps for captions tab
         subtitles = generate_fake_timestamps(transcript)
 
+    return {
+        "status": "success",
+        "transcript": transcript,  # Plain text for transcription tab
+        "subtitles": subtitles,  # Fake timestamps for captions tab
+        "source": "transcription",
+    }
+
+
+def get_transcriber():
+    """Return the configured Transcriber backend."""
+    if TRANSCRIBER_BACKEND == "stub":
+        return StubTranscriber()
+    return _deepgram()
+
+
+async def transcribe_audio_segmented(file_path):
+    """Transcribe a long audio file as parallel overlapping segments.
+
+    Subtitles carry the real word timings, shifted by each segment's offset.
+    """
+    try:
+        if TRANSCRIBER_BACKEND != "stub" and not deepgram_api_key:
+            return {"status": "error", "message": "Deepgram API key not provided"}
+
+        transcriber = get_transcriber()
+        if TRANSCRIBER_BACKEND in provider_limiters:
+            # Each segment is a separate request against the provider's quota
+            transcriber = _LimitedTranscriber(transcriber, TRANSCRIBER_BACKEND)
+        async with provider_call(TRANSCRIBER_BACKEND, "transcribe_segmented", limit=False):
+            result = await transcribe_file_segmented(
+                file_path,
+                transcriber,
+                segment_seconds=SEGMENT_SECONDS,
+                overlap_seconds=SEGMENT_OVERLAP_SECONDS,
+                concurrency=SEGMENT_CONCURRENCY,
+                split_on_silence=SEGMENT_SPLIT_ON_SILENCE,
+            )
         return {
             "status": "success",
-            "transcript": transcript,  # Plain text for transcription tab
-            "subtitles": subtitles,  # Fake timestamps for captions tab
+            "transcript": result["transcript"],
+            "subtitles": result["subtitles"],
             "source": "transcription",
         }
-
+    except RateLimitedError:
+        raise
     except Exception as e:
-        logging.error(f"Transcription error: {e}")
+        logging.error(f"Segmented transcription error: {e}")
+        return {"status": "error", "message": str(e)}
+    finally:
         await delete_file(file_path)
+
+
+async def stream_transcribe_audio(video_url, progress_callback=None):
+    """Download audio and upload it to Deepgram at the same time.
+
+    A worker thread pulls audio chunks from YouTube into a bounded queue
+    while the request body streams them to Deepgram with chunked transfer
+    encoding, so nothing touches the disk and at most
+    ``STREAM_BUFFER_CHUNKS`` chunks are held in memory. The download blocks
+    whenever the upload falls behind.
+
+    The upload takes as long as the video does, so it is bounded by
+    ``STREAM_IDLE_TIMEOUT`` between chunks rather than as a whole; once
+    the last chunk is sent, Deepgram's own timeout applies to the answer.
+    """
+    if not deepgram_api_key:
+        return {"status": "error", "message": "Deepgram API key not provided"}
+
+    chunks = queue.Queue(maxsize=STREAM_BUFFER_CHUNKS)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        # Give up if the consumer has gone away instead of blocking forever
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            with provider_call("youtube", "download_stream"):
+                yt = YouTube(video_url)
+                audio_stream = yt.streams.get_audio_only()
+                if not audio_stream:
+                    raise ValueError("No audio stream available")
+                total = audio_stream.filesize
+                received = 0
+                for chunk in audio_stream.iter_chunks(STREAM_CHUNK_SIZE):
+                    received += len(chunk)
+                    PROVIDER_BYTES.inc(len(chunk), provider="youtube", direction="download")
+                    if progress_callback and total:
+                        progress_callback(received / total * 100)
+                    if not put(chunk):
+                        return
+            put(done)
+        except Exception as e:
+            put(e)
+
+    async def body(call):
+        while True:
+            try:
+                item = await asyncio.to_thread(chunks.get, timeout=STREAM_IDLE_TIMEOUT)
+            except queue.Empty:
+                raise TimeoutError(f"No audio from youtube for {STREAM_IDLE_TIMEOUT:g} s") from None
+            if item is done:
+                call.reset_timeout()
+                return
+            if isinstance(item, Exception):
+                raise item
+            PROVIDER_BYTES.inc(len(item), provider="deepgram", direction="upload")
+            # Resumed once the chunk is written, so this also bounds a stalled upload
+            call.reset_timeout(STREAM_IDLE_TIMEOUT)
+            yield item
+
+    producer = asyncio.create_task(asyncio.to_thread(produce))
+    try:
+        async with provider_call("deepgram", "transcribe_stream") as call:
+            call.reset_timeout(STREAM_IDLE_TIMEOUT)
+            async with http_sessions.get().post(
+                DEEPGRAM_LISTEN_URL,
+                params={"model": "nova-2", "smart_format": "true", "punctuate": "true"},
+                headers={
+                    "Authorization": f"Token {deepgram_api_key}",
+                    "Content-Type": "audio/m4a",
+                },
+                data=body(call),
+                # Bounded by the call's timeout instead of the session's overall limit
+                timeout=aiohttp.ClientTimeout(total=None),
+            ) as resp:
+                if resp.status >= 400:
+                    message = await resp.text()
+                    return {"status": "error", "message": f"Deepgram error {resp.status}: {message}"}
+                response = await resp.json()
+        return _transcription_result(response)
+    except RateLimitedError:
+        raise
+    except Exception as e:
+        logging.error(f"Streaming transcription error: {e}")
         return {"status": "error", "message": str(e)}
+    finally:
+        stop.set()
+        await producer
 
 
 async def delete_file(file_path):
-    """Safely delete a file."""
+    """Safely delete a downloaded file and release its janitor pin."""
     try:
         if os.path.exists(file_path):
             os.remove(file_path)
             logging.info(f"Deleted file: {file_path}")
     except Exception as e:
         logging.error(f"Error deleting file {file_path}: {e}")
+    finally:
+        janitor.forget(file_path)
+        janitor.unpin(file_path)
 
 
-async def generate_srt_file(subtitles, video_title):
-    ensure_directory(EXPORTS_DIR)  # Ensure exports directory exists
-
-    srt_content = ""
-    for i, sub in enumerate(subtitles, 1):
-        start = format_timestamp_simple(sub.get("start_seconds", 0))
-        end = format_timestamp_simple(sub.get("end_seconds", 0))
-        text = sub.get("text", "")
-        srt_content += f"{i}\n{start} --> {end}\n{text}\n\n"
+async def generate_srt_file(subtitles):
+    """Write subtitles to the artifact store as SRT and return the artifact name."""
+    srt_content = cues_to_srt(CueTrack.from_value(subtitles).iter_cues())
+    return artifact_store.put(srt_content, "srt")
 
-    # Use more robust filename generation
-    srt_filename = f"{sanitize_filename(video_title)}_captions.srt"
-    srt_path = os.path.join(EXPORTS_DIR, srt_filename)
 
-    with open(srt_path, "w", encoding="utf-8") as f:
-        f.write(srt_content)
+async def process_batch(tasks, limit=5):
+    """Await coroutines concurrently, with at most ``limit`` running at once."""
+    semaphore = asyncio.Semaphore(limit)  # Limit concurrent API calls
 
-    return srt_filename
+    async def run(task):
+        async with semaphore:
+            return await task
 
+    return await asyncio.gather(*(run(task) for task in tasks))
 
-async def process_batch(tasks):
-    semaphore = asyncio.Semaphore(5)  # Limit concurrent API calls
-    async with semaphore:
-        return await asyncio.gather(*tasks)
 
+def fetch_videos(video_ids, part=FULL_PARTS, etag=None):
+    """Make one videos.list call for up to 50 IDs.
 
-def get_video_metadata(video_url):
-    """Fetch metadata using YouTube API with enhanced error handling."""
-    try:
-        video_id = extract_video_id(video_url)
-        if not video_id:
-            logging.error(f"Invalid YouTube URL: {video_url}")
-            return {"error": "Invalid YouTube URL"}
-
+    Returns ``{"etag": ..., "items": {video_id: item}}``, or None if ``etag``
+    is given and YouTube answers 304 Not Modified.
+    """
+    with youtube_clients.client() as youtube:
         request = youtube.videos().list(
-            part="snippet,statistics,contentDetails", id=video_id
+            part=part, id=",".join(video_ids), maxResults=YOUTUBE_MAX_IDS_PER_CALL
         )
-        response = request.execute()
-
-        if not response["items"]:
-            logging.error(f"No video found for URL: {video_url}")
-            return {"error": "Video not found"}
-
-        video_data = response["items"][0]
-
-        return {
-            "title": video_data["snippet"].get("title", "Unknown Title"),
-            "description": video_data["snippet"].get("description", ""),
-            "thumbnail": video_data["snippet"]["thumbnails"]["high"]["url"],
-            "author": video_data["snippet"].get("channelTitle", "Unknown Author"),
-            "publish_date": video_data["snippet"].get("publishedAt", ""),
-            "views": video_data["statistics"].get("viewCount", "N/A"),
-            "duration": video_data["contentDetails"].get("duration", ""),
-        }
-
-    except Exception as e:
-        logging.error(f"Detailed metadata fetch error: {e}")
-        return {"error": str(e)}
+        if etag:
+            request.headers["If-None-Match"] = etag
+        with provider_call("youtube_api", "videos.list"):
+            try:
+                response = request.execute()
+            except HttpError as e:
+                if etag and e.resp.status == 304:
+                    return None
+                raise
+    return {
+        "etag": response.get("etag"),
+        "items": {item["id"]: item for item in response.get("items", [])},
+    }
+
+
+def extract_playlist_id(url):
+    """Extract a YouTube playlist ID from a URL, if present."""
+    match = re.search(r"[?&]list=([0-9A-Za-z_-]+)", url)
+    return match.group(1) if match else None
+
+
+def get_playlist_video_ids(playlist_url, max_videos=200):
+    """List the video IDs of a playlist using the YouTube API."""
+    playlist_id = extract_playlist_id(playlist_url)
+    if not playlist_id:
+        return []
+
+    video_ids = []
+    page_token = None
+    while len(video_ids) < max_videos:
+        with youtube_clients.client() as youtube, provider_call("youtube_api", "playlistItems.list"):
+            response = youtube.playlistItems().list(
+                part="contentDetails",
+                playlistId=playlist_id,
+                maxResults=YOUTUBE_MAX_IDS_PER_CALL,
+                pageToken=page_token,
+            ).execute()
+        video_ids.extend(
+            item["contentDetails"]["videoId"] for item in response.get("items", [])
+        )
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            break
+    return video_ids[:max_videos]
 
 
 def sanitize_filename(filename):
@@ -351,56 +806,52 @@ def sanitize_filename(filename):
 
 
 async def get_video_captions(video_url):
-    try:
-        yt = YouTube(video_url)
-        captions = yt.captions
-
-        if not captions:
-            return None
-
-        caption_track = None
-        for lang_code in ["a.en", "en"]:
-            if lang_code in captions:
-                caption_track = captions[lang_code]
-                break
-
-        if not caption_track:
-            return None
-
-        ensure_directory(CAPTIONS_DIR)
-        srt_filename = f"{sanitize_filename(yt.title)}_captions.srt"
-        srt_path = os.path.join(CAPTIONS_DIR, srt_filename)
+    """Fetch official captions without blocking the event loop."""
+    return await asyncio.to_thread(_get_video_captions_sync, video_url)
 
-        with open(srt_path, "w", encoding="utf-8") as f:
-            f.write(caption_track.generate_srt_captions())
-
-        with open(srt_path, "r", encoding="utf-8") as f:
-            srt_content = f.read()
-
-        subtitles = parse_srt(srt_content)
-        transcript = " ".join([sub["text"] for sub in subtitles])  # Remove timestamps
 
+def _get_video_captions_sync(video_url):
+    try:
+        with provider_call("youtube", "captions"):
+            yt = YouTube(video_url)
+            captions = yt.captions
+
+            if not captions:
+                return None
+
+            caption_track = None
+            for lang_code in ["a.en", "en"]:
+                if lang_code in captions:
+                    caption_track = captions[lang_code]
+                    break
+
+            if not caption_track:
+                return None
+
+            xml_captions = caption_track.xml_captions
+
+        # Parse YouTube's timed-text XML directly; nothing is written to disk
+        subtitles = parse_captions(xml_captions, fmt="xml")
+        if not subtitles:
+            with provider_call("youtube", "captions"):
+                json_captions = caption_track.json_captions
+            subtitles = parse_captions(json_captions, fmt="json3")
         return {
             "subtitles": subtitles,
-            "transcript": transcript,  # New addition
-            "srt_path": srt_path,
+            "transcript": subtitles.text,  # The joined cue texts, not a copy
         }
 
+    except RateLimitedError:
+        # Not the same as having no captions: don't fall back to transcription
+        raise
     except Exception as e:
         logging.error(f"Error getting video captions: {e}")
         return None
 
 
-def format_timestamp_simple(seconds):
-    """Convert seconds to minutes:seconds format."""
-    minutes = int(seconds // 60)
-    remaining_seconds = int(seconds % 60)
-    return f"{minutes}:{remaining_seconds:02d}"
-
-
 def parse_srt(srt_content):
-    """Parse SRT format into structured subtitle data."""
-    subtitles = []
+    """Parse SRT format into a ``CueTrack``."""
+    cues = []
     current_subtitle = {}
     lines = srt_content.strip().split("\n")
 
@@ -417,7 +868,7 @@ def parse_srt(srt_content):
         if line.isdigit():
             # Save previous subtitle if it exists
             if current_subtitle and "text" in current_subtitle:
-                subtitles.append(current_subtitle)
+                cues.append(current_subtitle)
             current_subtitle = {"index": int(line)}
             i += 1
             continue
@@ -428,13 +879,9 @@ def parse_srt(srt_content):
             seconds_start = parse_timestamp(start.strip())
             seconds_end = parse_timestamp(end.strip())
 
-            # Store the seconds value for potential processing
+            # Formatted MM:SS timestamps are derived from these on demand
             current_subtitle["start_seconds"] = seconds_start
             current_subtitle["end_seconds"] = seconds_end
-
-            # Store the formatted MM:SS timestamp
-            current_subtitle["start"] = format_timestamp_simple(seconds_start)
-            current_subtitle["end"] = format_timestamp_simple(seconds_end)
             current_subtitle["text"] = ""
             i += 1
             continue
@@ -449,9 +896,9 @@ def parse_srt(srt_content):
 
     # Add the last subtitle
     if current_subtitle and "text" in current_subtitle:
-        subtitles.append(current_subtitle)
+        cues.append(current_subtitle)
 
-    return subtitles
+    return CueTrack.from_value(cues)
 
 
 def parse_timestamp(timestamp):
@@ -510,70 +957,71 @@ def format_duration(seconds):
         return f"{minutes} minute{'s' if minutes > 1 else ''}"
 
 
-def summarize_text(text, mode="short", duration_seconds=None):
-    """Summarize text using Cohere's Chat endpoint based on selected mode and video duration."""
-    try:
-        # Default reading speed (words per minute)
-        WPM = 150
+def build_summary_prompt(text, mode="short", duration_seconds=None):
+    """Build the Cohere prompt for the selected mode and video duration."""
+    # Default reading speed (words per minute)
+    WPM = 150
+    
+    # Define target summary durations as percentages of original content
+    summary_ratio = {
+        "short": 0.07,    # ~7% of original duration
+        "medium": 0.12,   # ~12% of original duration  
+        "lengthy": 0.20,  # ~20% of original duration
+    }
+    
+    # Determine approximate target word count based on duration
+    if duration_seconds:
+        hours = duration_seconds / 3600
         
-        # Define target summary durations as percentages of original content
-        summary_ratio = {
-            "short": 0.07,    # ~7% of original duration
-            "medium": 0.12,   # ~12% of original duration  
-            "lengthy": 0.20,  # ~20% of original duration
+        # Estimate original content word count (average speaking rate: ~150 words per minute)
+        original_word_count = int(duration_seconds / 60 * WPM)
+        
+        # Calculate target summary word counts
+        target_words = {
+            "short": max(300, int(original_word_count * summary_ratio["short"])),
+            "medium": max(500, int(original_word_count * summary_ratio["medium"])),
+            "lengthy": max(800, int(original_word_count * summary_ratio["lengthy"]))
         }
         
-        # Determine approximate target word count based on duration
-        if duration_seconds:
-            hours = duration_seconds / 3600
-            
-            # Estimate original content word count (average speaking rate: ~150 words per minute)
-            original_word_count = int(duration_seconds / 60 * WPM)
-            
-            # Calculate target summary word counts
-            target_words = {
-                "short": max(300, int(original_word_count * summary_ratio["short"])),
-                "medium": max(500, int(original_word_count * summary_ratio["medium"])),
-                "lengthy": max(800, int(original_word_count * summary_ratio["lengthy"]))
-            }
-            
-            # Convert word counts to estimated paragraph counts (assuming ~100 words per paragraph)
-            paragraph_counts = {
-                "short": max(2, target_words["short"] // 100),
-                "medium": max(3, target_words["medium"] // 100),
-                "lengthy": max(5, target_words["lengthy"] // 100)
-            }
-            
-            # Format length guidance in different ways to ensure clear communication
-            length_guidance = {
-                "short": f"approximately {paragraph_counts['short']} paragraphs (around {target_words['short']} words)",
-                "medium": f"approximately {paragraph_counts['medium']} paragraphs (around {target_words['medium']} words)",
-                "lengthy": f"approximately {paragraph_counts['lengthy']} paragraphs (around {target_words['lengthy']} words)"
-            }
-            
-            # Add time estimates (assuming reading speed of ~150 words per minute)
-            read_time = {
-                "short": max(2, target_words["short"] // WPM),
-                "medium": max(3, target_words["medium"] // WPM),
-                "lengthy": max(5, target_words["lengthy"] // WPM)
-            }
-        else:
-            # Default if no duration provided
-            length_guidance = {
-                "short": "2-3 paragraphs (around 300 words)",
-                "medium": "4-5 paragraphs (around 500 words)",
-                "lengthy": "7-8 paragraphs (around 800 words)",
-            }
-            
-            read_time = {
-                "short": 2,
-                "medium": 3,
-                "lengthy": 5
-            }
-
-        # Base prompts that explicitly state expected length
-        if mode == "short":
-            message = f"""Generate a comprehensive summary of this transcript in {length_guidance['short']}. 
+        # Convert word counts to estimated paragraph counts (assuming ~100 words per paragraph)
+        paragraph_counts = {
+            "short": max(2, target_words["short"] // 100),
+            "medium": max(3, target_words["medium"] // 100),
+            "lengthy": max(5, target_words["lengthy"] // 100)
+        }
+        
+        # Format length guidance in different ways to ensure clear communication
+        length_guidance = {
+            "short": f"approximately {paragraph_counts['short']} paragraphs (around {target_words['short']} words)",
+            "medium": f"approximately {paragraph_counts['medium']} paragraphs (around {target_words['medium']} words)",
+            "lengthy": f"approximately {paragraph_counts['lengthy']} paragraphs (around {target_words['lengthy']} words)"
+        }
+        
+        # Add time estimates (assuming reading speed of ~150 words per minute)
+        read_time = {
+            "short": max(2, target_words["short"] // WPM),
+            "medium": max(3, target_words["medium"] // WPM),
+            "lengthy": max(5, target_words["lengthy"] // WPM)
+        }
+    else:
+        hours = 0
+
+        # Default if no duration provided
+        length_guidance = {
+            "short": "2-3 paragraphs (around 300 words)",
+            "medium": "4-5 paragraphs (around 500 words)",
+            "lengthy": "7-8 paragraphs (around 800 words)",
+        }
+        
+        read_time = {
+            "short": 2,
+            "medium": 3,
+            "lengthy": 5
+        }
+
+    # Base prompts that explicitly state expected length
+    if mode == "short":
+        message = f"""Generate a comprehensive summary of this transcript in {length_guidance['short']}. 
 This is from a video that's {format_duration(duration_seconds)} long.
 Your summary should take approximately {read_time['short']} minutes to read aloud.
 Focus on capturing the main topics, key arguments, and essential takeaways in chronological order.
@@ -581,8 +1029,8 @@ Focus on capturing the main topics, key arguments, and essential takeaways in ch
 TRANSCRIPT:
 {text}"""
 
-        elif mode == "medium":
-            message = f"""Generate a detailed summary of {length_guidance['medium']} from this transcript.
+    elif mode == "medium":
+        message = f"""Generate a detailed summary of {length_guidance['medium']} from this transcript.
 This is from a video that's {format_duration(duration_seconds)} long.
 Your summary should take approximately {read_time['medium']} minutes to read aloud.
 Include all main points with supporting details while maintaining a clear narrative structure.
@@ -590,8 +1038,8 @@ Include all main points with supporting details while maintaining a clear narrat
 TRANSCRIPT:
 {text}"""
 
-        elif mode == "lengthy":
-            message = f"""Generate a very comprehensive summary of {length_guidance['lengthy']} from this transcript.
+    elif mode == "lengthy":
+        message = f"""Generate a very comprehensive summary of {length_guidance['lengthy']} from this transcript.
 This is from a video that's {format_duration(duration_seconds)} long.
 Your summary should take approximately {read_time['lengthy']} minutes to read aloud.
 Cover all important topics, key arguments, and conclusions in detail with a thorough exploration of the content.
@@ -599,9 +1047,9 @@ Cover all important topics, key arguments, and conclusions in detail with a thor
 TRANSCRIPT:
 {text}"""
 
-        else:
-            # Default to medium if an invalid mode is provided
-            message = f"""Generate a summary of this transcript in {length_guidance['medium']}.
+    else:
+        # Default to medium if an invalid mode is provided
+        message = f"""Generate a summary of this transcript in {length_guidance['medium']}.
 This is from a video that's {format_duration(duration_seconds)} long.
 Your summary should take approximately {read_time['medium']} minutes to read aloud.
 Focus on key points and maintain chronological order.
@@ -609,55 +1057,221 @@ Focus on key points and maintain chronological order.
 TRANSCRIPT:
 {text}"""
 
-        # Special handling for very long videos
-        if hours >= 2:
-            message += f"\n\nIMPORTANT: Since this is a lengthy video (over 2 hours), ensure your summary is substantial enough to cover all key points. The summary should be AT LEAST {length_guidance[mode]}."
+    # Special handling for very long videos
+    if hours >= 2:
+        message += f"\n\nIMPORTANT: Since this is a lengthy video (over 2 hours), ensure your summary is substantial enough to cover all key points. The summary should be AT LEAST {length_guidance.get(mode, length_guidance['medium'])}."
+
+    return message
+
+
+def _chat(message, on_delta=None):
+    """Send one prompt to Cohere and return the reply text.
 
-        response = co.chat(
-            model="command-r-plus-08-2024",
+    With ``on_delta`` the reply is streamed and each text fragment is passed
+    to the callback as it arrives. Otherwise a slow reply may be hedged
+    with a second request.
+    """
+    if on_delta is None:
+
+        def chat():
+            with provider_call("cohere", "chat") as call:
+                response = co.chat(
+                    model=SUMMARY_MODEL,
+                    messages=[{"role": "user", "content": message}],
+                    request_options={"timeout_in_seconds": math.ceil(call.timeout)},
+                )
+            return response.message.content[0].text
+
+        return _hedged("cohere", chat)
+
+    parts = []
+    with provider_call("cohere", "chat_stream") as call:
+        for event in co.chat_stream(
+            model=SUMMARY_MODEL,
             messages=[{"role": "user", "content": message}],
-        )
-        return response.message.content[0].text
-    except Exception as e:
-        logging.error(f"Error generating summary: {e}")
-        return "Summary could not be generated."
+            request_options={"timeout_in_seconds": math.ceil(call.timeout)},
+        ):
+            if event.type == "content-delta":
+                text = event.delta.message.content.text
+                if text:
+                    parts.append(text)
+                    on_delta(text)
+    return "".join(parts)
+
+
+def summarize_text(text, mode="short", duration_seconds=None, on_delta=None):
+    """Summarize text using Cohere's Chat endpoint based on selected mode and video duration.
+
+    Raises if no summary could be generated, so that a failure is never
+    mistaken for (and cached as) a summary.
+    """
+    return _chat(build_summary_prompt(text, mode, duration_seconds), on_delta)
+
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token for English)."""
+    return len(text) // 4 + 1
+
+
+def chunk_transcript(text, subtitles=None, max_tokens=None):
+    """Split a transcript into chunks that fit within a token budget.
+
+    Chunks break on subtitle cue boundaries when cues are available and on
+    sentence boundaries otherwise; a single unit that is larger than the
+    budget is split on word boundaries.
+    """
+    max_tokens = max_tokens or SUMMARY_CHUNK_TOKENS
+    if subtitles:
+        units = CueTrack.from_value(subtitles).texts()
+    else:
+        units = re.split(r"(?<=[.!?])\s+", text)
+
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append(" ".join(current))
+        current = []
+        current_tokens = 0
+
+    for unit in units:
+        unit = unit.strip()
+        if not unit:
+            continue
+        unit_tokens = estimate_tokens(unit)
+
+        if unit_tokens > max_tokens:
+            flush()
+            words = unit.split()
+            step = max(1, max_tokens * 4 // 6)  # ~6 characters per word
+            for i in range(0, len(words), step):
+                chunks.append(" ".join(words[i : i + step]))
+            continue
+
+        if current_tokens + unit_tokens > max_tokens:
+            flush()
+        current.append(unit)
+        current_tokens += unit_tokens
+
+    flush()
+    return chunks
+
 
+async def summarize_long_text(text, mode="short", duration_seconds=None, subtitles=None, concurrency=None, on_delta=None):
+    """Map-reduce summarization for transcripts too long for one prompt.
 
-def generate_audio(summary_text, filename_prefix):
-    """Convert summary text to audio using gTTS with improved settings"""
+    The transcript is chunked, each chunk is summarized concurrently (at most
+    ``concurrency`` Cohere calls in flight), and the section summaries are
+    then combined into the final summary for the requested mode. Only the
+    final reduce step is streamed to ``on_delta``. Raises if any step fails.
+    """
+    chunks = chunk_transcript(text, subtitles)
+    if len(chunks) <= 1:
+        return await asyncio.to_thread(summarize_text, text, mode, duration_seconds, on_delta)
+
+    logging.info(f"Summarizing transcript in {len(chunks)} chunks")
+
+    def map_prompt(index, chunk):
+        return f"""Summarize section {index} of {len(chunks)} of a video transcript.
+Keep every main topic, key argument, name, figure and conclusion, in chronological order.
+Write plain prose without an introduction or closing remarks.
+
+SECTION:
+{chunk}"""
+
+    section_summaries = await process_batch(
+        [
+            asyncio.to_thread(_chat, map_prompt(i, chunk))
+            for i, chunk in enumerate(chunks, 1)
+        ],
+        limit=concurrency or SUMMARY_CONCURRENCY,
+    )
+
+    combined = "\n\n".join(
+        f"Section {i}:\n{summary}" for i, summary in enumerate(section_summaries, 1)
+    )
+    message = build_summary_prompt(combined, mode, duration_seconds)
+    message = message.replace(
+        "TRANSCRIPT:",
+        "The transcript has been condensed into the section summaries below, in order. "
+        "Combine them into one coherent summary.\n\nTRANSCRIPT:",
+        1,
+    )
+    return await asyncio.to_thread(_chat, message, on_delta)
+
+
+async def summarize_transcript(text, mode="short", duration_seconds=None, subtitles=None, on_delta=None):
+    """Summarize a transcript, switching to map-reduce for long inputs."""
+    if estimate_tokens(text) > SUMMARY_MAP_REDUCE_THRESHOLD:
+        return await summarize_long_text(text, mode, duration_seconds, subtitles, on_delta=on_delta)
+    return await asyncio.to_thread(summarize_text, text, mode, duration_seconds, on_delta)
+
+
+def get_tts_engine():
+    """Return the configured TTSEngine backend."""
+    if tts_engine_factory is not None:
+        return tts_engine_factory()
+    if TTS_BACKEND == "fake":
+        return FakeTTSEngine()
+    return GTTSEngine(lang="en", tld="com", timeout=PROVIDER_TIMEOUTS["gtts"])
+
+
+def generate_audio(summary_text, on_chunk=None):
+    """Convert summary text to audio and return the artifact name.
+
+    The text is split at sentence boundaries and the chunks are synthesized
+    in parallel; ``on_chunk(bytes)`` receives each chunk's MP3 frames in
+    order as soon as they are available.
+    """
     try:
         if not summary_text:
             return None
 
-        # Create unique filename
-        hash_id = hashlib.md5(summary_text.encode()).hexdigest()[:8]
-        filename = f"{filename_prefix}_{hash_id}.mp3"
-        filepath = os.path.join(EXPORTS_DIR, filename)
-
-        # Generate and save audio with improved settings
-        tts = gTTS(text=summary_text, lang="en", slow=False, tld="com")
-        tts.save(filepath)
+        # Audio is addressed by the engine and text it is synthesized from
+        filename = artifact_store.name_for(f"{TTS_BACKEND}\n{summary_text}", "mp3")
+        filepath = artifact_store.path(filename)
+        ensure_directory(artifact_store.root)
+
+        # Same text always produces the same audio, so reuse it if present
+        if os.path.exists(filepath):
+            return filename
+
+        engine = get_tts_engine()
+        if TTS_BACKEND in provider_limiters:
+            engine = _LimitedTTSEngine(engine, TTS_BACKEND)
+        with provider_call(TTS_BACKEND, "synthesize", limit=False):
+            synthesize_to_file(
+                summary_text,
+                filepath,
+                engine,
+                max_chars=TTS_CHUNK_CHARS,
+                concurrency=TTS_CONCURRENCY,
+                on_chunk=on_chunk,
+            )
         return filename
+    except RateLimitedError:
+        raise
     except Exception as e:
         logging.error(f"Audio generation failed: {e}")
         return None
 
 
-def export_summary_to_pdf(summary_text, filename):
-    """Export summary text to a PDF file.
+def export_summary_to_pdf(summary_text):
+    """Export summary text to a PDF in the artifact store.
 
     Args:
         summary_text (str): The text content to export
-        filename (str): Just the filename (not the full path)
 
     Returns:
-        str: The filename if successful, None otherwise
+        str: The artifact name if successful, None otherwise
     """
     try:
-        ensure_directory(EXPORTS_DIR)
-        filepath = os.path.join(EXPORTS_DIR, filename)
-
-        doc = SimpleDocTemplate(filepath, pagesize=letter)
+        buffer = io.BytesIO()
+        # invariant=1 leaves out timestamps so equal summaries give equal bytes
+        doc = SimpleDocTemplate(buffer, pagesize=letter, invariant=1)
         styles = getSampleStyleSheet()
         story = []
 
@@ -671,7 +1285,7 @@ def export_summary_to_pdf(summary_text, filename):
                 story.append(Paragraph(para.strip(), styles["Normal"]))
 
         doc.build(story)
-        return filename
+        return artifact_store.put(buffer.getvalue(), "pdf")
     except Exception as e:
         logging.error(f"PDF export failed: {e}")
         return None
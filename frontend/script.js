@@ -212,40 +212,77 @@ document.addEventListener('DOMContentLoaded', () => {
 
         // Update subtitles tab with timestamped content
         if (data && Array.isArray(data.subtitles) && data.subtitles.length > 0) {
-            subtitlesContent.innerHTML = data.subtitles.map(subtitle => {
-                // Robust timestamp extraction
-                const startTime =
-                    subtitle.start_seconds ||
-                    subtitle.start ||
-                    subtitle.startSeconds ||
-                    0;
-
-                const endTime =
-                    subtitle.end_seconds ||
-                    subtitle.end ||
-                    subtitle.endSeconds ||
-                    0;
-
-                return `
+            subtitlesContent.innerHTML = data.subtitles.map(subtitleItem).join('');
+            bindSubtitleClicks();
+        } else {
+            subtitlesContent.innerHTML = '<p class="text-gray-500">No subtitles available for this video.</p>';
+        }
+    }
+
+    function subtitleItem(subtitle) {
+        // Robust timestamp extraction
+        const startTime =
+            subtitle.start_seconds ||
+            subtitle.start ||
+            subtitle.startSeconds ||
+            0;
+
+        const endTime =
+            subtitle.end_seconds ||
+            subtitle.end ||
+            subtitle.endSeconds ||
+            0;
+
+        return `
                 <div class="subtitle-item" data-start="${startTime}" data-end="${endTime}">
                     <span class="subtitle-time">${formatTime(startTime)} → ${formatTime(endTime)}</span>
                     <p class="subtitle-text">${subtitle.text || 'No text'}</p>
                 </div>
-            `}).join('');
-
-            // Add click handlers for subtitle navigation
-            document.querySelectorAll('.subtitle-item').forEach(item => {
-                item.addEventListener('click', () => {
-                    const time = parseFloat(item.dataset.start);
-                    if (player && player.seekTo) {
-                        player.seekTo(time);
-                        player.playVideo();
-                        scrollToVideo();
-                    }
-                });
+            `;
+    }
+
+    // Add click handlers for subtitle navigation
+    function bindSubtitleClicks() {
+        document.querySelectorAll('.subtitle-item').forEach(item => {
+            item.addEventListener('click', () => {
+                const time = parseFloat(item.dataset.start);
+                if (player && player.seekTo) {
+                    player.seekTo(time);
+                    player.playVideo();
+                    scrollToVideo();
+                }
             });
-        } else {
-            subtitlesContent.innerHTML = '<p class="text-gray-500">No subtitles available for this video.</p>';
+        });
+    }
+
+    // Subtitle search uses the server's transcript index and returns ranked cues
+    const searchSubtitles = document.getElementById('searchSubtitles');
+    let subtitleSearchTimer = null;
+    searchSubtitles.addEventListener('input', (e) => {
+        clearTimeout(subtitleSearchTimer);
+        const query = e.target.value.trim();
+        subtitleSearchTimer = setTimeout(() => searchSubtitleCues(query), 250);
+    });
+
+    async function searchSubtitleCues(query) {
+        const videoId = currentVideoData?.player_data?.video_id;
+        if (!videoId) return;
+        if (!query) {
+            updateSubtitles(currentVideoData);
+            return;
+        }
+        try {
+            const params = new URLSearchParams({ q: query, video_id: videoId });
+            const response = await fetch(`/search?${params}`);
+            if (!response.ok) throw new Error('Search failed');
+            const data = await response.json();
+            const subtitlesContent = document.getElementById('subtitlesContent');
+            subtitlesContent.innerHTML = data.hits.length
+                ? data.hits.map(subtitleItem).join('')
+                : '<p class="text-gray-500">No matching subtitles.</p>';
+            bindSubtitleClicks();
+        } catch (error) {
+            console.error('Subtitle search error:', error);
         }
     }
 
@@ -397,15 +434,18 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // SRT download handler
     document.getElementById('downloadSrt').addEventListener('click', () => {
-        if (!currentVideoData?.srt_filename) {
+        if (!currentVideoData?.artifacts?.srt) {
             alert('No subtitles available for download');
             return;
         }
-        const filename = currentVideoData.srt_filename;
+        let filename = 'subtitles.srt';
 
-        fetch(`/exports/${filename}`)
+        fetch(currentVideoData.artifacts.srt)
             .then(response => {
                 if (!response.ok) throw new Error('SRT file not found');
+                const disposition = response.headers.get('Content-Disposition') || '';
+                const match = disposition.match(/filename="?([^";]+)"?/);
+                if (match) filename = match[1];
                 return response.blob();
             })
             .then(blob => {
@@ -435,9 +475,29 @@ document.addEventListener('DOMContentLoaded', () => {
                 content.classList.remove('active');
             });
             document.getElementById(targetId).classList.add('active');
+            if (targetId === 'visualization') {
+                loadKeywords();
+            }
         });
     });
 
+    // Keyword analytics are computed by the server on first request
+    let keywordsLoaded = false;
+    async function loadKeywords() {
+        if (keywordsLoaded || !currentVideoData?.artifacts?.keywords) return;
+        keywordsLoaded = true;
+        try {
+            const response = await fetch(currentVideoData.artifacts.keywords);
+            if (!response.ok) throw new Error('Keywords not available');
+            const data = await response.json();
+            Object.assign(currentVideoData, data);
+            createWordFrequencyChart(data.word_frequency);
+        } catch (error) {
+            console.error('Keywords error:', error);
+            keywordsLoaded = false;
+        }
+    }
+
     // Keyboard shortcuts
     document.addEventListener('keydown', (e) => {
         if (e.ctrlKey && e.key === 'Enter') {
@@ -451,7 +511,7 @@ document.addEventListener('DOMContentLoaded', () => {
             searchTranscript.focus();
         }
 
-        const isSearchFocused = document.activeElement === searchTranscript;
+        const isSearchFocused = [searchTranscript, searchSubtitles].includes(document.activeElement);
         const isVideoFocused = document.activeElement === document.getElementById('videoUrl');
         // Only toggle theme if search transcript is not focused
         if (e.key === 't' && !e.ctrlKey && !isSearchFocused && !isVideoFocused) {
@@ -471,7 +531,7 @@ document.addEventListener('DOMContentLoaded', () => {
         outputSection.style.display = 'none';
 
         try {
-            const response = await fetch('/process', {
+            const response = await fetch('/process/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -486,133 +546,199 @@ document.addEventListener('DOMContentLoaded', () => {
                 throw new Error(errorText || 'Failed to process video');
             }
 
-            const data = await response.json();
-            console.log("Full API Response:", data);  // Log full response
-
-            // Add null checks before accessing properties
-            if (!data || !data.metadata) {
-                throw new Error('Invalid response from server');
-            }
-
-            // Update video player
-            if (player) {
-                player.destroy();
-            }
-            player = new YT.Player('player', {
-                height: '390',
-                width: '640',
-                videoId: data.player_data.video_id,
-                playerVars: {
-                    'playsinline': 1
+            currentVideoData = {};
+            keywordsLoaded = false;
+            searchSubtitles.value = '';
+            let streamedSummary = '';
+            const summaryContent = document.getElementById('summaryContent');
+            summaryContent.innerHTML = '';
+            document.getElementById('audioPlayerContainer').innerHTML = '';
+
+            await readEventStream(response, (eventName, data) => {
+                switch (eventName) {
+                    case 'metadata':
+                        Object.assign(currentVideoData, data);
+                        renderMetadata(data);
+                        break;
+                    case 'transcript':
+                        Object.assign(currentVideoData, data);
+                        // Update transcript and subtitles with new structure
+                        updateSubtitles({
+                            transcription: data.transcription,
+                            subtitles: data.subtitles,
+                            source: data.transcription_source
+                        });
+                        break;
+                    case 'summary_delta':
+                        // Show raw text while the summary is still being generated
+                        streamedSummary += data.text;
+                        summaryContent.textContent = streamedSummary;
+                        break;
+                    case 'summary':
+                        currentVideoData.summary = data.summary;
+                        if (data.status === 'failed') {
+                            summaryContent.innerHTML = "<p class='text-gray-500'>Summary could not be generated. Please try again later.</p>";
+                            break;
+                        }
+                        summaryContent.innerHTML = formatSummary(data.summary);
+                        // Audio is synthesized by the server only once it is played
+                        if (currentVideoData.artifacts) {
+                            initializeAudioPlayer(currentVideoData.artifacts.audio);
+                        }
+                        break;
+                    case 'artifacts':
+                        currentVideoData.artifacts = data.artifacts;
+                        break;
+                    case 'error':
+                        throw new Error(data.error || 'Failed to process video');
+                    case 'done':
+                        console.log('Stage timings:', data.timings);
+                        if (document.getElementById('visualization').classList.contains('active')) {
+                            loadKeywords();
+                        }
+                        break;
                 }
             });
 
-            // Clean up existing description elements before updating
-            cleanupExistingDescription();
-
-            currentVideoData = data;
-            // Update metadata
-            document.getElementById('videoTitle').textContent = data.metadata.title;
-            document.getElementById('videoAuthor').textContent = data.metadata.author;
-            document.getElementById('videoViews').textContent = `${data.metadata.views.toLocaleString()} views`;
-            document.getElementById('videoDate').textContent = new Date(data.metadata.publish_date).toLocaleDateString();
-            document.getElementById('videoDescription').textContent = data.metadata.description;
-            initializeDescription(); // Initialize description expansion
-
-            // Update content
-            if (data.audio_filename) {
-                const audioContainer = document.getElementById('audioPlayerContainer');
-                initializeAudioPlayer(data.audio_filename);
-            } else {
-                document.getElementById('audioPlayerContainer').innerHTML = '';
+            console.log("Full API Response:", currentVideoData);  // Log full response
+            if (!currentVideoData.metadata) {
+                throw new Error('Invalid response from server');
             }
+        } catch (error) {
+            console.error('Processing Error:', error);
+            alert(`Error processing video: ${error.message}`);
+            loader.style.display = 'none';
+        }
+    });
 
-            function initializeAudioPlayer(audioFilename) {
-                const audioContainer = document.getElementById('audioPlayerContainer');
-                const audioHTML = `
-                    <div class="custom-audio-player">
-                        <audio id="customAudio" src="/exports/${audioFilename}"></audio>
-                        <button class="play-pause-btn">
-                            <i class="ri-play-fill"></i>
-                        </button>
-                        <div class="progress-container">
-                            <div class="progress-bar"></div>
-                        </div>
-                        <span class="time-display">0:00</span>
-                    </div>
-                `;
-            
-                audioContainer.innerHTML = audioHTML;
-            
-                const audio = document.getElementById('customAudio');
-                const playBtn = document.querySelector('.play-pause-btn');
-                const progressBar = document.querySelector('.progress-bar');
-                const progressContainer = document.querySelector('.progress-container');
-                const timeDisplay = document.querySelector('.time-display');
-            
-                if (!audio || !playBtn || !progressBar || !progressContainer || !timeDisplay) {
-                    console.error("Audio player elements not found.");
-                    return;
-                }
-            
-                audio.addEventListener('loadedmetadata', () => {
-                    timeDisplay.textContent = formatTime(audio.duration);
-                });
-            
-                audio.addEventListener('timeupdate', () => {
-                    const progress = (audio.currentTime / audio.duration) * 100;
-                    progressBar.style.width = `${progress}%`;
-                    timeDisplay.textContent = formatTime(audio.currentTime);
-                });
-            
-                playBtn.addEventListener('click', () => {
-                    if (audio.paused) {
-                        audio.play();
-                        playBtn.innerHTML = '<i class="ri-pause-fill"></i>';
-                    } else {
-                        audio.pause();
-                        playBtn.innerHTML = '<i class="ri-play-fill"></i>';
+    // Parse a text/event-stream response body and call onEvent(name, data) per event
+    async function readEventStream(response, onEvent) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let eventName = 'message';
+                const dataLines = [];
+                rawEvent.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) {
+                        eventName = line.slice(6).trim();
+                    } else if (line.startsWith('data:')) {
+                        dataLines.push(line.slice(5).trim());
                     }
                 });
-            
-                progressContainer.addEventListener('click', (e) => {
-                    const rect = progressContainer.getBoundingClientRect();
-                    const pos = (e.clientX - rect.left) / rect.width;
-                    audio.currentTime = pos * audio.duration;
-                });
-            
-                audio.addEventListener('ended', () => {
-                    playBtn.innerHTML = '<i class="ri-play-fill"></i>';
-                });
+                if (dataLines.length > 0) {
+                    onEvent(eventName, JSON.parse(dataLines.join('\n')));
+                }
             }
+        }
+    }
 
+    function renderMetadata(data) {
+        // Update video player
+        if (player) {
+            player.destroy();
+        }
+        player = new YT.Player('player', {
+            height: '390',
+            width: '640',
+            videoId: data.player_data.video_id,
+            playerVars: {
+                'playsinline': 1
+            }
+        });
 
-            document.getElementById('summaryContent').innerHTML = formatSummary(data.summary);
-            createWordFrequencyChart(data.word_frequency);
+        // Clean up existing description elements before updating
+        cleanupExistingDescription();
 
-            // Update transcript and subtitles with new structure
-            updateSubtitles({
-                transcription: data.transcription,
-                subtitles: data.subtitles,
-                source: data.transcription_source
-            });
+        // Update metadata
+        document.getElementById('videoTitle').textContent = data.metadata.title;
+        document.getElementById('videoAuthor').textContent = data.metadata.author;
+        document.getElementById('videoViews').textContent = `${data.metadata.views.toLocaleString()} views`;
+        document.getElementById('videoDate').textContent = new Date(data.metadata.publish_date).toLocaleDateString();
+        document.getElementById('videoDescription').textContent = data.metadata.description;
+
+        // Update recent videos
+        updateRecentVideos({
+            id: data.player_data.video_id,
+            title: data.metadata.title,
+            thumbnail: data.metadata.thumbnail
+        });
 
-            // Update recent videos
-            updateRecentVideos({
-                id: data.player_data.video_id,
-                title: data.metadata.title,
-                thumbnail: data.metadata.thumbnail
-            });
+        // Show the output as soon as there is something to look at
+        loader.style.display = 'none';
+        outputSection.style.display = 'block';
+        recentVideos.style.display = 'block';
+        initializeDescription(); // Initialize description expansion
+    }
 
-            loader.style.display = 'none';
-            outputSection.style.display = 'block';
-            recentVideos.style.display = 'block';
-        } catch (error) {
-            console.error('Processing Error:', error);
-            alert(`Error processing video: ${error.message}`);
-            loader.style.display = 'none';
+    function initializeAudioPlayer(audioUrl) {
+        const audioContainer = document.getElementById('audioPlayerContainer');
+        const audioHTML = `
+            <div class="custom-audio-player">
+                <audio id="customAudio" src="${audioUrl}" preload="none"></audio>
+                <button class="play-pause-btn">
+                    <i class="ri-play-fill"></i>
+                </button>
+                <div class="progress-container">
+                    <div class="progress-bar"></div>
+                </div>
+                <span class="time-display">0:00</span>
+            </div>
+        `;
+
+        audioContainer.innerHTML = audioHTML;
+
+        const audio = document.getElementById('customAudio');
+        const playBtn = document.querySelector('.play-pause-btn');
+        const progressBar = document.querySelector('.progress-bar');
+        const progressContainer = document.querySelector('.progress-container');
+        const timeDisplay = document.querySelector('.time-display');
+
+        if (!audio || !playBtn || !progressBar || !progressContainer || !timeDisplay) {
+            console.error("Audio player elements not found.");
+            return;
         }
-    });
+
+        audio.addEventListener('loadedmetadata', () => {
+            timeDisplay.textContent = formatTime(audio.duration);
+        });
+
+        audio.addEventListener('timeupdate', () => {
+            const progress = (audio.currentTime / audio.duration) * 100;
+            progressBar.style.width = `${progress}%`;
+            timeDisplay.textContent = formatTime(audio.currentTime);
+        });
+
+        playBtn.addEventListener('click', () => {
+            if (audio.paused) {
+                audio.play();
+                playBtn.innerHTML = '<i class="ri-pause-fill"></i>';
+            } else {
+                audio.pause();
+                playBtn.innerHTML = '<i class="ri-play-fill"></i>';
+            }
+        });
+
+        progressContainer.addEventListener('click', (e) => {
+            const rect = progressContainer.getBoundingClientRect();
+            const pos = (e.clientX - rect.left) / rect.width;
+            audio.currentTime = pos * audio.duration;
+        });
+
+        audio.addEventListener('ended', () => {
+            playBtn.innerHTML = '<i class="ri-play-fill"></i>';
+        });
+    }
 
     function formatTime(seconds) {
         // Ensure seconds is a valid number